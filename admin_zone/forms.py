@@ -1,6 +1,8 @@
 # admin_zone/forms.py
 
 from django import forms
+from catalog.models import Order
+from users.models import CustomUser
 
 class TimeSettingsForm(forms.Form):
     work_hours_start = forms.TimeField(
@@ -24,3 +26,48 @@ class TimeSettingsForm(forms.Form):
         required=False,
         widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
     )
+
+
+class OrderFilterForm(forms.Form):
+    """
+    Фильтры и поиск списка заказов в админ-зоне (передаются через GET).
+    """
+    status = forms.ChoiceField(
+        label='Статус',
+        required=False,
+        choices=[('', 'Все статусы')] + Order.STATUS_CHOICES,
+        widget=forms.Select(attrs={'class': 'form-select'}),
+    )
+    executor = forms.ModelChoiceField(
+        label='Исполнитель',
+        required=False,
+        queryset=CustomUser.objects.filter(is_staff=True).order_by('username'),
+        empty_label='Все исполнители',
+        widget=forms.Select(attrs={'class': 'form-select'}),
+    )
+    date_from = forms.DateField(
+        label='С даты',
+        required=False,
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
+    )
+    date_to = forms.DateField(
+        label='По дату',
+        required=False,
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
+    )
+    q = forms.CharField(
+        label='Поиск',
+        required=False,
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': '№ заказа, логин или телефон'}),
+    )
+
+
+class UserSearchForm(forms.Form):
+    """
+    Поиск пользователей в админ-зоне по логину или телефону.
+    """
+    q = forms.CharField(
+        label='Поиск',
+        required=False,
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Логин или телефон'}),
+    )
@@ -1,23 +1,129 @@
 # admin_zone/views.py
 
+from datetime import datetime, time, timedelta
+
 from django.shortcuts import render, get_object_or_404, redirect
+from django.db.models import Q, Sum
+from django.utils import timezone
 from users.models import CustomUser
-from catalog.models import Order, OrderItem, Review
-from django.db.models import Sum, Avg
+from catalog.models import Order, Product, Review
+from catalog.analytics import get_analytics_snapshot
+from catalog.pagination import keyset_paginate
+from catalog.services import order_summaries
 from django.contrib import messages
-from django.utils import timezone
-from datetime import timedelta
+from .forms import OrderFilterForm, UserSearchForm
+
+# Количество строк на странице списков админ-зоны
+ADMIN_PAGE_SIZE = 25
+
+# Наибольший номер заказа (BigAutoField): более длинные числа ищутся только как телефон
+MAX_ORDER_ID = 2 ** 63 - 1
+
+
+# Постраничная выборка для списков админ-зоны (самые новые записи первыми)
+def paginate_admin_list(request, queryset, field='created_at'):
+    page = keyset_paginate(
+        queryset,
+        ADMIN_PAGE_SIZE,
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+        field=field,
+        descending=True,
+    )
+
+    # Фильтры сохраняются в ссылках на соседние страницы
+    params = request.GET.copy()
+    params.pop('after', None)
+    params.pop('before', None)
+    return page, params.urlencode()
+
+
+# Условие поиска пользователей по префиксу логина или телефона.
+# Индексы под него создаёт users/migrations/0003 (COLLATE NOCASE в SQLite, *_pattern_ops в PostgreSQL)
+def user_prefix_condition(query):
+    condition = Q(username__istartswith=query) | Q(phone_number__startswith=query)
+    number = query.lstrip('#+')
+    if number.isdigit():
+        condition |= Q(phone_number__startswith=f"+{number}")
+    return condition
+
+
+# Поиск заказов по номеру, логину или телефону покупателя.
+# Покупатели ищутся отдельным подзапросом по индексам users_customuser, заказы — по индексу (user, created_at)
+def search_orders(queryset, query):
+    query = query.strip()
+    if not query:
+        return queryset
+
+    condition = Q(user__in=CustomUser.objects.filter(user_prefix_condition(query)).values('id'))
+    number = query.lstrip('#+')
+    # Сначала длина: int() от строки в тысячи цифр сам по себе бросает ValueError
+    if number.isdigit() and len(number) <= len(str(MAX_ORDER_ID)) and int(number) <= MAX_ORDER_ID:
+        condition |= Q(id=int(number))
+    return queryset.filter(condition)
+
+
+# Начало дня в текущем часовом поясе — граница фильтра по дате без функций над колонкой
+def day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
 
 # Функция для отображения главной страницы админ-зоны
 def admin_home(request):
+    form = UserSearchForm(request.GET)
     users = CustomUser.objects.all()
-    return render(request, 'admin_zone/admin_dashboard.html', {'users': users})
+
+    if form.is_valid() and form.cleaned_data['q']:
+        query = form.cleaned_data['q'].strip()
+        users = users.filter(user_prefix_condition(query))
+
+    try:
+        page, filter_query = paginate_admin_list(request, users, field='date_joined')
+    except ValueError:
+        return redirect('admin_zone:home')  # Испорченный курсор — показываем первую страницу
+
+    return render(request, 'admin_zone/admin_dashboard.html', {
+        'users': page.items,
+        'page': page,
+        'filter_query': filter_query,
+        'form': form,
+        'total_users': get_analytics_snapshot()['all']['users'],
+    })
 
 
 # Функция для управления заказами
 def manage_orders(request):
+    form = OrderFilterForm(request.GET)
     orders = Order.objects.all()
-    return render(request, 'admin_zone/manage_orders.html', {'orders': orders})
+    filtered = False
+
+    if form.is_valid():
+        filters = form.cleaned_data
+        filtered = any(filters.values())
+        if filters['status']:
+            orders = orders.filter(status=filters['status'])
+        if filters['executor']:
+            orders = orders.filter(executor=filters['executor'])
+        if filters['date_from']:
+            orders = orders.filter(created_at__gte=day_start(filters['date_from']))
+        if filters['date_to']:
+            orders = orders.filter(created_at__lt=day_start(filters['date_to'] + timedelta(days=1)))
+        orders = search_orders(orders, filters['q'])
+
+    try:
+        page, filter_query = paginate_admin_list(request, order_summaries(orders))
+    except ValueError:
+        return redirect('admin_zone:orders')
+
+    return render(request, 'admin_zone/manage_orders.html', {
+        'orders': page.items,
+        'page': page,
+        'filter_query': filter_query,
+        'form': form,
+        # С фильтрами — число найденных заказов (COUNT по тем же индексированным условиям), без них — общее из аналитики
+        'filtered': filtered,
+        'total_orders': orders.count() if filtered else get_analytics_snapshot()['all']['orders'],
+    })
 
 
 # Функция для обновления статуса заказа
@@ -36,8 +142,22 @@ def update_order_status(request, order_id):
 
 # Функция для управления отзывами
 def manage_reviews(request):
-    reviews = Review.objects.all()
-    return render(request, 'admin_zone/manage_reviews.html', {'reviews': reviews})
+    reviews = Review.objects.select_related('user', 'product')
+
+    try:
+        page, filter_query = paginate_admin_list(request, reviews)
+    except ValueError:
+        return redirect('admin_zone:reviews')
+
+    # Общее число отзывов берём из агрегатов рейтинга товаров, а не COUNT по таблице отзывов
+    total_reviews = Product.objects.aggregate(total=Sum('rating_count'))['total'] or 0
+
+    return render(request, 'admin_zone/manage_reviews.html', {
+        'reviews': page.items,
+        'page': page,
+        'filter_query': filter_query,
+        'total_reviews': total_reviews,
+    })
 
 
 # Функция для удаления отзыва
@@ -48,64 +168,29 @@ def delete_review(request, review_id):
     return redirect('admin_zone:reviews')
 
 
-# Функция для просмотра аналитики
 # Функция для просмотра аналитики
 def view_analytics(request):
-    now = timezone.now()
-    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    week_start = today_start - timedelta(days=today_start.weekday())
-    month_start = today_start.replace(day=1)
-    year_start = today_start.replace(month=1, day=1)
-
-    # Функция для подсчета данных по периодам
-    def get_period_data(start_date):
-        orders = Order.objects.filter(created_at__gte=start_date)
-        users = CustomUser.objects.filter(date_joined__gte=start_date).count()
-        revenue = OrderItem.objects.filter(order__created_at__gte=start_date).aggregate(Sum('price'))['price__sum'] or 0
-        average_check = orders.aggregate(avg_check=Avg('total_price'))['avg_check'] or 0
-
-        return {
-            "users": users,
-            "orders": orders.count(),
-            "revenue": round(revenue, 2),
-            "average_check": round(average_check, 2),
-        }
-
-    # Данные для каждого периода
-    data_today = get_period_data(today_start)
-    data_week = get_period_data(today_start - timedelta(days=7))
-    data_month = get_period_data(month_start)
-    data_year = get_period_data(year_start)
-
-    # Общие данные за весь период
-    total_orders = Order.objects.count()
-    total_revenue = OrderItem.objects.aggregate(total_revenue=Sum('price'))['total_revenue'] or 0
-    total_users = CustomUser.objects.count()
-    average_order_value = Order.objects.aggregate(avg_order=Avg('total_price'))['avg_order'] or 0
+    # Сводка по всем периодам считается одним проходом и кэшируется
+    snapshot = get_analytics_snapshot()
+    total = snapshot["all"]
 
     # Передача данных в шаблон
-    return render(request, 'admin_zone/view_analytics.html', {
-        'total_orders': total_orders,
-        'total_revenue': round(total_revenue, 2),
-        'total_users': total_users,
-        'average_order_value': round(average_order_value, 2),
-        'users_today': data_today['users'],
-        'orders_today': data_today['orders'],
-        'revenue_today': data_today['revenue'],
-        'average_today': data_today['average_check'],
-        'users_week': data_week['users'],
-        'orders_week': data_week['orders'],
-        'revenue_week': data_week['revenue'],
-        'average_week': data_week['average_check'],
-        'users_month': data_month['users'],
-        'orders_month': data_month['orders'],
-        'revenue_month': data_month['revenue'],
-        'average_month': data_month['average_check'],
-        'users_year': data_year['users'],
-        'orders_year': data_year['orders'],
-        'revenue_year': data_year['revenue'],
-        'average_year': data_year['average_check'],
-    })
+    context = {
+        'total_orders': total['orders'],
+        'total_revenue': total['revenue'],
+        'total_users': total['users'],
+        'average_order_value': total['average_check'],
+    }
+    for period in ("today", "week", "month", "year"):
+        data = snapshot[period]
+        context.update({
+            f'users_{period}': data['users'],
+            f'orders_{period}': data['orders'],
+            f'revenue_{period}': data['revenue'],
+            f'average_{period}': data['average_check'],
+        })
+
+    return render(request, 'admin_zone/view_analytics.html', context)
 
 from django.shortcuts import render, redirect
 from django.contrib import messages
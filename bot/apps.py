@@ -9,6 +9,7 @@ class BotConfig(AppConfig):
 
     def ready(self):
         """
-        Никакой логики для запуска бота в данный момент
+        Бот здесь не запускается; подключаем только обработчики сигналов
+        (изменение настроек времени будит воркер уведомлений).
         """
-        pass
+        from bot.notification import outbox  # noqa: F401
@@ -40,8 +40,14 @@ async def run_bot():
             logger.error("Ошибка: токен Telegram бота не найден. Проверьте файл .env.")
             return
 
+        from bot.webhook import is_webhook_mode
+        from bot.persistence import DjangoPersistence
+        if is_webhook_mode():
+            logger.info("Режим webhook: обновления принимает ASGI-приложение (flowerdelivery.asgi), polling не запускается.")
+            return
+
         logger.info("Инициализация Telegram-бота...")
-        application = ApplicationBuilder().token(token).build()
+        application = ApplicationBuilder().token(token).persistence(DjangoPersistence()).build()
 
         # Импорт обработчиков из регистрационного файла
         from bot.handlers.registration import register_handlers
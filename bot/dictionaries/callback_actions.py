@@ -38,55 +38,60 @@ from bot.handlers.customer import (
     customer_confirm_checkout,
     customer_cancel_order,
     customer_repeat_order,
+    customer_catalog_page,
     )
 
-from bot.handlers.common_helpers import feature_in_development
+from bot.handlers.common_helpers import feature_in_development, ignore_callback
+from bot.utils.callback_router import CallbackRouter
 
-# Словарь callback-действий (инлайн-кнопки)
-CALLBACK_ACTIONS = {
-    # 🔹 Управление пользователями для Администратора
-    "user_status_update": update_user_status_callback,
-    "cancel_user_status": cancel_user_status_callback,
+# Таблица callback-действий (инлайн-кнопки): действие → обработчик и типы параметров.
+# Формат callback_data — «action:param1:param2» (см. encode_callback).
+CALLBACK_ROUTER = CallbackRouter()
+register = CALLBACK_ROUTER.register
 
-    # 🔹 Управление заказами для Администратора
-    "order_status_update": update_order_status,
-    "orders_new": handle_orders_by_status_new,
-    "orders_processing": handle_orders_processing,
-    "orders_completed": handle_orders_completed,
-    "order_details": handle_order_details,
-    "assign_executor": handle_assign_executor,
-    "set_executor": handle_set_executor,
-    "admin_orders": handle_admin_orders,
+# 🔹 Управление пользователями для Администратора
+register("user_status_update", update_user_status_callback, int, bool)
+register("cancel_user_status", cancel_user_status_callback)
 
-    # 🔹 Аналитика для Администратора (НОВЫЙ ПОДХОД)
-    "analytics_today": analytics_today,
-    "analytics_week": analytics_week,
-    "analytics_month": analytics_month,
-    "analytics_year": analytics_year,
-    "analytics_all_time": analytics_all_time,
-    "analytics_cancel": analytics_cancel,
+# 🔹 Управление заказами для Администратора
+register("orders_new", handle_orders_by_status_new)
+register("orders_processing", handle_orders_processing)
+register("orders_completed", handle_orders_completed)
+register("order_details", handle_order_details, int)
+register("assign_executor", handle_assign_executor, int)
+register("set_executor", handle_set_executor, int, int)
+register("admin_orders", handle_admin_orders)
 
-    # 🔧 В разработке
-    "feature_in_development": feature_in_development,
+# 🔹 Аналитика для Администратора
+register("analytics_today", analytics_today)
+register("analytics_week", analytics_week)
+register("analytics_month", analytics_month)
+register("analytics_year", analytics_year)
+register("analytics_all_time", analytics_all_time)
+register("analytics_cancel", analytics_cancel)
 
-    # 🔹 Управление заказами для Сотрудника
-    "staff_take_order": handle_staff_take_order,
-    "staff_order_details" : handle_staff_order_details,
-    "staff_complete_order": complete_order_callback,  # ✅ Завершение заказа
-    "staff_cancel_order": cancel_order_callback,  # ❌ Отмена заказа
-    "staff_help": handle_staff_help,
+# 🔧 В разработке
+register("feature_in_development", feature_in_development)
 
-    # 🔹 Управление заказами для Клиента
-    "add_to_cart": customer_add_to_cart,
-    "decrease": customer_decrease_quantity,
-    "increase": customer_increase_quantity,
-    "remove_from_cart": customer_remove_from_cart,
-    "checkout": customer_view_checkout,
-    "confirm_order": customer_confirm_checkout,
-    "cancel_order": customer_cancel_order,
-    "repeat_order": customer_repeat_order,
+# 🔹 Управление заказами для Сотрудника
+register("order_status_update", update_order_status, int, str)
+register("staff_take_order", handle_staff_take_order, int)
+register("staff_order_details", handle_staff_order_details, int)
+register("staff_complete_order", complete_order_callback, int)  # ✅ Завершение заказа
+register("staff_cancel_order", cancel_order_callback, int)  # ❌ Отмена заказа
+register("staff_help", handle_staff_help)
 
+# 🔹 Управление заказами для Клиента
+register("add_to_cart", customer_add_to_cart, int)
+register("decrease", customer_decrease_quantity, int)
+register("increase", customer_increase_quantity, int)
+register("remove_from_cart", customer_remove_from_cart, int)
+register("checkout", customer_view_checkout)
+register("confirm_order", customer_confirm_checkout)
+register("cancel_order", customer_cancel_order)
+register("repeat_order", customer_repeat_order, int)
+register("catalog_page", customer_catalog_page, str, str)
 
-
-}
-
+# 🔹 Служебные кнопки без действия (счётчик количества, «Уже в корзине»)
+register("ignore", ignore_callback)
+register("none", ignore_callback)
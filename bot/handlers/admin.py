@@ -6,11 +6,14 @@ from django.db.models import Count
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from asgiref.sync import sync_to_async
-from datetime import datetime, timedelta  # Для аналитики
 from bot.keyboards.admin_keyboards import admin_keyboard
-from bot.utils.callback_parser import parse_callback_data
+from bot.utils.callback_parser import encode_callback
+from bot.utils.user_cache import invalidate_user
 from users.models import CustomUser
 from catalog.models import Order
+from catalog.analytics import get_analytics_snapshot
+from catalog.services import claim_order
+from bot.notification.staff_messages import close_staff_notifications
 from prettytable import PrettyTable
 from bot.utils.access_control import check_access
 from bot.utils.messaging import send_message
@@ -37,7 +40,7 @@ async def admin_start(update: Update, context: ContextTypes.DEFAULT_TYPE, user:
     Приветствие администратора.
     """
     try:
-        user = await sync_to_async(CustomUser.objects.get)(telegram_id=update.effective_user.id)
+        # Пользователь уже получен в start() — повторно из БД не читаем
         await update.message.reply_text(
             f"👑 Здравствуйте, {user.username} (Администратор)!\n"
             "💻 Доступные команды:\n"
@@ -47,9 +50,6 @@ async def admin_start(update: Update, context: ContextTypes.DEFAULT_TYPE, user:
             "ℹ️ Помощь",
             reply_markup=admin_keyboard,
         )
-    except CustomUser.DoesNotExist:
-        logger.error(f"Пользователь с Telegram ID {update.effective_user.id} не найден.")
-        await update.message.reply_text("Ваш аккаунт не зарегистрирован в системе.")
     except Exception as e:
         logger.error(f"Ошибка в admin_start: {e}", exc_info=True)
         await update.message.reply_text("Произошла ошибка. Попробуйте позже.")
@@ -111,7 +111,7 @@ async def handle_admin_orders(update: Update, context: ContextTypes.DEFAULT_TYPE
 
 
 # ======= Обработчик деталей заказа =======
-async def handle_order_details(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def handle_order_details(update: Update, context: ContextTypes.DEFAULT_TYPE, order_id: int):
     """
     Обработчик для отображения деталей заказа.
     Показывает информацию о заказе и кнопки для действий.
@@ -120,8 +120,6 @@ async def handle_order_details(update: Update, context: ContextTypes.DEFAULT_TYP
     await query.answer()
 
     try:
-        # Получаем ID заказа из callback_data
-        order_id = int(query.data.split(":")[1])
         order = await sync_to_async(Order.objects.select_related("user").get)(id=order_id)
 
         # Переводим статус
@@ -141,7 +139,7 @@ async def handle_order_details(update: Update, context: ContextTypes.DEFAULT_TYP
 
         # Если заказ "Новый", добавляем кнопку назначения исполнителя
         if order.status == "created":  # ✅ Исправлено с "Новый" на "created"
-            keyboard.append([InlineKeyboardButton("👷 Назначить исполнителя", callback_data=f"assign_executor:{order.id}")])
+            keyboard.append([InlineKeyboardButton("👷 Назначить исполнителя", callback_data=encode_callback("assign_executor", order.id))])
 
         # Добавляем кнопку "Назад" для возврата в список заказов
         # keyboard.append([InlineKeyboardButton("🔙 Назад", callback_data="orders_new")])
@@ -196,7 +194,7 @@ async def handle_orders_by_status_new(update: Update, context: ContextTypes.DEFA
 
         # Кнопки для просмотра деталей
         keyboard = [
-            [InlineKeyboardButton(f"📌 Заказ #{order.id}", callback_data=f"order_details:{order.id}")]
+            [InlineKeyboardButton(f"📌 Заказ #{order.id}", callback_data=encode_callback("order_details", order.id))]
             for order in new_orders
         ]
         # keyboard.append([InlineKeyboardButton("🔙 Назад", callback_data="admin_orders")])
@@ -215,7 +213,7 @@ async def handle_orders_by_status_new(update: Update, context: ContextTypes.DEFA
 
 
 # ======= Обработчик назначения исполнителя =======
-async def handle_assign_executor(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def handle_assign_executor(update: Update, context: ContextTypes.DEFAULT_TYPE, order_id: int):
     """
     Обработчик кнопки "👷 Назначить исполнителя".
     Показывает список доступных исполнителей и предлагает выбрать одного.
@@ -224,7 +222,6 @@ async def handle_assign_executor(update: Update, context: ContextTypes.DEFAULT_T
     await query.answer()
 
     try:
-        order_id = int(query.data.split(":")[1])
         order = await sync_to_async(Order.objects.select_related("user").get)(id=order_id)
 
         if order.status != "created":
@@ -245,10 +242,10 @@ async def handle_assign_executor(update: Update, context: ContextTypes.DEFAULT_T
             return
 
         keyboard = [
-            [InlineKeyboardButton(f"{executor.username} (ID: {executor.id})", callback_data=f"set_executor:{order_id}:{executor.id}")]
+            [InlineKeyboardButton(f"{executor.username} (ID: {executor.id})", callback_data=encode_callback("set_executor", order_id, executor.id))]
             for executor in executors
         ]
-        keyboard.append([InlineKeyboardButton("🔙 Назад", callback_data=f"order_details:{order_id}")])
+        keyboard.append([InlineKeyboardButton("🔙 Назад", callback_data=encode_callback("order_details", order_id))])
 
         reply_markup = InlineKeyboardMarkup(keyboard)
         await query.message.reply_text("Выберите исполнителя для назначения:", reply_markup=reply_markup)
@@ -266,7 +263,7 @@ async def handle_assign_executor(update: Update, context: ContextTypes.DEFAULT_T
 
 
 # ======= Обработчик назначения исполнителя на заказ =======
-async def handle_set_executor(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def handle_set_executor(update: Update, context: ContextTypes.DEFAULT_TYPE, order_id: int, executor_id: int):
     """
     Обработчик кнопки выбора исполнителя.
     Назначает выбранного исполнителя на заказ.
@@ -275,35 +272,33 @@ async def handle_set_executor(update: Update, context: ContextTypes.DEFAULT_TYPE
     await query.answer()
 
     try:
-        _, order_id, executor_id = query.data.split(":")
-        order_id, executor_id = int(order_id), int(executor_id)
-
-        order = await sync_to_async(Order.objects.select_related("user").get)(id=order_id)
         executor = await sync_to_async(CustomUser.objects.get)(id=executor_id, is_staff=True)
 
-        if order.executor:
-            await query.edit_message_text(f"⚠️ Исполнитель уже назначен: {order.executor.username}.")
-            return
-
         # Проверяем, что у исполнителя менее 3 заказов
         executor_orders_count = await sync_to_async(lambda: executor.executor_orders.count())()
         if executor_orders_count >= 3:
             await query.edit_message_text("❌ Ошибка: у этого исполнителя уже 3 активных заказа.")
             return
 
-        order.executor = executor
-        order.status = "processing"
-        await sync_to_async(order.save)()
+        # Атомарное назначение: не перезапишет исполнителя, если заказ уже взяли
+        if not await sync_to_async(claim_order)(order_id, executor.id):
+            order = await sync_to_async(Order.objects.select_related("executor").get)(id=order_id)
+            executor_name = order.executor.username if order.executor else "—"
+            await query.edit_message_text(f"⚠️ Исполнитель уже назначен: {executor_name}.")
+            return
+
+        await query.edit_message_text(f"✅ Исполнитель **{executor.username}** назначен на заказ #{order_id}. Статус изменён на 'В обработке'.")
 
-        await query.edit_message_text(f"✅ Исполнитель **{executor.username}** назначен на заказ #{order.id}. Статус изменён на 'В обработке'.")
+        logger.info(f"✅ Исполнитель {executor.username} (ID {executor.id}) назначен на заказ #{order_id}")
 
-        logger.info(f"✅ Исполнитель {executor.username} (ID {executor.id}) назначен на заказ #{order.id}")
+        # Обновляем разосланные сотрудникам уведомления о заказе
+        await close_staff_notifications(order_id, f"🔒 Заказ #{order_id} назначен исполнителю {executor.username}.")
 
         # Отправляем уведомление исполнителю
         await send_message(
             context,  # Передаём сам `context`, а не `context.application.bot`
             executor.telegram_id,
-            f"📦 Вам назначен новый заказ #{order.id}. Проверьте детали в системе."
+            f"📦 Вам назначен новый заказ #{order_id}. Проверьте детали в системе."
         )
 
     except ValueError:
@@ -442,8 +437,8 @@ async def handle_user_status_update_request(update: Update, context: ContextType
 
         keyboard = [
             [
-                InlineKeyboardButton("Сделать сотрудником", callback_data=f"user_status_update:{user.id}:true"),
-                InlineKeyboardButton("Сделать клиентом", callback_data=f"user_status_update:{user.id}:false"),
+                InlineKeyboardButton("Сделать сотрудником", callback_data=encode_callback("user_status_update", user.id, True)),
+                InlineKeyboardButton("Сделать клиентом", callback_data=encode_callback("user_status_update", user.id, False)),
             ],
             [InlineKeyboardButton("Отмена", callback_data="cancel_user_status")],
         ]
@@ -466,7 +461,7 @@ async def handle_user_status_update_request(update: Update, context: ContextType
 
 
 # ======= Callback для обновления статуса пользователя =======
-async def update_user_status_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def update_user_status_callback(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int, is_staff: bool):
     """
     Обработчик inline-кнопок для изменения статуса пользователя.
     """
@@ -474,20 +469,11 @@ async def update_user_status_callback(update: Update, context: ContextTypes.DEFA
     await query.answer()
 
     try:
-        parts = query.data.split(":")
-        if len(parts) != 3:
-            logger.error(f"❌ Ошибка: некорректный формат callback_data: {query.data}")
-            await query.edit_message_text("❌ Произошла ошибка при изменении статуса.")
-            return
-
-        action, user_id, is_staff_str = parts
-        user_id = int(user_id)
-        is_staff = is_staff_str.lower() == "true"
-
         user = await sync_to_async(CustomUser.objects.get)(id=user_id)
 
         user.is_staff = is_staff
         await sync_to_async(user.save)()
+        invalidate_user(user.telegram_id)
 
         new_status = "Сотрудник" if user.is_staff else "Клиент"
         await query.edit_message_text(f"✅ Статус пользователя #{user.id} изменён на '{new_status}'.")
@@ -552,8 +538,7 @@ async def analytics_today(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
 
     try:
-        filter_kwargs = {"created_at__date": datetime.now().date()}
-        analytics_text = await get_analytics_text("Сегодня", filter_kwargs)
+        analytics_text = await get_analytics_text("Сегодня", "today")
         await query.edit_message_text(analytics_text, parse_mode="Markdown")
     except Exception as e:
         logger.error(f"Ошибка в analytics_today: {e}", exc_info=True)
@@ -568,8 +553,7 @@ async def analytics_week(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
 
     try:
-        filter_kwargs = {"created_at__gte": datetime.now().date() - timedelta(days=7)}
-        analytics_text = await get_analytics_text("Последние 7 дней", filter_kwargs)
+        analytics_text = await get_analytics_text("Последние 7 дней", "week")
         await query.edit_message_text(analytics_text, parse_mode="Markdown")
     except Exception as e:
         logger.error(f"Ошибка в analytics_week: {e}", exc_info=True)
@@ -584,11 +568,7 @@ async def analytics_month(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
 
     try:
-        filter_kwargs = {
-            "created_at__month": datetime.now().month,
-            "created_at__year": datetime.now().year,
-        }
-        analytics_text = await get_analytics_text("Текущий месяц", filter_kwargs)
+        analytics_text = await get_analytics_text("Текущий месяц", "month")
         await query.edit_message_text(analytics_text, parse_mode="Markdown")
     except Exception as e:
         logger.error(f"Ошибка в analytics_month: {e}", exc_info=True)
@@ -603,8 +583,7 @@ async def analytics_year(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
 
     try:
-        filter_kwargs = {"created_at__year": datetime.now().year}
-        analytics_text = await get_analytics_text("Текущий год", filter_kwargs)
+        analytics_text = await get_analytics_text("Текущий год", "year")
         await query.edit_message_text(analytics_text, parse_mode="Markdown")
     except Exception as e:
         logger.error(f"Ошибка в analytics_year: {e}", exc_info=True)
@@ -619,8 +598,7 @@ async def analytics_all_time(update: Update, context: ContextTypes.DEFAULT_TYPE)
     await query.answer()
 
     try:
-        filter_kwargs = {}  # Все заказы без ограничений по времени
-        analytics_text = await get_analytics_text("Всё время", filter_kwargs)
+        analytics_text = await get_analytics_text("Всё время", "all")
         await query.edit_message_text(analytics_text, parse_mode="Markdown")
     except Exception as e:
         logger.error(f"Ошибка в analytics_all_time: {e}", exc_info=True)
@@ -636,16 +614,18 @@ async def analytics_cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.edit_message_text("🔙 Вы вышли из аналитики.")
 
 
-async def get_analytics_text(title: str, filter_kwargs: dict) -> str:
+async def get_analytics_text(title: str, period: str) -> str:
     """
-    Формирует текст аналитики по заданным фильтрам.
+    Формирует текст аналитики за период из общей с веб-панелью сводки
+    (period — ключ из catalog.analytics.ANALYTICS_PERIODS).
     """
-    total_orders = await sync_to_async(lambda: Order.objects.filter(**filter_kwargs).count())()
-    total_revenue = await sync_to_async(
-        lambda: sum(order.total_price for order in Order.objects.filter(**filter_kwargs))
-    )()
-    average_order_value = total_revenue / total_orders if total_orders > 0 else 0
-    total_users = await sync_to_async(lambda: CustomUser.objects.count())()
+    snapshot = await sync_to_async(get_analytics_snapshot)()
+    data = snapshot[period]
+
+    total_orders = data["orders"]
+    total_revenue = data["revenue"]
+    average_order_value = data["average_check"]
+    total_users = snapshot["all"]["users"]
 
     analytics_text = (
         f"📊 **Аналитика за {title}:**\n\n"
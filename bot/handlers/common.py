@@ -3,14 +3,12 @@
 import logging
 from telegram import Update
 from telegram.ext import ContextTypes
-from users.models import CustomUser
-from asgiref.sync import sync_to_async
 from bot.dictionaries.text_actions import TEXT_ACTIONS
 from bot.dictionaries.smart_replies import TEXT_RESPONSES
 from bot.dictionaries.smart_replies import get_smart_reply
-from bot.dictionaries.callback_actions import CALLBACK_ACTIONS
+from bot.dictionaries.callback_actions import CALLBACK_ROUTER
 from bot.utils.callback_parser import parse_callback_data  # Новый парсер
-from django.core.cache import cache
+from bot.utils.user_cache import find_current_user
 from bot.handlers.admin import admin_start
 from bot.handlers.admin import (
     update_user_status_callback,
@@ -90,7 +88,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     logger.info(f"📩 /start от пользователя {telegram_id}")
 
     try:
-        user = await sync_to_async(CustomUser.objects.filter(telegram_id=telegram_id).first)()
+        user = await find_current_user(update, context)
 
         if user:
             role = "admin" if user.is_superuser else "staff" if user.is_staff else "customer"
@@ -139,15 +137,12 @@ async def handle_user_input(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     logger.info(f"📨 Текст от {telegram_id}: {user_text}")
 
-    # Проверяем роль пользователя (с кешированием для оптимизации)
-    role = cache.get(f"user_role_{telegram_id}")
-    if not role:
-        user = await sync_to_async(CustomUser.objects.filter(telegram_id=telegram_id).first)()
-        if user:
-            role = "admin" if user.is_superuser else "manager" if user.is_staff else "customer"
-            cache.set(f"user_role_{telegram_id}", role, timeout=3600)
-        else:
-            role = "new_user"
+    # Роль пользователя (сам пользователь уже определён пред-обработчиком load_context_user)
+    user = await find_current_user(update, context)
+    if user:
+        role = "admin" if user.is_superuser else "manager" if user.is_staff else "customer"
+    else:
+        role = "new_user"
 
     logger.info(f"🔍 Определена роль: {role}")
 
@@ -183,21 +178,14 @@ async def handle_inline_buttons(update: Update, context: ContextTypes.DEFAULT_TY
     callback_data = query.data
     logger.info(f"🔍 Получен callback_data: {callback_data}")
 
-    # 🔹 Проверяем точное совпадение
-    action_func = CALLBACK_ACTIONS.get(callback_data)
-
-    # 🔹 Если нет точного совпадения, ищем динамический обработчик (например, user_status_update:19:true)
-    if not action_func:
-        for key in CALLBACK_ACTIONS.keys():
-            if callback_data.startswith(key):  # Если начало совпадает
-                action_func = CALLBACK_ACTIONS[key]
-                break
+    # 🔹 Поиск обработчика по имени действия (O(1)) и разбор параметров по его схеме
+    action_func, params = CALLBACK_ROUTER.resolve(callback_data)
 
     if action_func:
         logger.info(f"✅ Найден обработчик: {action_func.__name__} для callback_data={callback_data}")
 
         try:
-            await action_func(update, context)  # Вызываем без передачи параметров
+            await action_func(update, context, *params)
         except Exception as e:
             logger.error(f"❌ Ошибка при выполнении '{callback_data}': {e}", exc_info=True)
             await query.edit_message_text("❌ Ошибка при выполнении действия. Обратитесь к администратору.")
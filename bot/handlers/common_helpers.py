@@ -8,3 +8,9 @@ async def feature_in_development(update: Update, context: ContextTypes.DEFAULT_T
     Заглушка для функций, которые в разработке.
     """
     await update.message.reply_text("⏳ Эта функция находится в разработке. Пожалуйста, зайдите позже.")
+
+
+async def ignore_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Служебные кнопки без действия: нажатие уже подтверждено в handle_inline_buttons.
+    """
@@ -1,13 +1,12 @@
 # bot/handlers/customer.py
 
 import os
-from PIL import Image
 from telegram.constants import ParseMode  # Для HTML-разметки сообщений
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import CallbackContext, ContextTypes
 from asgiref.sync import sync_to_async
 from prettytable import PrettyTable
-from catalog.models import Product, Cart, CartItem, Order, OrderItem
+from catalog.models import Product, Cart, CartItem, Order
 import logging
 from users.models import CustomUser
 from bot.keyboards.customer_keyboards import customer_keyboard
@@ -15,14 +14,28 @@ from bot.keyboards.customer_keyboards import customer_keyboard
 # from bot.handlers.admin import analytics, manage_users, orders
 
 from telegram.constants import ParseMode
-from PIL import Image
 from textwrap import shorten
 from bot.utils.time_utils import is_working_hours
+from catalog.services import (
+    place_order, order_summaries, catalog_page, EmptyCartError,
+    get_cart, add_product_to_cart, change_cart_quantity, copy_order_to_cart,
+)
+from catalog.thumbnails import THUMBNAIL_SIZES, get_thumbnail, thumbnail_key
+from bot.models import TelegramPhoto
+from bot.utils.image_pool import ImagePoolBusy, get_image_pool
+from bot.utils.callback_parser import encode_callback
+from bot.utils.user_cache import find_current_user, get_current_user
 
 
 # Настройка логгера
 logger = logging.getLogger(__name__)
 
+# 🔹 Сколько штук одного товара можно добавить в корзину кнопкой «В корзину»
+MAX_CART_ITEM_QUANTITY = 10
+
+# Товаров на одной странице каталога в боте
+CATALOG_PAGE_SIZE = 5
+
 async def customer_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Приветствие клиента.
@@ -35,8 +48,8 @@ async def customer_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     context.user_data["role"] = "customer"
     context.user_data["state"] = "customer_start"
 
-    # Получаем пользователя из базы
-    user = await sync_to_async(CustomUser.objects.filter(telegram_id=telegram_id).first)()
+    # Пользователь текущего обновления (из кеша, без запроса к БД)
+    user = await find_current_user(update, context)
 
     if not user:
         logger.error(f"[CUSTOMER_START ERROR] Пользователь {telegram_id} не найден в БД!")
@@ -75,82 +88,177 @@ async def handle_customer_help(update: Update, context: ContextTypes.DEFAULT_TYP
 
 # ======= Просмотр каталога товаров =======
 # Функция уменьшения изображения
-def customer_resize_image(image_path, max_size=(512, 512)):
+def customer_resize_image(image_path, max_size=THUMBNAIL_SIZES["bot"]):
     """
-    Уменьшает изображение до max_size и сохраняет в /tmp/, чтобы не изменять оригинальный файл.
+    Возвращает путь к закэшированной миниатюре max_size (оригинальный файл не изменяется).
     """
     try:
-        with Image.open(image_path) as img:
-            img.thumbnail(max_size)
-
-            # Создаём временный файл в /tmp/
-            resized_path = f"/tmp/{os.path.basename(image_path)}_resized.jpg"
-            img.save(resized_path, "JPEG")
-
-            return resized_path
+        return get_thumbnail(image_path, max_size)
     except Exception as e:
         logger.error(f"❌ Ошибка при обработке изображения {image_path}: {e}")
         return image_path  # Возвращаем оригинальный путь, если уменьшение не удалось
 
-async def handle_customer_catalog(update: Update, context: ContextTypes.DEFAULT_TYPE):
+
+def load_bot_photo(image_path):
     """
-    Отображение списка товаров с инлайн-кнопками для добавления в корзину.
+    Готовит миниатюру для бота и читает её в память. Выполняется в пуле изображений.
     """
-    telegram_id = update.effective_user.id
-    logger.info(f"[CUSTOMER_CATALOG] Пользователь {telegram_id} запросил каталог товаров.")
+    with open(customer_resize_image(image_path), "rb") as photo:
+        return photo.read()
 
-    try:
-        # Получаем список товаров из базы
-        products = await sync_to_async(lambda: list(Product.objects.all()))()
 
-        if not products:
-            await update.message.reply_text("📭 Каталог пока пуст. Загляните позже!")
-            return
+def get_cached_photos(product_ids):
+    """
+    Загружает сохранённые file_id фотографий товаров одним запросом.
+    """
+    return {photo.product_id: photo for photo in TelegramPhoto.objects.filter(product_id__in=product_ids)}
 
-        # Обрабатываем товары один за другим
-        for product in products:
-            text = (
-                f"📦 *{product.name}*\n"
-                f"💰 Цена: *{product.price:.2f}* руб.\n"
-                f"ℹ️ {product.description}"
-            )
 
-            # Проверяем изображение
-            image_path = os.path.join("media", str(product.image))
+def save_cached_photo(product_id, image_key, file_id):
+    """
+    Запоминает file_id фотографии товара для повторных отправок.
+    """
+    TelegramPhoto.objects.update_or_create(product_id=product_id, defaults={"image_key": image_key, "file_id": file_id})
+
+
+async def send_catalog_page(context: ContextTypes.DEFAULT_TYPE, chat_id, after=None, before=None):
+    """
+    Отправляет одну страницу каталога и сообщение с кнопками «◀ / ▶».
+    Возвращает False, если товаров нет.
+    """
+    page = await sync_to_async(catalog_page)(CATALOG_PAGE_SIZE, after=after, before=before)
+
+    if not page.items:
+        return False
+
+    cached_photos = await sync_to_async(get_cached_photos)([product.id for product in page.items])
+
+    for product in page.items:
+        text = (
+            f"📦 *{product.name}*\n"
+            f"💰 Цена: *{product.price:.2f}* руб.\n"
+            f"ℹ️ {product.description}"
+        )
+
+        # Проверяем изображение
+        image_path = product.image.path if product.image else None
 
-            if os.path.exists(image_path):
-                resized_image_path = customer_resize_image(image_path)
+        if image_path and os.path.exists(image_path):
+            # Формируем инлайн-кнопку для добавления в корзину
+            keyboard = [[InlineKeyboardButton(
+                "➕ Добавить в корзину",
+                callback_data=encode_callback("add_to_cart", product.id)
+            )]]
+            reply_markup = InlineKeyboardMarkup(keyboard)
 
-                # Формируем инлайн-кнопку для добавления в корзину
-                keyboard = [[InlineKeyboardButton(
-                    "➕ Добавить в корзину",
-                    callback_data=f"add_to_cart_{product.id}"
-                )]]
-                reply_markup = InlineKeyboardMarkup(keyboard)
+            # Если фото уже загружалось в Telegram и не менялось — отправляем по file_id
+            image_key = thumbnail_key(image_path, THUMBNAIL_SIZES["bot"])
+            cached = cached_photos.get(product.id)
 
-                # Отправляем фото, текст и кнопку
+            if cached and cached.image_key == image_key:
                 await context.bot.send_photo(
-                    chat_id=update.message.chat_id,
-                    photo=open(resized_image_path, "rb"),
+                    chat_id=chat_id,
+                    photo=cached.file_id,
                     caption=text,
                     parse_mode=ParseMode.MARKDOWN,
                     reply_markup=reply_markup
                 )
+                continue
+
+            # Ресайз и чтение файла — в пуле, чтобы не блокировать обработку других пользователей
+            try:
+                photo = await get_image_pool().run(load_bot_photo, image_path)
+            except ImagePoolBusy:
+                await context.bot.send_message(
+                    chat_id=chat_id,
+                    text=f"{text}\n\n⏳ *Изображение загружается, попробуйте позже.*",
+                    parse_mode=ParseMode.MARKDOWN,
+                    reply_markup=reply_markup
+                )
+                continue
+
+            sent = await context.bot.send_photo(
+                chat_id=chat_id,
+                photo=photo,
+                caption=text,
+                parse_mode=ParseMode.MARKDOWN,
+                reply_markup=reply_markup
+            )
+            await sync_to_async(save_cached_photo)(product.id, image_key, sent.photo[-1].file_id)
+        else:
+            logger.warning(f"[CUSTOMER_CATALOG] Изображение {image_path} не найдено.")
+            await context.bot.send_message(
+                chat_id=chat_id,
+                text=f"{text}\n\n❌ *Изображение недоступно.*",
+                parse_mode=ParseMode.MARKDOWN
+            )
+
+    # Кнопки навигации по страницам каталога
+    navigation = []
+    if page.has_previous:
+        navigation.append(InlineKeyboardButton("◀", callback_data=encode_callback("catalog_page", "prev", page.prev_cursor)))
+    if page.has_next:
+        navigation.append(InlineKeyboardButton("▶", callback_data=encode_callback("catalog_page", "next", page.next_cursor)))
+    if navigation:
+        await context.bot.send_message(
+            chat_id=chat_id,
+            text="🛍️ Листайте каталог:",
+            reply_markup=InlineKeyboardMarkup([navigation])
+        )
+
+    return True
 
-                # Удаляем временный уменьшенный файл, если он создавался
-                if resized_image_path.startswith("/tmp/") and os.path.exists(resized_image_path):
-                    os.remove(resized_image_path)
-            else:
-                logger.warning(f"[CUSTOMER_CATALOG] Изображение {image_path} не найдено.")
-                await update.message.reply_text(f"{text}\n\n❌ *Изображение недоступно.*", parse_mode=ParseMode.MARKDOWN)
+
+async def handle_customer_catalog(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Отображение первой страницы каталога с инлайн-кнопками для добавления в корзину и листания.
+    """
+    telegram_id = update.effective_user.id
+    logger.info(f"[CUSTOMER_CATALOG] Пользователь {telegram_id} запросил каталог товаров.")
+
+    try:
+        if not await send_catalog_page(context, update.message.chat_id):
+            await update.message.reply_text("📭 Каталог пока пуст. Загляните позже!")
 
     except Exception as e:
         logger.exception(f"[CUSTOMER_CATALOG] Ошибка при загрузке каталога для пользователя {telegram_id}: {e}")
         await update.message.reply_text("⚠️ Произошла ошибка при загрузке каталога. Попробуйте позже.")
 
 
+# ======= Листание каталога =======
+async def customer_catalog_page(update: Update, context: ContextTypes.DEFAULT_TYPE, direction: str, cursor: str):
+    """
+    Показ следующей или предыдущей страницы каталога по кнопкам «◀ / ▶».
+    Формат callback_data: catalog_page:<next|prev>:<курсор>
+    """
+    query = update.callback_query
+    await query.answer()
+
+    if direction not in ("next", "prev"):
+        logger.warning(f"❌ Некорректный callback_data: {query.data}")
+        return
+
+    try:
+        # Убираем кнопки навигации со старого сообщения, чтобы не листать одну страницу дважды
+        await query.edit_message_reply_markup(reply_markup=None)
+
+        if direction == "next":
+            found = await send_catalog_page(context, query.message.chat_id, after=cursor)
+        else:
+            found = await send_catalog_page(context, query.message.chat_id, before=cursor)
+
+        if not found:
+            await query.message.reply_text("📭 Больше товаров нет.")
+
+    except ValueError:
+        await query.message.reply_text("⚠️ Страница каталога устарела. Откройте каталог заново.")
+    except Exception as e:
+        logger.exception(f"[CUSTOMER_CATALOG] Ошибка при листании каталога: {e}")
+        await query.message.reply_text("⚠️ Произошла ошибка при загрузке каталога. Попробуйте позже.")
+
+
 # ======= Обработка добавления товара в корзину =======
-async def customer_add_to_cart(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def customer_add_to_cart(update: Update, context: ContextTypes.DEFAULT_TYPE, product_id: int):
     """
     Добавление товара в корзину пользователя по callback-запросу.
     """
@@ -159,32 +267,19 @@ async def customer_add_to_cart(update: Update, context: ContextTypes.DEFAULT_TYP
 
     try:
         await query.answer()
-        product_id = int(query.data.split('_')[-1])
 
         # Получаем пользователя
-        db_user = await sync_to_async(CustomUser.objects.get)(telegram_id=user.id)
+        db_user = await get_current_user(update, context)
 
         # Получаем товар из базы данных
         product = await sync_to_async(Product.objects.get)(id=product_id)
 
-        # Получаем или создаем корзину пользователя
-        cart, _ = await sync_to_async(Cart.objects.get_or_create)(user=db_user)
-
-        # Проверяем, есть ли товар уже в корзине
-        cart_item, created = await sync_to_async(CartItem.objects.get_or_create)(
-            cart=cart, product=product,
-            defaults={"quantity": 1, "price": product.price}
-        )
-
-        if not created:
-            # Ограничиваем количество товара (например, максимум 10 шт.)
-            if cart_item.quantity >= 10:
-                await query.message.reply_text("⚠️ Максимальное количество этого товара уже в корзине!")
-                return
-
-            cart_item.quantity += 1
-            cart_item.price = cart_item.quantity * product.price
-            await sync_to_async(cart_item.save)()
+        # Атомарно увеличиваем количество (не больше MAX_CART_ITEM_QUANTITY) или добавляем строку
+        cart = await sync_to_async(get_cart)(db_user)
+        added = await sync_to_async(add_product_to_cart)(cart, product, 1, MAX_CART_ITEM_QUANTITY)
+        if not added:
+            await query.message.reply_text("⚠️ Максимальное количество этого товара уже в корзине!")
+            return
 
         logger.info(f"Товар {product.name} добавлен в корзину пользователя {user.username} ({user.id}).")
 
@@ -248,11 +343,11 @@ async def customer_view_cart(update: Update, context: ContextTypes.DEFAULT_TYPE)
             # Кнопки управления товаром
             keyboard = [
                 [
-                    InlineKeyboardButton("➖", callback_data=f"decrease_{product.id}"),
+                    InlineKeyboardButton("➖", callback_data=encode_callback("decrease", product.id)),
                     InlineKeyboardButton(f"{item.quantity} шт.", callback_data="ignore"),
-                    InlineKeyboardButton("➕", callback_data=f"increase_{product.id}")
+                    InlineKeyboardButton("➕", callback_data=encode_callback("increase", product.id))
                 ],
-                [InlineKeyboardButton("❌ Удалить", callback_data=f"remove_from_cart_{product.id}")]
+                [InlineKeyboardButton("❌ Удалить", callback_data=encode_callback("remove_from_cart", product.id))]
             ]
 
             reply_markup = InlineKeyboardMarkup(keyboard)
@@ -276,30 +371,24 @@ async def customer_view_cart(update: Update, context: ContextTypes.DEFAULT_TYPE)
         await message.reply_text("❌ Произошла ошибка при загрузке корзины.")
 
 # ======= Уменьшение количества товара в корзине =======
-async def customer_decrease_quantity(update: Update, context: CallbackContext):
+async def customer_decrease_quantity(update: Update, context: CallbackContext, product_id: int):
     """
     Уменьшение количества товара в корзине.
     """
     query = update.callback_query
-    user = update.effective_user
 
     try:
-        product_id = int(query.data.split("_")[1])
+        db_user = await get_current_user(update, context)
 
-        # Получаем запись товара в корзине
-        cart_item = await sync_to_async(
-            lambda: CartItem.objects.filter(cart__user__telegram_id=user.id, product_id=product_id).select_related('product').first()
-        )()
+        # Один UPDATE quantity = quantity - 1, если количество больше 1
+        decreased, quantity = await sync_to_async(change_cart_quantity)(db_user, product_id, -1)
 
-        if not cart_item:
+        if quantity is None:
             await query.answer("❌ Товар не найден в вашей корзине.")
             return
 
-        if cart_item.quantity > 1:
-            cart_item.quantity -= 1
-            cart_item.price = cart_item.quantity * cart_item.product.price  # Нет необходимости использовать sync_to_async
-            await sync_to_async(cart_item.save)()
-            await query.answer(f"✅ Количество товара уменьшено до {cart_item.quantity}.")
+        if decreased:
+            await query.answer(f"✅ Количество товара уменьшено до {quantity}.")
         else:
             await query.answer("❌ Невозможно уменьшить количество ниже 1.")
 
@@ -311,32 +400,23 @@ async def customer_decrease_quantity(update: Update, context: CallbackContext):
         await query.answer("❌ Произошла ошибка при изменении количества.")
 
 # ======= Увеличение количества товара в корзине =======
-async def customer_increase_quantity(update: Update, context: CallbackContext):
+async def customer_increase_quantity(update: Update, context: CallbackContext, product_id: int):
     """
     Увеличение количества товара в корзине.
     """
     query = update.callback_query
-    user = query.from_user
 
     try:
-        product_id = int(query.data.split("_")[-1])
+        db_user = await get_current_user(update, context)
 
-        # Получаем товар в корзине
-        cart_item = await sync_to_async(
-            lambda: CartItem.objects.filter(cart__user__telegram_id=user.id, product_id=product_id).select_related(
-                'product').first()
-        )()
+        # Один UPDATE quantity = quantity + 1 без чтения строки
+        _, quantity = await sync_to_async(change_cart_quantity)(db_user, product_id, 1)
 
-        if not cart_item:
+        if quantity is None:
             await query.answer("⚠️ Товар не найден в вашей корзине.")
             return
 
-        # Увеличиваем количество
-        cart_item.quantity += 1
-        cart_item.price = cart_item.quantity * cart_item.product.price  # Без использования sync_to_async
-        await sync_to_async(cart_item.save)()
-
-        await query.answer(f"✅ Количество товара '{cart_item.product.name}' увеличено до {cart_item.quantity}.")
+        await query.answer(f"✅ Количество товара увеличено до {quantity}.")
 
         # Обновляем корзину
         await customer_view_cart(update, context)
@@ -346,7 +426,7 @@ async def customer_increase_quantity(update: Update, context: CallbackContext):
         await query.answer("❌ Произошла ошибка при увеличении количества товара.")
 
 # ======= Удаление товара из корзины =======
-async def customer_remove_from_cart(update: Update, context: CallbackContext):
+async def customer_remove_from_cart(update: Update, context: CallbackContext, product_id: int):
     """
     Удаление товара из корзины пользователя по callback-запросу.
     """
@@ -354,8 +434,6 @@ async def customer_remove_from_cart(update: Update, context: CallbackContext):
     user = query.from_user
 
     try:
-        product_id = int(query.data.split("_")[-1])
-
         # Получаем товар в корзине
         cart_item = await sync_to_async(
             lambda: CartItem.objects.filter(cart__user__telegram_id=user.id, product_id=product_id).select_related('product').first()
@@ -398,7 +476,7 @@ async def customer_view_checkout(update: Update, context: CallbackContext):
             return
 
         # ✅ Получаем пользователя
-        db_user = await sync_to_async(lambda: CustomUser.objects.get(telegram_id=user.id))()
+        db_user = await get_current_user(update, context)
 
         # ✅ Получаем корзину (через `sync_to_async`)
         cart_items = await sync_to_async(lambda: list(
@@ -451,54 +529,21 @@ async def customer_confirm_checkout(update: Update, context: CallbackContext):
         await query.answer()
 
         # Получаем пользователя
-        db_user = await sync_to_async(CustomUser.objects.get)(telegram_id=user.id)
-
-        # Получаем корзину пользователя
-        cart = await sync_to_async(lambda: Cart.objects.get(user=db_user))()
-
-        # Проверяем, есть ли товары в корзине
-        cart_items = await sync_to_async(lambda: list(cart.items.all()))()
-
-        if not cart_items:
-            await query.message.reply_text("🛒 Ваша корзина пуста.")
-            return
-
-        # Создаём заказ
-        order = await sync_to_async(Order.objects.create)(
-            user=db_user,
-            total_price=sum(item.price for item in cart_items),
-            address=db_user.address  # Записываем адрес пользователя
-        )
-
-        # Переносим товары из корзины в заказ
-        for item in cart_items:
-            product = await sync_to_async(lambda: item.product)()  # Обернули product в sync_to_async
-            await sync_to_async(OrderItem.objects.create)(
-                order=order,
-                product=product,
-                quantity=item.quantity,
-                price=item.price
-            )
+        db_user = await get_current_user(update, context)
 
-        # Очищаем корзину пользователя
-        await sync_to_async(lambda: cart.items.all().delete())()
+        # Создаём заказ из корзины (позиции, очистка корзины и уведомление — внутри сервиса)
+        order = await sync_to_async(place_order)(db_user, address=db_user.address)
 
         # Убираем кнопки у сообщения
         await query.edit_message_reply_markup(reply_markup=None)
 
-
-        # Отправляем уведомления админам и сотрудникам
-        # await notify_admin(order)
-        # await notify_staff(order)
-
-
         # Сообщаем пользователю об успешном оформлении заказа
         logger.info(f"✅ Пользователь {user.username} ({user.id}) оформил заказ #{order.id}.")
         await query.message.reply_text(f"\U0001F4E6 Ваш заказ #{order.id} успешно оформлен!")
 
-    except Cart.DoesNotExist:
-        logger.error(f"❌ Корзина пользователя {user.username} ({user.id}) не найдена.")
-        await query.message.reply_text("⚠️ Ошибка: корзина не найдена.")
+    except EmptyCartError:
+        logger.warning(f"⚠️ Корзина пользователя {user.username} ({user.id}) пуста.")
+        await query.message.reply_text("🛒 Ваша корзина пуста.")
     except Exception as e:
         logger.exception(f"❌ Ошибка при подтверждении оформления заказа: {e}")
         await query.message.reply_text("⚠️ Произошла ошибка при оформлении заказа.")
@@ -516,7 +561,7 @@ async def customer_cancel_order(update: Update, context: CallbackContext):
         await query.answer()
 
         # Получаем пользователя
-        db_user = await sync_to_async(CustomUser.objects.get)(telegram_id=user.id)
+        db_user = await get_current_user(update, context)
 
         # Ищем последний заказ пользователя в статусе "created"
         order = await sync_to_async(lambda: Order.objects.filter(user=db_user, status="created").last())()
@@ -558,7 +603,10 @@ async def customer_view_orders(update: Update, context: CallbackContext):
         logger.info(f"Пользователь {user.username} ({user.id}) открыл список заказов.")
 
         # Получаем заказы пользователя
-        orders = await sync_to_async(lambda: list(Order.objects.filter(user__telegram_id=user.id)))()
+        # Заказы загружаются вместе с позициями и товарами за один переход в sync-код
+        orders = await sync_to_async(
+            lambda: list(order_summaries(Order.objects.filter(user__telegram_id=user.id)))
+        )()
         if not orders:
             await update.message.reply_text("У вас нет оформленных заказов.")
             return
@@ -571,14 +619,12 @@ async def customer_view_orders(update: Update, context: CallbackContext):
             order_text += f"📌 Статус: <b>{order.get_status_display()}</b>\n"
             order_text += f"📜 Товары:\n"
 
-            # Получаем товары в заказе
-            items = await sync_to_async(lambda: list(order.items.all()))()
-            for item in items:
-                product_name = await sync_to_async(lambda: item.product.name)()
-                order_text += f"  ➜ {shorten(product_name, width=30, placeholder='...')} — {item.quantity} шт. ({item.price:.2f} ₽)\n"
+            # Товары уже подгружены prefetch_related — без обращений к БД
+            for item in order.items.all():
+                order_text += f"  ➜ {shorten(item.product.name, width=30, placeholder='...')} — {item.quantity} шт. ({item.price:.2f} ₽)\n"
 
             # Добавляем кнопку "Повторить заказ"
-            keyboard = [[InlineKeyboardButton("🔄 Повторить заказ", callback_data=f"repeat_order_{order.id}")]]
+            keyboard = [[InlineKeyboardButton("🔄 Повторить заказ", callback_data=encode_callback("repeat_order", order.id))]]
             reply_markup = InlineKeyboardMarkup(keyboard)
 
             await update.message.reply_text(order_text, parse_mode="HTML", reply_markup=reply_markup)
@@ -588,7 +634,7 @@ async def customer_view_orders(update: Update, context: CallbackContext):
         await update.message.reply_text("⚠️ Произошла ошибка при загрузке истории заказов.")
 
 
-async def customer_repeat_order(update: Update, context: CallbackContext):
+async def customer_repeat_order(update: Update, context: CallbackContext, order_id: int):
     """
     Повторение заказа: копирование товаров из заказа в корзину пользователя.
     """
@@ -597,32 +643,15 @@ async def customer_repeat_order(update: Update, context: CallbackContext):
 
     try:
         await query.answer()
-        order_id = int(query.data.split('_')[-1])
 
         # Получаем пользователя
-        db_user = await sync_to_async(CustomUser.objects.get)(telegram_id=user.id)
+        db_user = await get_current_user(update, context)
 
         # Получаем заказ
         order = await sync_to_async(Order.objects.get)(id=order_id, user=db_user)
 
-        # Получаем или создаем корзину пользователя
-        cart, _ = await sync_to_async(Cart.objects.get_or_create)(user=db_user)
-
-        # Переносим товары из заказа в корзину
-        order_items = await sync_to_async(lambda: list(order.items.all()))()
-        for item in order_items:
-            product = await sync_to_async(lambda: item.product)()
-
-            # Проверяем, есть ли товар уже в корзине
-            cart_item, created = await sync_to_async(CartItem.objects.get_or_create)(
-                cart=cart, product=product,
-                defaults={"quantity": item.quantity, "price": item.price}
-            )
-
-            if not created:
-                cart_item.quantity += item.quantity
-                cart_item.price = cart_item.quantity * product.price
-                await sync_to_async(cart_item.save)()
+        # Переносим товары из заказа в корзину — постоянное число запросов при любом размере заказа
+        await sync_to_async(copy_order_to_cart)(order, db_user)
 
         await query.message.reply_text(f"✅ Все товары из заказа #{order_id} добавлены в корзину!")
 
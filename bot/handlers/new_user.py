@@ -9,6 +9,7 @@ from django.db.utils import IntegrityError
 import re
 from bot.keyboards.new_user_keyboards import new_user_keyboard
 from bot.handlers.customer import customer_start
+from bot.utils.user_cache import invalidate_user
 
 
 # Настройка логгера
@@ -103,6 +104,7 @@ async def handle_new_user_link_input(update: Update, context: ContextTypes.DEFAU
         # Привязываем
         user.telegram_id = telegram_id
         await sync_to_async(user.save)()
+        invalidate_user(telegram_id, context)
 
         await update.message.reply_text(f"✅ Telegram успешно привязан к логину {username}.")
 
@@ -238,6 +240,7 @@ async def handle_new_user_get_address(update: Update, context: ContextTypes.DEFA
             phone_number=user_data['phone'],
             address=address,
         )
+        invalidate_user(update.effective_user.id, context)
 
         await update.message.reply_text("✅ Регистрация успешно завершена! 🎉")
 
@@ -1,12 +1,16 @@
 # bot/handlers/registration.py
 
 import logging
-from telegram.ext import MessageHandler, CallbackQueryHandler, CommandHandler, filters
+from telegram import Update
+from telegram.ext import MessageHandler, CallbackQueryHandler, CommandHandler, TypeHandler, filters
 
 # Импорты универсальных обработчиков
 from bot.handlers.common import handle_user_input, handle_inline_buttons, start
 # Импорт специфичных обработчиков (например, для команды /start)
 from bot.handlers.admin import admin_start
+from bot.utils.user_cache import load_context_user
+from bot.utils.db_connections import RELEASE_CONNECTIONS_GROUP, release_db_connections
+from bot.persistence import PERSISTENCE_FLUSH_GROUP, persist_update_state
 
 # Настройка логгера
 logger = logging.getLogger(__name__)
@@ -18,6 +22,10 @@ def register_handlers(application):
 
     logger.info("Начинается регистрация обработчиков...")
 
+    # Пред-обработчик: пользователь из БД определяется один раз на обновление (группа -1 идёт первой)
+    application.add_handler(TypeHandler(Update, load_context_user), group=-1)
+    logger.info("Пред-обработчик пользователя зарегистрирован.")
+
     # Регистрация универсального обработчика текстовых сообщений
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_user_input))
     logger.info("Универсальный обработчик текстовых сообщений зарегистрирован.")
@@ -30,4 +38,10 @@ def register_handlers(application):
     application.add_handler(CommandHandler("start", start))
     logger.info("Обработчик команды /start зарегистрирован.")
 
+    # Несколько процессов бота (BOT_WORKERS > 1): состояние пользователя записывается сразу после обновления
+    application.add_handler(TypeHandler(Update, persist_update_state), group=PERSISTENCE_FLUSH_GROUP)
+
+    # После обработки обновления возвращаем соединение с БД в пул / закрываем устаревшее
+    application.add_handler(TypeHandler(Update, release_db_connections), group=RELEASE_CONNECTIONS_GROUP)
+
     logger.info("Регистрация обработчиков завершена успешно.")
@@ -1,6 +1,5 @@
 # bot/handlers/staff.py
 
-import os
 from PIL import Image
 from telegram.constants import ParseMode  # Для HTML-разметки сообщений
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup
@@ -9,10 +8,13 @@ from asgiref.sync import sync_to_async
 from prettytable import PrettyTable
 from users.models import CustomUser
 from catalog.models import Order, OrderItem
+from catalog.services import claim_order
+from bot.utils.callback_parser import encode_callback
+from bot.utils.user_cache import get_current_user
 from bot.keyboards.staff_keyboards import staff_keyboard
 import logging
-import asyncio
-from telegram.ext import Application
+from bot.notification.outbox import enqueue_order_event
+from bot.notification.staff_messages import close_staff_notifications, is_digest_message
 
 from pathlib import Path
 from django.conf import settings
@@ -47,7 +49,7 @@ async def staff_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     telegram_id = update.effective_user.id
     try:
-        user = await sync_to_async(CustomUser.objects.get)(telegram_id=telegram_id)
+        user = await get_current_user(update, context)
 
         logger.info(f"[STAFF] Пользователь {telegram_id} вошел в систему как сотрудник.")
 
@@ -76,7 +78,7 @@ async def handle_staff_new_orders(update: Update, context: ContextTypes.DEFAULT_
     telegram_id = update.effective_user.id
     try:
         # ✅ Получаем сотрудника
-        user = await sync_to_async(CustomUser.objects.get)(telegram_id=telegram_id, is_staff=True)
+        user = await get_current_user(update, context, staff=True)
         logger.info(f"[STAFF] Пользователь {telegram_id} запросил список новых заказов.")
 
         # ✅ Фильтруем только заказы без исполнителя
@@ -98,7 +100,7 @@ async def handle_staff_new_orders(update: Update, context: ContextTypes.DEFAULT_
             )
 
             # ✅ Кнопка "Взять в работу" (правильный callback_data)
-            keyboard = [[InlineKeyboardButton("🛠 Взять в работу", callback_data=f"staff_take_order:{order.id}")]]
+            keyboard = [[InlineKeyboardButton("🛠 Взять в работу", callback_data=encode_callback("staff_take_order", order.id))]]
             reply_markup = InlineKeyboardMarkup(keyboard)
 
             await update.message.reply_text(message, parse_mode="HTML", reply_markup=reply_markup)
@@ -117,7 +119,7 @@ async def handle_staff_new_orders(update: Update, context: ContextTypes.DEFAULT_
         return ConversationHandler.END
 
 # ======= Берем заказ в работу =======
-async def handle_staff_take_order(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def handle_staff_take_order(update: Update, context: ContextTypes.DEFAULT_TYPE, order_id: int):
     """
     Позволяет сотруднику взять заказ в работу (назначает исполнителем).
     """
@@ -125,35 +127,35 @@ async def handle_staff_take_order(update: Update, context: ContextTypes.DEFAULT_
     await query.answer()
 
     telegram_id = update.effective_user.id
-    callback_data = query.data  # Получаем callback_data
-
-    # ✅ Проверяем, что callback соответствует ожидаемому формату
-    parts = callback_data.split(":")
-    if len(parts) != 2 or parts[0] != "staff_take_order":
-        logger.warning(f"❌ Некорректный callback_data: {callback_data}")
-        return
-
-    order_id = int(parts[1])  # ✅ Извлекаем ID заказа
 
     try:
         # ✅ Получаем сотрудника
-        user = await sync_to_async(CustomUser.objects.get)(telegram_id=telegram_id, is_staff=True)
+        user = await get_current_user(update, context, staff=True)
 
-        # ✅ Проверяем, есть ли заказ и не занят ли он
-        order = await sync_to_async(Order.objects.get)(id=order_id)
+        # ✅ Сводку о нескольких заказах не заменяем ответом: остальные её заказы ещё ждут исполнителя
+        clicked = (query.message.chat_id, query.message.message_id)
+        digest = await sync_to_async(is_digest_message)(*clicked)
+        reply = query.message.reply_text if digest else query.edit_message_text
 
-        if order.executor_id is not None:
+        # ✅ Атомарно забираем заказ: из одновременных нажатий выигрывает ровно одно
+        claimed = await sync_to_async(claim_order)(order_id, user.id)
+
+        if not claimed:
+            if not await sync_to_async(Order.objects.filter(id=order_id).exists)():
+                raise Order.DoesNotExist()
             logger.warning(f"❌ Заказ #{order_id} уже взят в работу другим сотрудником.")
-            await query.edit_message_text(f"❌ Этот заказ уже взял в работу другой сотрудник.")
+            await reply(f"❌ Этот заказ уже взял в работу другой сотрудник.")
             return
 
-        # ✅ Назначаем сотрудника исполнителем и обновляем статус заказа
-        order.executor_id = user.id
-        order.status = "processing"
-        await sync_to_async(order.save)()
-
         logger.info(f"✅ Пользователь {telegram_id} взял заказ #{order_id} в работу.")
-        await query.edit_message_text(f"✅ Вы взяли заказ #{order_id} в работу.")
+        await reply(f"✅ Вы взяли заказ #{order_id} в работу.")
+
+        # ✅ Одной пачкой обновляем уведомления у остальных сотрудников (в сводке — и у нажавшего)
+        await close_staff_notifications(
+            order_id,
+            f"🔒 Заказ #{order_id} взял в работу {user.username}.",
+            exclude=None if digest else clicked,
+        )
 
     except Order.DoesNotExist:
         logger.error(f"❌ Ошибка: заказ #{order_id} не найден.")
@@ -175,7 +177,7 @@ async def handle_staff_my_orders(update: Update, context: ContextTypes.DEFAULT_T
     telegram_id = update.effective_user.id
     try:
         # ✅ Получаем сотрудника
-        user = await sync_to_async(CustomUser.objects.get)(telegram_id=telegram_id, is_staff=True)
+        user = await get_current_user(update, context, staff=True)
         logger.info(f"[STAFF] Пользователь {telegram_id} запросил список своих заказов в работе.")
 
         # ✅ Фильтруем заказы, где сотрудник - исполнитель
@@ -197,7 +199,7 @@ async def handle_staff_my_orders(update: Update, context: ContextTypes.DEFAULT_T
             )
 
             # ✅ Кнопка "ℹ️ Подробнее" (правильный callback_data)
-            keyboard = [[InlineKeyboardButton("ℹ️ Подробнее", callback_data=f"staff_order_details:{order.id}")]]
+            keyboard = [[InlineKeyboardButton("ℹ️ Подробнее", callback_data=encode_callback("staff_order_details", order.id))]]
             reply_markup = InlineKeyboardMarkup(keyboard)
 
             await update.message.reply_text(message, parse_mode="HTML", reply_markup=reply_markup)
@@ -216,22 +218,14 @@ async def handle_staff_my_orders(update: Update, context: ContextTypes.DEFAULT_T
         return ConversationHandler.END
 
 # ======= Просмотр деталей заказа =======
-async def handle_staff_order_details(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+async def handle_staff_order_details(update: Update, context: ContextTypes.DEFAULT_TYPE, order_id: int) -> int:
     query = update.callback_query
     await query.answer()
 
     telegram_id = update.effective_user.id
-    callback_data = query.data
-
-    parts = callback_data.split(":")
-    if len(parts) != 2 or parts[0] != "staff_order_details":
-        logger.warning(f"❌ Некорректный callback_data: {callback_data}")
-        return
-
-    order_id = int(parts[1])
 
     try:
-        user = await sync_to_async(CustomUser.objects.get)(telegram_id=telegram_id, is_staff=True)
+        user = await get_current_user(update, context, staff=True)
         order = await sync_to_async(Order.objects.select_related("user").get)(
             id=order_id, executor_id=user.id, status="processing"
         )
@@ -252,8 +246,8 @@ async def handle_staff_order_details(update: Update, context: ContextTypes.DEFAU
 
         # Создаем кнопки "Завершить" и "Отменить"
         keyboard = [
-            [InlineKeyboardButton("✔️ Завершить Заказ", callback_data=f"staff_complete_order:{order.id}")],
-            [InlineKeyboardButton("❌ Отменить Заказ", callback_data=f"staff_cancel_order:{order.id}")]
+            [InlineKeyboardButton("✔️ Завершить Заказ", callback_data=encode_callback("staff_complete_order", order.id))],
+            [InlineKeyboardButton("❌ Отменить Заказ", callback_data=encode_callback("staff_cancel_order", order.id))]
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
 
@@ -268,25 +262,17 @@ async def handle_staff_order_details(update: Update, context: ContextTypes.DEFAU
 
 
 # ======= Завершение заказа =======
-async def complete_order_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def complete_order_callback(update: Update, context: ContextTypes.DEFAULT_TYPE, order_id: int):
     """
     Завершение заказа по inline-кнопке "Завершить".
     """
     query = update.callback_query
     await query.answer()
-    callback_data = query.data
-
-    parts = callback_data.split(":")
-    if len(parts) != 2 or parts[0] != "staff_complete_order":
-        logger.warning(f"❌ Некорректный callback_data: {callback_data}")
-        return
-
-    order_id = int(parts[1])
     telegram_id = update.effective_user.id
 
     try:
         # Проверяем, является ли пользователь исполнителем заказа
-        user = await sync_to_async(CustomUser.objects.get)(telegram_id=telegram_id, is_staff=True)
+        user = await get_current_user(update, context, staff=True)
         order = await sync_to_async(Order.objects.get)(id=order_id, executor_id=user.id, status="processing")
 
         # Обновляем статус заказа
@@ -311,20 +297,12 @@ async def complete_order_callback(update: Update, context: ContextTypes.DEFAULT_
 
 
 # ======= Отмена заказа =======
-async def cancel_order_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def cancel_order_callback(update: Update, context: ContextTypes.DEFAULT_TYPE, order_id: int):
     """
     Отмена заказа по inline-кнопке.
     """
     query = update.callback_query
     await query.answer()
-    callback_data = query.data
-
-    parts = callback_data.split(":")
-    if len(parts) != 2 or parts[0] != "staff_cancel_order":
-        logger.warning(f"❌ Некорректный callback_data: {callback_data}")
-        return
-
-    order_id = int(parts[1])
 
     try:
         order = await sync_to_async(Order.objects.get)(id=order_id, status="processing")
@@ -341,64 +319,12 @@ async def cancel_order_callback(update: Update, context: ContextTypes.DEFAULT_TY
 
 
 # ======= Уведомления =======
-async def async_send_new_order_notification(order):
-    """
-    Отправка уведомлений о новом заказе сотрудникам.
-    """
-    try:
-        staff_users = await sync_to_async(
-            lambda: list(CustomUser.objects.filter(is_staff=True, telegram_id__isnull=False))
-        )()
-
-        order_items = await sync_to_async(lambda: list(order.items.prefetch_related("product").all()))()
-        phone_number = order.user.phone_number if order.user.phone_number else "Не указан"
-
-        order_message = (
-            f"📦 **Новый заказ #{order.id}**\n"
-            f"🌸 Состав заказа:\n"
-            + "\n".join(
-                [f"- {item.product.name}: {item.quantity} шт. по {item.price:.2f} руб." for item in order_items]
-            )
-            + f"\n💰 Общая сумма: {order.total_price:.2f} руб.\n"
-            f"📍 Адрес доставки: {order.address or 'Не указан'}\n"
-            f"📞 Телефон клиента: {phone_number}"
-        )
-
-        keyboard = [[InlineKeyboardButton("Взять в работу", callback_data=f"take_order_{order.id}")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-
-        token = os.getenv('TELEGRAM_BOT_TOKEN')
-        if not token:
-            raise ValueError("Токен Telegram бота отсутствует. Проверьте файл .env.")
-
-        app = Application.builder().token(token).build()
-        await app.initialize()
-
-        for staff in staff_users:
-            await app.bot.send_message(
-                chat_id=staff.telegram_id,
-                text=order_message,
-                parse_mode="Markdown",
-                reply_markup=reply_markup
-            )
-
-        await app.shutdown()
-    except Exception as e:
-        logger.error(f"Ошибка при отправке уведомлений: {e}", exc_info=True)
-
-
 def send_new_order_notification(order):
     """
-    Синхронная обертка для отправки уведомлений о заказах.
+    Синхронная точка входа для веб-приложения: ставит уведомление в очередь
+    и сразу возвращается, рассылку выполняет notification_worker.
     """
-    asyncio.run(async_send_new_order_notification(order))
-
-
-
-
-
-
-
+    enqueue_order_event(order.id)
 
 
 # ======= Взятие заказа в работу =======
@@ -413,22 +339,24 @@ async def take_order(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if callback_data.startswith("take_order_"):
         order_id = int(callback_data.split("_")[2])
         try:
-            order = await sync_to_async(Order.objects.get)(id=order_id, status="created")
-            order.status = "processing"
-            await sync_to_async(order.save)()
-            await query.edit_message_text(f"✅ Заказ #{order.id} взят в работу.")
-        except Order.DoesNotExist:
-            await query.edit_message_text("❌ Этот заказ больше не существует.")
+            user = await get_current_user(update, context, staff=True)
+        except CustomUser.DoesNotExist:
+            await query.edit_message_text("❌ У вас нет прав для выполнения этой команды.")
+            return
+
+        if await sync_to_async(claim_order)(order_id, user.id):
+            await query.edit_message_text(f"✅ Заказ #{order_id} взят в работу.")
+        else:
+            await query.edit_message_text("❌ Этот заказ уже взят в работу или больше не существует.")
 
 # ======= Обновление статуса заказа =======
-async def update_order_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def update_order_status(update: Update, context: ContextTypes.DEFAULT_TYPE, order_id: int, new_status: str):
     """
-    Обновление статуса заказа по inline-кнопке.
+    Обновление статуса заказа по inline-кнопке (order_status_update:<id>:<статус>).
     """
     query = update.callback_query
     await query.answer()
     try:
-        _, order_id, new_status = query.data.split("_")
         if new_status not in ["processing", "delivered", "canceled"]:
             raise ValueError("Недопустимый статус заказа.")
         order = await sync_to_async(Order.objects.get)(id=order_id)
@@ -0,0 +1,35 @@
+# bot/management/commands/notification_queue.py
+"""
+notification_queue.py
+
+Описание:
+Состояние очереди уведомлений и повтор «мёртвых» сообщений — тех, что не удалось доставить
+за NOTIFY_QUEUE_MAX_ATTEMPTS попыток (например, Telegram был недоступен дольше обычного).
+
+    python manage.py notification_queue            # сколько сообщений в «мёртвых»
+    python manage.py notification_queue --requeue  # вернуть их в очередь
+"""
+
+from django.core.management.base import BaseCommand
+
+from bot.notification.outbox import wake_worker
+from bot.notification.task_queue import QUEUE_BACKEND, get_queue
+
+
+class Command(BaseCommand):
+    help = "Показывает и повторяет недоставленные сообщения очереди уведомлений"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requeue", action="store_true", help="Вернуть «мёртвые» сообщения в очередь")
+
+    def handle(self, *args, **options):
+        queue = get_queue()
+
+        if options["requeue"]:
+            requeued = queue.requeue_dead()
+            if requeued:
+                wake_worker()
+            self.stdout.write(self.style.SUCCESS(f"Возвращено в очередь ({QUEUE_BACKEND}): {requeued}."))
+            return
+
+        self.stdout.write(f"Недоставленных сообщений ({QUEUE_BACKEND}): {queue.dead_count()}.")
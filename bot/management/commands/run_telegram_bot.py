@@ -17,6 +17,8 @@ from django.core.management.base import BaseCommand
 from dotenv import load_dotenv
 from telegram.ext import ApplicationBuilder
 from bot.handlers.registration import register_handlers  # Используем централизованную регистрацию
+from bot.webhook import is_webhook_mode
+from bot.persistence import DjangoPersistence
 
 import django
 load_dotenv()
@@ -35,12 +37,16 @@ class Command(BaseCommand):
         """Метод для запуска бота."""
         token = os.getenv("TELEGRAM_BOT_TOKEN")
 
+        if is_webhook_mode():
+            logger.info("Режим webhook: обновления принимает ASGI-приложение (flowerdelivery.asgi), polling не запускается.")
+            return
+
         if not token:
             logger.error("Ошибка: токен Telegram бота не найден.")
             return
 
         # Инициализация приложения
-        application = ApplicationBuilder().token(token).build()
+        application = ApplicationBuilder().token(token).persistence(DjangoPersistence()).build()
 
         # Регистрация хэндлеров
         logger.info("Регистрация хэндлеров...")
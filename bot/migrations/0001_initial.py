@@ -0,0 +1,37 @@
+# Generated by Django 5.1.3 on 2026-10-18 13:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('catalog', '0003_alter_order_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderNotification',
+            fields=[
+                ('order', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification', serialize=False, to='catalog.order', verbose_name='Order')),
+                ('notified_at', models.DateTimeField(verbose_name='Notified At')),
+                ('notify_count', models.PositiveIntegerField(default=1, verbose_name='Notify Count')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='NotificationEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('order_created', 'Новый заказ')], max_length=50, verbose_name='Event Type')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='Processed At')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_events', to='catalog.order', verbose_name='Order')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('processed_at__isnull', True)), fields=['id'], name='notif_event_pending_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.3 on 2026-10-18 13:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0001_initial'),
+        ('catalog', '0004_product_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TelegramPhoto',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='telegram_photo', serialize=False, to='catalog.product', verbose_name='Product')),
+                ('image_key', models.CharField(max_length=64, verbose_name='Image Key')),
+                ('file_id', models.CharField(max_length=255, verbose_name='Telegram File ID')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated At')),
+            ],
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.3 on 2026-10-18 13:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0002_telegram_photo'),
+        ('catalog', '0005_order_cartitem_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StaffNotificationMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chat_id', models.BigIntegerField(verbose_name='Chat ID')),
+                ('message_id', models.BigIntegerField(verbose_name='Message ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='staff_messages', to='catalog.order', verbose_name='Order')),
+            ],
+        ),
+    ]
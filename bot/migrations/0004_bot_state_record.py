@@ -0,0 +1,27 @@
+# Generated by Django 5.1.3 on 2026-10-18 13:27
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0003_staff_notification_message'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BotStateRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=100, verbose_name='Kind')),
+                ('key', models.CharField(max_length=100, verbose_name='Key')),
+                ('data', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Data')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated At')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'key'), name='unique_bot_state_record')],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.3 on 2026-10-18 13:40
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def schedule_existing_notifications(apps, schema_editor):
+    """
+    Уже уведомлённые заказы становятся в очередь напоминаний сразу.
+    """
+    OrderNotification = apps.get_model('bot', 'OrderNotification')
+    OrderNotification.objects.filter(next_notify_at__isnull=True).update(next_notify_at=F('notified_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0004_bot_state_record'),
+        ('catalog', '0005_order_cartitem_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationThrottle',
+            fields=[
+                ('chat_id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='Chat ID')),
+                ('last_sent_at', models.DateTimeField(verbose_name='Last Sent At')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='ordernotification',
+            name='next_notify_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Next Notify At'),
+        ),
+        migrations.AddIndex(
+            model_name='ordernotification',
+            index=models.Index(fields=['next_notify_at'], name='order_notif_next_idx'),
+        ),
+        migrations.RunPython(schedule_existing_notifications, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.1.3 on 2026-10-18 13:50
+
+import django.core.serializers.json
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0005_repeat_notification_schedule'),
+        ('catalog', '0005_order_cartitem_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='notificationevent',
+            name='notif_event_pending_idx',
+        ),
+        migrations.AddField(
+            model_name='notificationevent',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Attempts'),
+        ),
+        migrations.AddField(
+            model_name='notificationevent',
+            name='available_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Available At'),
+        ),
+        migrations.AddField(
+            model_name='notificationevent',
+            name='dead_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Dead Lettered At'),
+        ),
+        migrations.AddField(
+            model_name='notificationevent',
+            name='last_error',
+            field=models.TextField(blank=True, verbose_name='Last Error'),
+        ),
+        migrations.AddField(
+            model_name='notificationevent',
+            name='payload',
+            field=models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Payload'),
+        ),
+        migrations.AlterField(
+            model_name='notificationevent',
+            name='event_type',
+            field=models.CharField(choices=[('order_created', 'Новый заказ'), ('order_status_changed', 'Изменение статуса заказа')], max_length=50, verbose_name='Event Type'),
+        ),
+        migrations.AddIndex(
+            model_name='notificationevent',
+            index=models.Index(condition=models.Q(('dead_at__isnull', True), ('processed_at__isnull', True)), fields=['id'], name='notif_event_ready_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='notificationevent',
+            constraint=models.UniqueConstraint(condition=models.Q(('dead_at__isnull', True), ('event_type', 'order_created'), ('processed_at__isnull', True)), fields=('order', 'event_type'), name='notif_event_pending_order_uniq'),
+        ),
+    ]
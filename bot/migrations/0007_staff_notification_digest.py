@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-18 14:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0006_notification_queue_retries'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='staffnotificationmessage',
+            name='is_digest',
+            field=models.BooleanField(default=False, verbose_name='Digest'),
+        ),
+    ]
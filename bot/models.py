@@ -0,0 +1,163 @@
+# bot/models.py
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.db.models import Q
+from django.utils.timezone import now
+
+from catalog.models import Order, Product
+
+
+# Событие в очереди уведомлений (outbox)
+class NotificationEvent(models.Model):
+    """
+    Сообщение очереди уведомлений (бэкенд по умолчанию, см. bot/notification/task_queue.py).
+    Создаётся сигналами заказа в веб-приложении или боте и доставляется notification_worker.
+    Неудачная доставка повторяется позже (available_at); после исчерпания попыток
+    сообщение попадает в «мёртвые» (dead_at) и ждёт ручного повтора.
+    """
+    ORDER_CREATED = "order_created"
+    ORDER_STATUS_CHANGED = "order_status_changed"
+
+    EVENT_CHOICES = [
+        (ORDER_CREATED, "Новый заказ"),
+        (ORDER_STATUS_CHANGED, "Изменение статуса заказа"),
+    ]
+
+    event_type = models.CharField(max_length=50, choices=EVENT_CHOICES, verbose_name="Event Type")
+    order = models.ForeignKey(
+        Order,
+        related_name="notification_events",
+        on_delete=models.CASCADE,
+        verbose_name="Order"
+    )
+    payload = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder, verbose_name="Payload")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
+    available_at = models.DateTimeField(default=now, verbose_name="Available At")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Attempts")
+    last_error = models.TextField(blank=True, verbose_name="Last Error")
+    processed_at = models.DateTimeField(null=True, blank=True, verbose_name="Processed At")
+    dead_at = models.DateTimeField(null=True, blank=True, verbose_name="Dead Lettered At")
+
+    class Meta:
+        indexes = [
+            # Воркер читает только ожидающие сообщения — частичный индекс держит выборку O(ожидающих)
+            models.Index(
+                fields=["id"],
+                condition=Q(processed_at__isnull=True, dead_at__isnull=True),
+                name="notif_event_ready_idx",
+            ),
+        ]
+        constraints = [
+            # Не больше одного ожидающего сообщения о новом заказе
+            models.UniqueConstraint(
+                fields=["order", "event_type"],
+                condition=Q(event_type="order_created", processed_at__isnull=True, dead_at__isnull=True),
+                name="notif_event_pending_order_uniq",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} for Order {self.order_id}"
+
+
+# Курсор уведомлений по заказу
+class OrderNotification(models.Model):
+    """
+    Отметка о том, что сотрудники уже уведомлены о заказе.
+    """
+    order = models.OneToOneField(
+        Order,
+        related_name="notification",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        verbose_name="Order"
+    )
+    notified_at = models.DateTimeField(verbose_name="Notified At")
+    notify_count = models.PositiveIntegerField(default=1, verbose_name="Notify Count")
+    # Когда напомнить о заказе снова, если его не возьмут; интервал растёт с каждым напоминанием
+    next_notify_at = models.DateTimeField(null=True, blank=True, verbose_name="Next Notify At")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["next_notify_at"], name="order_notif_next_idx"),
+        ]
+
+    def __str__(self):
+        return f"Order {self.order_id} notified at {self.notified_at}"
+
+
+# Последняя сводка напоминаний, отправленная получателю
+class NotificationThrottle(models.Model):
+    """
+    Время последней сводки повторных уведомлений в чате сотрудника или администратора.
+    Не даёт присылать сводки одному получателю чаще MIN_NOTIFICATION_INTERVAL.
+    """
+    chat_id = models.BigIntegerField(primary_key=True, verbose_name="Chat ID")
+    last_sent_at = models.DateTimeField(verbose_name="Last Sent At")
+
+    def __str__(self):
+        return f"Chat {self.chat_id} notified at {self.last_sent_at}"
+
+
+# Кэш file_id фотографий товаров в Telegram
+class TelegramPhoto(models.Model):
+    """
+    file_id, полученный от Telegram после первой отправки фото товара.
+    image_key совпадает с ключом миниатюры: при замене изображения file_id перестаёт подходить.
+    """
+    product = models.OneToOneField(
+        Product,
+        related_name="telegram_photo",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        verbose_name="Product"
+    )
+    image_key = models.CharField(max_length=64, verbose_name="Image Key")
+    file_id = models.CharField(max_length=255, verbose_name="Telegram File ID")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Updated At")
+
+    def __str__(self):
+        return f"Telegram photo for Product {self.product_id}"
+
+
+# Разосланные сотрудникам уведомления о заказе
+class StaffNotificationMessage(models.Model):
+    """
+    Сообщение с уведомлением о заказе в чате сотрудника.
+    Хранится, чтобы после взятия заказа разом обновить уведомления у всех остальных.
+    """
+    order = models.ForeignKey(
+        Order,
+        related_name="staff_messages",
+        on_delete=models.CASCADE,
+        verbose_name="Order"
+    )
+    chat_id = models.BigIntegerField(verbose_name="Chat ID")
+    message_id = models.BigIntegerField(verbose_name="Message ID")
+    # Сводка о нескольких заказах: при взятии заказа из неё убирается только его кнопка
+    is_digest = models.BooleanField(default=False, verbose_name="Digest")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
+
+    def __str__(self):
+        return f"Notification for Order {self.order_id} in chat {self.chat_id}"
+
+
+# Состояние бота (user_data, chat_data, bot_data, разговоры), общее для всех процессов бота
+class BotStateRecord(models.Model):
+    """
+    Запись хранилища DjangoPersistence: kind — вид данных ("user", "chat", "bot",
+    "conversation:<имя>"), key — Telegram ID пользователя/чата или ключ разговора.
+    """
+    kind = models.CharField(max_length=100, verbose_name="Kind")
+    key = models.CharField(max_length=100, verbose_name="Key")
+    data = models.JSONField(encoder=DjangoJSONEncoder, verbose_name="Data")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Updated At")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "key"], name="unique_bot_state_record"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.key}"
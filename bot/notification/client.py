@@ -0,0 +1,62 @@
+# bot/notification/client.py
+
+import logging
+import os
+
+from dotenv import load_dotenv
+from telegram import Bot
+from telegram.request import HTTPXRequest
+
+from bot.utils.fanout import FanoutDispatcher, MAX_CONCURRENT_SENDS
+
+# Загружаем переменные окружения
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Размер пула HTTP-соединений совпадает с числом параллельных отправок
+CONNECTION_POOL_SIZE = MAX_CONCURRENT_SENDS
+
+# Единственные на процесс экземпляры бота и диспетчера рассылки
+_bot = None
+_dispatcher = None
+
+
+def get_bot():
+    """
+    Возвращает общий для процесса Bot с пулом HTTP-соединений.
+    Создаётся при первом обращении, а не при импорте модуля.
+    """
+    global _bot
+
+    if _bot is None:
+        token = os.getenv("TELEGRAM_BOT_TOKEN")
+        if not token:
+            raise ValueError("Токен Telegram бота отсутствует. Проверьте файл .env.")
+
+        _bot = Bot(token=token, request=HTTPXRequest(connection_pool_size=CONNECTION_POOL_SIZE))
+        logger.info(f"🤖 Создан клиент Telegram (пул соединений: {CONNECTION_POOL_SIZE}).")
+    return _bot
+
+
+def get_dispatcher():
+    """
+    Возвращает общий для процесса диспетчер рассылки поверх get_bot().
+    """
+    global _dispatcher
+
+    if _dispatcher is None:
+        _dispatcher = FanoutDispatcher(get_bot(), max_concurrency=CONNECTION_POOL_SIZE)
+    return _dispatcher
+
+
+async def shutdown_client():
+    """
+    Закрывает HTTP-соединения общего клиента.
+    """
+    global _bot, _dispatcher
+
+    if _bot is not None:
+        await _bot.shutdown()
+    _bot = None
+    _dispatcher = None
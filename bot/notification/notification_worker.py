@@ -2,147 +2,309 @@
 
 import asyncio
 import logging
-from telegram import Bot
-from django.utils.timezone import now
 from asgiref.sync import sync_to_async
+from django.db.models import Q
+from telegram import InlineKeyboardMarkup, InlineKeyboardButton
 
 from bot.utils.time_config import load_settings  # Добавляем импорт функции load_settings
-from bot.utils.time_config import NEW_ORDER_NOTIFY_INTERVAL, REPEAT_ORDER_NOTIFY_INTERVAL
-from bot.utils.time_utils import is_working_hours
+from bot.utils.time_config import (
+    MIN_NOTIFICATION_INTERVAL,
+    NEW_ORDER_NOTIFY_INTERVAL,
+    REPEAT_ORDER_NOTIFY_INTERVAL,
+)
+from bot.utils.callback_parser import encode_callback
+from bot.utils.time_utils import is_working_hours, moscow_now, seconds_until_working_hours
+from bot.utils.db_connections import release_db_connections
+from bot.utils.fanout import is_permanent_error
+from bot.notification.client import get_bot, get_dispatcher, shutdown_client
+from bot.notification.staff_messages import digest_keyboard, remember_digest_messages, remember_staff_messages
+from bot.notification.repeat_scheduler import (
+    count_due_notifications,
+    fetch_due_notifications,
+    filter_ready_recipients,
+    format_repeat_digest,
+    mark_recipients_notified,
+    reschedule_notifications,
+)
+from bot.notification.outbox import (
+    filter_unnotified_orders,
+    mark_order_notified,
+    start_wakeup_listener,
+)
+from bot.notification.task_queue import ORDER_PLACED, ORDER_STATUS_CHANGED, get_queue
 from catalog.models import Order
 from users.models import CustomUser
 
-import os
-from dotenv import load_dotenv  # Добавляем загрузку .env
-
-# Загружаем переменные окружения
-load_dotenv()
-
-# Получаем токен из окружения
-TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
-
 # Настраиваем логирование
 logger = logging.getLogger(__name__)
 
-bot = Bot(token=TELEGRAM_BOT_TOKEN)
-
-# Глобальная переменная для последнего уведомления
-LAST_NOTIFIED_AT = None
-
-
 async def notification_worker():
     """
     Основной цикл обработки уведомлений о заказах.
+    Просыпается сразу при появлении события в очереди, иначе — раз в интервал,
+    а вне рабочего времени — в начале рабочего дня.
     """
-    global LAST_NOTIFIED_AT  # используем глобальную переменную
+    wakeup = asyncio.Event()
+    await start_wakeup_listener(wakeup)
+    await sync_to_async(get_queue().recover)()
+    await get_bot().initialize()
 
-    if LAST_NOTIFIED_AT is None:
-        LAST_NOTIFIED_AT = now()  # Инициализируем переменную при первом запуске
+    try:
+        await _notification_loop(wakeup)
+    finally:
+        await shutdown_client()
 
+
+async def _notification_loop(wakeup, clock=moscow_now):
+    """
+    Бесконечный цикл воркера: обработка очереди и ожидание следующего события.
+    """
     while True:
+        wakeup.clear()  # События, пришедшие во время обработки, разбудят следующий цикл
+
+        try:
+            timeout = await run_notification_cycle(clock())
+        except Exception as e:
+            logger.error(f"❌ Ошибка в цикле уведомлений: {e}", exc_info=True)
+            timeout = NEW_ORDER_NOTIFY_INTERVAL * 60
+
+        # Не держим соединение с БД, пока ждём следующего события
+        await release_db_connections()
+
         try:
-            # Загрузим настройки перед каждой проверкой
-            settings = load_settings()  # Получаем актуальные настройки
+            await asyncio.wait_for(wakeup.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
 
-            # Теперь используем переменные из настроек
-            NEW_ORDER_NOTIFY_INTERVAL = settings['new_order_notify_interval']
-            REPEAT_ORDER_NOTIFY_INTERVAL = settings['repeat_order_notify_interval']
 
-            if not is_working_hours():
-                logger.info("⏳ Вне рабочего времени, уведомления не отправляются.")
-            else:
-                await process_new_orders()
-                await process_repeat_notifications()
+async def run_notification_cycle(now):
+    """
+    Один проход воркера. Возвращает, сколько секунд спать до следующего прохода.
+    Вне рабочего времени — до его начала: ночью воркер просыпается только по новому заказу
+    или изменению настроек (оба будят его сигналом).
+    """
+    # Настройки из кэша: файл перечитывается, только если его изменили
+    settings = load_settings()
+    notify_interval = settings['new_order_notify_interval']
 
-            logger.info(f"⏳ Следующая проверка через {NEW_ORDER_NOTIFY_INTERVAL} минут")
-            await asyncio.sleep(NEW_ORDER_NOTIFY_INTERVAL * 60)
+    if not is_working_hours(settings, now) and not settings.get('allow_non_working_hours_notifications'):
+        sleep_for = seconds_until_working_hours(settings, now)
+        logger.info(
+            f"🌙 Вне рабочего времени, уведомления возобновятся в {settings['work_hours_start'].strftime('%H:%M')} "
+            f"(через {sleep_for / 60:.0f} мин.)"
+        )
+        return sleep_for
 
-        except Exception as e:
-            logger.error(f"❌ Ошибка в цикле уведомлений: {e}", exc_info=True)
+    repeat_interval = settings.get('repeat_order_notify_interval', REPEAT_ORDER_NOTIFY_INTERVAL)
+    await process_order_events(repeat_interval)
+    await process_repeat_notifications(
+        repeat_interval, settings.get('min_notification_interval', MIN_NOTIFICATION_INTERVAL)
+    )
 
+    logger.info(f"⏳ Следующая проверка через {notify_interval} минут или по новому заказу")
+    return notify_interval * 60
 
 
-async def process_new_orders():
+class DeliveryError(Exception):
     """
-    Отправляет уведомления о новых заказах.
+    Уведомление не доставлено ни одному получателю — сообщение очереди нужно повторить.
     """
-    orders = await sync_to_async(lambda: list(Order.objects.filter(status="created")))()
-    if not orders:
-        logger.info("✅ Нет новых заказов для уведомлений.")
-        return
 
-    admins_and_staff = await get_admins_and_staff()
 
-    for order in orders:
-        if should_notify_order(order):
-            message = await format_order_message(order)
-            await send_notifications(admins_and_staff, message, order.id)
+async def process_order_events(repeat_interval=REPEAT_ORDER_NOTIFY_INTERVAL):
+    """
+    Доставляет сообщения из очереди уведомлений: о новых заказах — сотрудникам,
+    о смене статуса — покупателю. Ошибка доставки одного сообщения не мешает остальным:
+    временная (сеть, таймаут) повторяется позже, а после исчерпания попыток сообщение
+    переносится в «мёртвые»; постоянная (бот заблокирован, чат не найден) — сообщение снимается сразу.
+    """
+    queue = get_queue()
+    messages = await sync_to_async(queue.reserve)()
+    if not messages:
+        logger.info("✅ Нет новых событий для уведомлений.")
+        return
 
-            logger.info(f"📨 Уведомление отправлено для заказа #{order.id}")
+    # Заказы и курсор уведомлений — двумя запросами на всю пачку
+    orders = await sync_to_async(
+        lambda: Order.objects.select_related("user").in_bulk({message.order_id for message in messages})
+    )()
+    pending_ids = await sync_to_async(filter_unnotified_orders)(
+        [message.order_id for message in messages if message.topic == ORDER_PLACED]
+    )
 
+    delivered = []
+    for message in messages:
+        order = orders.get(message.order_id)
+        try:
+            if order is None:
+                logger.warning(f"⚠️ Заказ #{message.order_id} удалён, событие {message.topic} пропущено.")
+            elif message.topic == ORDER_PLACED:
+                if order.id in pending_ids and should_notify_order(order):
+                    await notify_new_order(order, repeat_interval)
+                    pending_ids.discard(order.id)
+            elif message.topic == ORDER_STATUS_CHANGED:
+                await notify_order_status(order, message.payload["status"])
+        except Exception as e:
+            if is_permanent_error(e) or is_permanent_error(e.__cause__):
+                # Повтор не поможет: подтверждаем сообщение, чтобы оно не занимало попытки и «мёртвые»
+                logger.warning(f"🚫 Событие {message.topic} заказа #{message.order_id} снято без повтора: {e}")
+                delivered.append(message)
+                continue
+            dead = await sync_to_async(queue.fail)(message, e)
+            if dead:
+                logger.error(f"💀 Событие {message.topic} заказа #{message.order_id} не доставлено, попытки исчерпаны: {e}")
+            else:
+                logger.warning(f"🔁 Событие {message.topic} заказа #{message.order_id} будет повторено: {e}")
+        else:
+            delivered.append(message)
 
+    await sync_to_async(queue.ack)(delivered)
 
 
-async def process_repeat_notifications():
+async def notify_new_order(order, repeat_interval):
     """
-    Повторно отправляет уведомления, если заказ долго не берут.
+    Рассылает уведомление о новом заказе администраторам и сотрудникам.
     """
-    global LAST_NOTIFIED_AT  # Используем глобальную переменную
+    admins_and_staff = await get_admins_and_staff()
+    if not admins_and_staff:
+        logger.warning(f"⚠️ Нет сотрудников с Telegram ID для уведомления о заказе #{order.id}.")
+        # Напоминание назначаем сразу: заказ попадёт в сводку, как только сотрудники подключат Telegram
+        await sync_to_async(mark_order_notified)(order.id, 0)
+        return
+
+    message = await format_order_message(order)
+    if not await send_notifications(admins_and_staff, message, order.id):
+        raise DeliveryError(f"уведомление о заказе #{order.id} не доставлено ни одному получателю")
+    await sync_to_async(mark_order_notified)(order.id, repeat_interval)
 
-    # Проверка интервала с последним уведомлением
-    if LAST_NOTIFIED_AT is None or (now() - LAST_NOTIFIED_AT).total_seconds() > REPEAT_ORDER_NOTIFY_INTERVAL * 60:
-        orders = await sync_to_async(lambda: list(Order.objects.filter(status="created")))()
+    logger.info(f"📨 Уведомление отправлено для заказа #{order.id}")
 
-        if not orders:
-            logger.info("✅ Нет заказов для повторных уведомлений.")
+
+async def notify_order_status(order, status):
+    """
+    Сообщает покупателю о новом статусе его заказа (если он связан с Telegram).
+    Если покупатель заблокировал бота или чат не найден, уведомление пропускается без повтора.
+    """
+    if not order.user.telegram_id:
+        return
+
+    status_label = dict(Order.STATUS_CHOICES).get(status, status)
+    text = f"📦 Статус вашего заказа #{order.id}: *{status_label}*"
+    ok, result = await get_dispatcher().call(
+        int(order.user.telegram_id), "send_message", text=text, parse_mode="Markdown"
+    )
+    if not ok:
+        if is_permanent_error(result):
+            logger.info(f"🚫 Покупатель заказа #{order.id} недоступен в Telegram, уведомление о статусе пропущено.")
             return
+        raise DeliveryError(f"покупатель заказа #{order.id} не получил уведомление о статусе") from result
 
-        admins_and_staff = await get_admins_and_staff()
+    logger.info(f"📨 Покупатель уведомлён о статусе заказа #{order.id}: {status}")
 
-        for order in orders:
-            message = format_order_message(order, repeat=True)
-            await send_notifications(admins_and_staff, message)
 
-        # Обновляем время последнего уведомления
-        LAST_NOTIFIED_AT = now()
-        logger.info(f"🔄 Повторное уведомление отправлено для заказов")
+async def process_repeat_notifications(repeat_interval=REPEAT_ORDER_NOTIFY_INTERVAL,
+                                       min_interval=MIN_NOTIFICATION_INTERVAL):
+    """
+    Напоминает о заказах, которые долго не берут: одна сводка на получателя вместо
+    сообщения на каждый заказ, не чаще min_interval минут одному получателю.
+    Сводка уходит, только когда готовы все получатели, а напоминание переносится, только
+    когда её получили все: иначе перенос скрыл бы заказы от тех, кто сводку не видел.
+    """
+    notifications = await sync_to_async(fetch_due_notifications)()
+    if not notifications:
+        logger.info("✅ Нет заказов для повторных уведомлений.")
+        return
+
+    chat_ids = [int(chat_id) for chat_id in await get_admins_and_staff()]
+    recipients = await sync_to_async(filter_ready_recipients)(chat_ids, min_interval)
+    if not recipients or len(recipients) < len(chat_ids):
+        # Заказы остаются в очереди напоминаний, пока сводку не смогут принять все получатели
+        logger.info(
+            f"⏳ Напоминания о {len(notifications)} заказах отложены: "
+            f"готовы {len(recipients)} из {len(chat_ids)} получателей."
+        )
+        return
+
+    staff_ids = await sync_to_async(lambda: set(
+        int(chat_id) for chat_id in CustomUser.objects.filter(
+            telegram_id__in=[str(chat_id) for chat_id in recipients], is_staff=True
+        ).values_list("telegram_id", flat=True)
+    ))()
+
+    total = await sync_to_async(count_due_notifications)()
+    message = format_repeat_digest(notifications, total)
+    # Сотрудникам — кнопки «Взять» для заказов из сводки
+    keyboard = digest_keyboard([notification.order_id for notification in notifications])
+    messages = [
+        (
+            chat_id,
+            message,
+            {"parse_mode": "Markdown", "reply_markup": keyboard} if chat_id in staff_ids else {"parse_mode": "Markdown"},
+        )
+        for chat_id in recipients
+    ]
+
+    sent = await get_dispatcher().fan_out_collect(messages)
+    await sync_to_async(mark_recipients_notified)([chat_id for chat_id, _ in sent])
+    if len(sent) == len(messages):
+        await sync_to_async(reschedule_notifications)(notifications, repeat_interval)
     else:
-        logger.info("⏳ Повторные уведомления еще не готовы для отправки.")
+        # Кто-то сводку не получил: напоминание не засчитываем, заказы остаются к напоминанию
+        # и уйдут всем снова, когда у получивших истечёт min_interval
+        logger.warning(
+            f"⚠️ Сводка доставлена {len(sent)} из {len(messages)} получателей, напоминание будет повторено."
+        )
+    # Из сводок сотрудников убирается кнопка заказа, когда его возьмут
+    await sync_to_async(remember_digest_messages)(
+        [notification.order_id for notification in notifications],
+        [(chat_id, sent_message) for chat_id, sent_message in sent if chat_id in staff_ids],
+    )
+
+    logger.info(
+        f"🔄 Сводка о {len(notifications)} из {total} заказов доставлена {len(sent)} из {len(messages)} получателей."
+    )
 
 
 async def get_admins_and_staff():
     """
     Получает список администраторов и сотрудников с Telegram ID.
     """
-    users = await sync_to_async(
-        lambda: list(CustomUser.objects.filter(is_active=True, telegram_id__isnull=False))
-    )()
-    return [user.telegram_id for user in users if user.is_superuser or user.is_staff]
+    return await sync_to_async(lambda: list(
+        CustomUser.objects.filter(Q(is_superuser=True) | Q(is_staff=True), is_active=True, telegram_id__isnull=False)
+        .values_list("telegram_id", flat=True)
+    ))()
 
 
-from telegram import InlineKeyboardMarkup, InlineKeyboardButton
-
 async def send_notifications(user_ids, message, order_id):
     """
-    Отправляет уведомление всем пользователям из списка.
+    Отправляет уведомление всем пользователям из списка и возвращает число доставленных.
+    Роли получателей определяются одним запросом, отправка идёт параллельно в пределах лимитов Telegram.
     """
-    for user_id in user_ids:
-        try:
-            user = await sync_to_async(lambda: CustomUser.objects.get(telegram_id=user_id))()
-
-            # Если пользователь не администратор и не суперпользователь — добавляем кнопку
-            if user.is_staff:
-                keyboard = InlineKeyboardMarkup([
-                    [InlineKeyboardButton("✅ Взять в работу", callback_data=f"staff_take_order:{order_id}")]
-                ])
-                await bot.send_message(chat_id=user_id, text=message, parse_mode="Markdown", reply_markup=keyboard)
-            else:
-                # Администратору отправляем без кнопки
-                await bot.send_message(chat_id=user_id, text=message, parse_mode="Markdown")
-
-            await asyncio.sleep(1)  # Чтобы не попасть под ограничение Telegram
-        except Exception as e:
-            logger.error(f"❌ Ошибка отправки уведомления пользователю {user_id}: {e}")
+    staff_ids = await sync_to_async(lambda: set(
+        CustomUser.objects.filter(telegram_id__in=list(user_ids), is_staff=True).values_list("telegram_id", flat=True)
+    ))()
+
+    # Сотрудникам — с кнопкой «Взять в работу», администраторам — без неё
+    keyboard = InlineKeyboardMarkup([
+        [InlineKeyboardButton("✅ Взять в работу", callback_data=encode_callback("staff_take_order", order_id))]
+    ])
+    messages = [
+        (
+            user_id,
+            message,
+            {"parse_mode": "Markdown", "reply_markup": keyboard} if user_id in staff_ids else {"parse_mode": "Markdown"},
+        )
+        for user_id in user_ids
+    ]
+
+    sent = await get_dispatcher().fan_out_collect(messages)
+    logger.info(f"📤 Уведомление доставлено {len(sent)} из {len(messages)} получателей.")
+
+    # Запоминаем сообщения сотрудников, чтобы закрыть их, когда заказ возьмут в работу
+    await sync_to_async(remember_staff_messages)(
+        order_id, [(chat_id, message) for chat_id, message in sent if chat_id in staff_ids]
+    )
+    return len(sent)
 
 
 def should_notify_order(order):
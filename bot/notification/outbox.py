@@ -0,0 +1,126 @@
+# bot/notification/outbox.py
+
+import asyncio
+import logging
+import os
+import socket
+from datetime import timedelta
+
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils.timezone import now
+
+from bot.models import OrderNotification
+from bot.notification.task_queue import ORDER_PLACED, ORDER_STATUS_CHANGED, get_queue
+from bot.utils.time_config import REPEAT_ORDER_NOTIFY_INTERVAL, time_settings_changed
+from catalog.models import Order
+from catalog.signals import order_placed, order_status_changed
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Адрес, на котором notification_worker ждёт сигнал о новых событиях
+WAKEUP_HOST = os.getenv("NOTIFY_WAKEUP_HOST", "127.0.0.1")
+WAKEUP_PORT = int(os.getenv("NOTIFY_WAKEUP_PORT", "8765"))
+
+
+def enqueue_order_event(order_id, event_type=ORDER_PLACED, payload=None):
+    """
+    Публикует сообщение о заказе в очередь уведомлений и будит воркер после коммита.
+    Повторная публикация ещё не обработанного нового заказа ничего не создаёт.
+    Очередь в базе пишется в той же транзакции, во внешнюю (Redis) — после коммита,
+    чтобы воркер не увидел сообщение раньше заказа.
+    """
+    queue = get_queue()
+
+    def publish():
+        queue.publish(event_type, order_id, payload)
+        logger.info(f"📥 Событие {event_type} для заказа #{order_id} добавлено в очередь.")
+
+    if queue.transactional:
+        publish()
+        transaction.on_commit(wake_worker)
+    else:
+        transaction.on_commit(lambda: (publish(), wake_worker()))
+
+
+# ======= Сигналы заказов =======
+@receiver(order_placed, sender=Order)
+def enqueue_placed_order(sender, order, **kwargs):
+    """
+    Новый заказ (все позиции уже сохранены): только сообщение в очередь,
+    рассылку сотрудникам выполняет notification_worker вне веб-запроса.
+    """
+    enqueue_order_event(order.id)
+
+
+@receiver(order_status_changed, sender=Order)
+def enqueue_status_change(sender, order, old_status, new_status, **kwargs):
+    """
+    Смена статуса заказа: сообщение в очередь для уведомления покупателя.
+    """
+    enqueue_order_event(order.id, ORDER_STATUS_CHANGED, {"old_status": old_status, "status": new_status})
+
+
+def wake_worker():
+    """
+    Отправляет воркеру UDP-сигнал о новом событии. Если воркер не слушает,
+    событие всё равно будет подобрано при следующем плановом опросе.
+    """
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.sendto(b"wake", (WAKEUP_HOST, WAKEUP_PORT))
+    except OSError as e:
+        logger.debug(f"Не удалось разбудить воркер уведомлений: {e}")
+
+
+@receiver(time_settings_changed)
+def wake_worker_on_settings_change(sender, **kwargs):
+    # Воркер может спать весь старый интервал — будим, чтобы новые настройки применились сразу
+    wake_worker()
+
+
+def filter_unnotified_orders(order_ids):
+    """
+    Оставляет только новые заказы, о которых сотрудники ещё не уведомлены.
+    """
+    return set(
+        Order.objects.filter(id__in=order_ids, status="created", notification__isnull=True)
+        .values_list("id", flat=True)
+    )
+
+
+def mark_order_notified(order_id, repeat_after=REPEAT_ORDER_NOTIFY_INTERVAL):
+    """
+    Сдвигает курсор уведомлений по заказу и назначает первое напоминание через repeat_after минут.
+    """
+    notified_at = now()
+    OrderNotification.objects.update_or_create(
+        order_id=order_id,
+        defaults={"notified_at": notified_at, "next_notify_at": notified_at + timedelta(minutes=repeat_after)},
+    )
+
+
+class _WakeupProtocol(asyncio.DatagramProtocol):
+    def __init__(self, event):
+        self.event = event
+
+    def datagram_received(self, data, addr):
+        self.event.set()
+
+
+async def start_wakeup_listener(event):
+    """
+    Запускает приём UDP-сигналов, выставляющих event. Возвращает транспорт
+    или None, если порт занят — тогда воркер работает только по опросу.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _WakeupProtocol(event),
+            local_addr=(WAKEUP_HOST, WAKEUP_PORT),
+        )
+        logger.info(f"👂 Воркер уведомлений слушает {WAKEUP_HOST}:{WAKEUP_PORT}")
+        return transport
+    except OSError as e:
+        logger.warning(f"⚠️ Не удалось открыть {WAKEUP_HOST}:{WAKEUP_PORT} ({e}), работаем только по опросу.")
+        return None
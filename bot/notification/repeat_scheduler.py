@@ -0,0 +1,121 @@
+# bot/notification/repeat_scheduler.py
+"""
+repeat_scheduler.py
+
+Описание:
+Планировщик напоминаний о заказах, которые долго не берут в работу.
+
+Особенности:
+- У каждого заказа своё время следующего напоминания (OrderNotification.next_notify_at);
+  интервал растёт в REPEAT_NOTIFY_BACKOFF раз после каждого напоминания, до REPEAT_NOTIFY_MAX_INTERVAL.
+- Заказы, подошедшие к напоминанию, упаковываются в одну сводку на получателя: самые давние
+  REPEAT_DIGEST_MAX_ORDERS заказов, остальные ждут следующей сводки.
+- Получатель получает сводку не чаще раза в MIN_NOTIFICATION_INTERVAL минут (NotificationThrottle).
+  Сводка уходит, только когда готовы все получатели, поэтому перенесённое напоминание видели все.
+  Уведомления о новых заказах не ограничиваются — они отправляются сразу.
+"""
+
+from datetime import timedelta
+
+from django.db.models import Prefetch
+from django.utils.timezone import now
+
+from bot.models import NotificationThrottle, OrderNotification
+from bot.utils.time_config import (
+    MIN_NOTIFICATION_INTERVAL,
+    REPEAT_DIGEST_MAX_ORDERS,
+    REPEAT_NOTIFY_BACKOFF,
+    REPEAT_NOTIFY_MAX_INTERVAL,
+    REPEAT_ORDER_NOTIFY_INTERVAL,
+)
+from catalog.models import OrderItem
+
+
+def repeat_delay(notify_count, base_interval=REPEAT_ORDER_NOTIFY_INTERVAL,
+                 backoff=REPEAT_NOTIFY_BACKOFF, max_interval=REPEAT_NOTIFY_MAX_INTERVAL):
+    """
+    Через сколько минут напомнить о заказе, о котором уже сообщили notify_count раз.
+    """
+    return min(base_interval * backoff ** max(notify_count - 1, 0), max_interval)
+
+
+def _due_notifications(at=None):
+    return OrderNotification.objects.filter(
+        next_notify_at__lte=at or now(), order__status="created", order__executor__isnull=True
+    )
+
+
+def fetch_due_notifications(at=None, limit=REPEAT_DIGEST_MAX_ORDERS):
+    """
+    Самые давние limit заказов без исполнителя, которым пора напомнить, вместе с покупателем и позициями.
+    """
+    return list(
+        _due_notifications(at)
+        .select_related("order__user")
+        .prefetch_related(Prefetch("order__items", queryset=OrderItem.objects.select_related("product").order_by("id")))
+        .order_by("order_id")[:limit]
+    )
+
+
+def count_due_notifications(at=None):
+    return _due_notifications(at).count()
+
+
+def reschedule_notifications(notifications, base_interval=REPEAT_ORDER_NOTIFY_INTERVAL, at=None):
+    """
+    Отмечает напоминание и отодвигает следующее с экспоненциальной задержкой.
+    """
+    at = at or now()
+    for notification in notifications:
+        notification.notify_count += 1
+        notification.notified_at = at
+        notification.next_notify_at = at + timedelta(minutes=repeat_delay(notification.notify_count, base_interval))
+    OrderNotification.objects.bulk_update(notifications, ["notify_count", "notified_at", "next_notify_at"])
+
+
+def filter_ready_recipients(chat_ids, min_interval=MIN_NOTIFICATION_INTERVAL, at=None):
+    """
+    Оставляет получателей, которым сводка не отправлялась последние min_interval минут.
+    """
+    at = at or now()
+    throttled = set(
+        NotificationThrottle.objects.filter(chat_id__in=chat_ids, last_sent_at__gt=at - timedelta(minutes=min_interval))
+        .values_list("chat_id", flat=True)
+    )
+    return [chat_id for chat_id in chat_ids if chat_id not in throttled]
+
+
+def mark_recipients_notified(chat_ids, at=None):
+    at = at or now()
+    NotificationThrottle.objects.bulk_create(
+        [NotificationThrottle(chat_id=chat_id, last_sent_at=at) for chat_id in chat_ids],
+        update_conflicts=True,
+        unique_fields=["chat_id"],
+        update_fields=["last_sent_at"],
+    )
+
+
+def format_repeat_digest(notifications, total=None, at=None):
+    """
+    Текст сводки: по строке-блоку на заказ, самые давние заказы первыми.
+    :param total: Сколько всего заказов ждут напоминания (notifications — только первые из них).
+    """
+    at = at or now()
+    total = max(total or 0, len(notifications))
+    lines = [f"🔄 *Заказы ждут исполнителя: {total}*", ""]
+
+    for notification in notifications[:REPEAT_DIGEST_MAX_ORDERS]:
+        order = notification.order
+        waiting = int((at - order.created_at).total_seconds() // 60)
+        products = ", ".join(f"{item.product.name} ×{item.quantity}" for item in order.items.all())
+        lines += [
+            f"📦 *Заказ #{order.id}* — {order.total_price} ₽ (ждёт {waiting} мин.)",
+            f"📍 {order.address}",
+            f"🛍 {products}",
+            "",
+        ]
+
+    hidden = total - min(len(notifications), REPEAT_DIGEST_MAX_ORDERS)
+    if hidden > 0:
+        lines.append(f"…и ещё {hidden} заказ(ов). Полный список — «📦 Новые заказы».")
+    return "\n".join(lines).strip()
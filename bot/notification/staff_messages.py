@@ -0,0 +1,110 @@
+# bot/notification/staff_messages.py
+
+import logging
+
+from asgiref.sync import sync_to_async
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+from bot.models import StaffNotificationMessage
+from bot.notification.client import get_dispatcher
+from bot.utils.callback_parser import encode_callback
+
+logger = logging.getLogger(__name__)
+
+
+def remember_staff_messages(order_id, sent):
+    """
+    Сохраняет разосланные уведомления о заказе одним bulk_create.
+    :param sent: Список (chat_id, Message) из FanoutDispatcher.fan_out_collect.
+    """
+    StaffNotificationMessage.objects.bulk_create(
+        StaffNotificationMessage(order_id=order_id, chat_id=chat_id, message_id=message.message_id)
+        for chat_id, message in sent
+    )
+
+
+def digest_keyboard(order_ids):
+    """
+    Кнопки «Взять» для заказов сводки (None, если взяты все).
+    """
+    if not order_ids:
+        return None
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton(f"✅ Взять заказ #{order_id}",
+                              callback_data=encode_callback("staff_take_order", order_id))]
+        for order_id in order_ids
+    ])
+
+
+def remember_digest_messages(order_ids, sent):
+    """
+    Сохраняет разосланную сводку для каждого заказа из неё: когда любой из них возьмут,
+    close_staff_notifications уберёт из сводки его кнопку.
+    """
+    StaffNotificationMessage.objects.bulk_create(
+        StaffNotificationMessage(order_id=order_id, chat_id=chat_id, message_id=message.message_id, is_digest=True)
+        for order_id in order_ids
+        for chat_id, message in sent
+    )
+
+
+def is_digest_message(chat_id, message_id):
+    return StaffNotificationMessage.objects.filter(chat_id=chat_id, message_id=message_id, is_digest=True).exists()
+
+
+def pop_staff_messages(order_id, exclude=None):
+    """
+    Забирает (и удаляет) сохранённые уведомления о заказе.
+    :param exclude: (chat_id, message_id) сообщения, которое уже обновлено обработчиком.
+    """
+    messages = list(StaffNotificationMessage.objects.filter(order_id=order_id))
+    StaffNotificationMessage.objects.filter(id__in=[message.id for message in messages]).delete()
+    return [
+        message for message in messages
+        if exclude is None or (message.chat_id, message.message_id) != tuple(exclude)
+    ]
+
+
+def open_digest_orders(messages):
+    """
+    Заказы, кнопки которых остаются в сводках из messages: {(chat_id, message_id): [order_id, ...]}.
+    """
+    open_orders = {(message.chat_id, message.message_id): [] for message in messages if message.is_digest}
+    if not open_orders:
+        return open_orders
+
+    rows = (
+        StaffNotificationMessage.objects
+        .filter(is_digest=True, message_id__in={message_id for _, message_id in open_orders})
+        .order_by("order_id")
+        .values_list("chat_id", "message_id", "order_id")
+    )
+    for chat_id, message_id, order_id in rows:
+        if (chat_id, message_id) in open_orders:
+            open_orders[chat_id, message_id].append(order_id)
+    return open_orders
+
+
+async def close_staff_notifications(order_id, text, exclude=None):
+    """
+    Заменяет текст всех разосланных уведомлений о заказе (и убирает кнопку «Взять в работу»)
+    одной параллельной пачкой правок. В сводках о нескольких заказах текст не меняется —
+    из клавиатуры убирается только кнопка этого заказа.
+    """
+    def pop():
+        messages = pop_staff_messages(order_id, exclude)
+        return messages, open_digest_orders(messages)
+
+    messages, open_orders = await sync_to_async(pop)()
+    if not messages:
+        return 0
+
+    dispatcher = get_dispatcher()
+    edited = await dispatcher.edit_messages(
+        (message.chat_id, message.message_id, text, {}) for message in messages if not message.is_digest
+    )
+    edited += await dispatcher.edit_reply_markups(
+        (chat_id, message_id, digest_keyboard(order_ids)) for (chat_id, message_id), order_ids in open_orders.items()
+    )
+    logger.info(f"✏️ Обновлено {edited} из {len(messages)} уведомлений о заказе #{order_id}.")
+    return edited
@@ -0,0 +1,223 @@
+# bot/notification/task_queue.py
+"""
+task_queue.py
+
+Описание:
+Очередь сообщений между сигналами заказов (сайт, бот) и доставкой уведомлений в Telegram.
+Производители только публикуют лёгкое сообщение (тема, ID заказа, payload),
+доставку выполняет потребитель — notification_worker.
+
+Особенности:
+- Бэкенд выбирается переменной NOTIFY_QUEUE_BACKEND:
+  database (по умолчанию) — таблица NotificationEvent в основной базе (SQLite или PostgreSQL);
+  redis — списки Redis по адресу NOTIFY_QUEUE_URL (нужен пакет redis).
+- Доставка «как минимум один раз»: сообщение подтверждается (ack) после успешной обработки,
+  при ошибке (fail) повторяется с экспоненциальной задержкой, после NOTIFY_QUEUE_MAX_ATTEMPTS
+  попыток попадает в очередь «мёртвых» сообщений. Вернуть их в работу — requeue_dead().
+- Потребитель один (notification_worker), поэтому резервирование сообщений не блокирует строки.
+"""
+
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.timezone import now
+
+from bot.models import NotificationEvent
+
+logger = logging.getLogger(__name__)
+
+ORDER_PLACED = NotificationEvent.ORDER_CREATED
+ORDER_STATUS_CHANGED = NotificationEvent.ORDER_STATUS_CHANGED
+
+# 🔹 Бэкенд очереди: database или redis
+QUEUE_BACKEND = os.getenv("NOTIFY_QUEUE_BACKEND", "database")
+QUEUE_URL = os.getenv("NOTIFY_QUEUE_URL", "redis://127.0.0.1:6379/2")
+
+# 🔹 Попыток доставки до переноса в «мёртвые» сообщения
+MAX_ATTEMPTS = int(os.getenv("NOTIFY_QUEUE_MAX_ATTEMPTS", 5))
+
+# 🔹 Задержка перед повтором (секунды): удваивается с каждой попыткой, но не больше RETRY_MAX_DELAY
+RETRY_BASE_DELAY = 30
+RETRY_MAX_DELAY = 3600
+
+# 🔹 Максимум сообщений, обрабатываемых за один проход воркера
+BATCH_SIZE = 100
+
+
+@dataclass
+class QueueMessage:
+    id: str
+    topic: str
+    order_id: int
+    payload: dict = field(default_factory=dict)
+    attempts: int = 0
+    raw: str = ""  # Исходная запись в Redis, нужна для её удаления из списка
+
+
+def retry_delay(attempts):
+    """
+    Задержка (секунды) перед следующей попыткой после attempts неудачных.
+    """
+    return min(RETRY_BASE_DELAY * 2 ** max(attempts - 1, 0), RETRY_MAX_DELAY)
+
+
+class DatabaseQueue:
+    """
+    Очередь в таблице NotificationEvent. Публикация идёт в транзакции производителя
+    (transactional outbox): сообщение появляется только вместе с закоммиченным заказом.
+    """
+    transactional = True
+
+    def recover(self):
+        pass  # Незавершённые сообщения и так остаются ожидающими
+
+    def publish(self, topic, order_id, payload=None):
+        # Один INSERT без предварительного SELECT; повторная публикация ещё не обработанного
+        # нового заказа отбрасывается частичным уникальным ограничением (notif_event_pending_order_uniq)
+        NotificationEvent.objects.bulk_create(
+            [NotificationEvent(order_id=order_id, event_type=topic, payload=payload or {})],
+            ignore_conflicts=True,
+        )
+
+    def reserve(self, limit=BATCH_SIZE):
+        events = (
+            NotificationEvent.objects
+            .filter(processed_at__isnull=True, dead_at__isnull=True, available_at__lte=now())
+            .order_by("id")
+            .values_list("id", "event_type", "order_id", "payload", "attempts")[:limit]
+        )
+        return [
+            QueueMessage(id=str(event_id), topic=topic, order_id=order_id, payload=payload, attempts=attempts)
+            for event_id, topic, order_id, payload, attempts in events
+        ]
+
+    def ack(self, messages):
+        NotificationEvent.objects.filter(id__in=[message.id for message in messages]).update(processed_at=now())
+
+    def fail(self, message, error):
+        attempts = message.attempts + 1
+        dead = attempts >= MAX_ATTEMPTS
+        NotificationEvent.objects.filter(id=message.id).update(
+            attempts=attempts,
+            last_error=str(error),
+            available_at=now() + timedelta(seconds=retry_delay(attempts)),
+            dead_at=now() if dead else None,
+        )
+        return dead
+
+    def dead_count(self):
+        return NotificationEvent.objects.filter(dead_at__isnull=False, processed_at__isnull=True).count()
+
+    def requeue_dead(self):
+        return NotificationEvent.objects.filter(dead_at__isnull=False, processed_at__isnull=True).update(
+            dead_at=None, attempts=0, available_at=now()
+        )
+
+
+class RedisQueue:
+    """
+    Очередь в Redis: ready (список к доставке), processing (взятые воркером),
+    delayed (отложенные повторы, упорядочены по времени) и dead.
+    Redis не участвует в транзакции базы, поэтому публикация выполняется после коммита.
+    """
+    transactional = False
+
+    def __init__(self, url=QUEUE_URL, prefix="notify:queue"):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImproperlyConfigured("NOTIFY_QUEUE_BACKEND=redis требует пакет redis (pip install redis).") from e
+
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.keys = {name: f"{prefix}:{name}" for name in ("seq", "ready", "processing", "delayed", "dead")}
+
+    def recover(self):
+        # Сообщения, взятые воркером до перезапуска, возвращаются в работу
+        while self.client.lmove(self.keys["processing"], self.keys["ready"], "RIGHT", "LEFT"):
+            pass
+
+    @staticmethod
+    def _dump(message):
+        return json.dumps({
+            "id": message.id, "topic": message.topic, "order_id": message.order_id,
+            "payload": message.payload, "attempts": message.attempts,
+        })
+
+    def publish(self, topic, order_id, payload=None):
+        message_id = str(self.client.incr(self.keys["seq"]))
+        self.client.lpush(self.keys["ready"], self._dump(QueueMessage(message_id, topic, order_id, payload or {})))
+
+    def reserve(self, limit=BATCH_SIZE):
+        # Повторы, время которых подошло, переносим в начало очереди
+        due = self.client.zrangebyscore(self.keys["delayed"], "-inf", time.time())
+        for raw in due:
+            if self.client.zrem(self.keys["delayed"], raw):
+                self.client.rpush(self.keys["ready"], raw)
+
+        messages = []
+        while len(messages) < limit:
+            raw = self.client.lmove(self.keys["ready"], self.keys["processing"], "RIGHT", "LEFT")
+            if raw is None:
+                break
+            messages.append(QueueMessage(**json.loads(raw), raw=raw))
+        return messages
+
+    def ack(self, messages):
+        pipeline = self.client.pipeline()
+        for message in messages:
+            pipeline.lrem(self.keys["processing"], 1, message.raw)
+        pipeline.execute()
+
+    def fail(self, message, error):
+        message.attempts += 1
+        dead = message.attempts >= MAX_ATTEMPTS
+        record = json.loads(self._dump(message)) | {"error": str(error)}
+
+        pipeline = self.client.pipeline()
+        pipeline.lrem(self.keys["processing"], 1, message.raw)
+        if dead:
+            pipeline.lpush(self.keys["dead"], json.dumps(record))
+        else:
+            pipeline.zadd(self.keys["delayed"], {self._dump(message): time.time() + retry_delay(message.attempts)})
+        pipeline.execute()
+        return dead
+
+    def dead_count(self):
+        return self.client.llen(self.keys["dead"])
+
+    def requeue_dead(self):
+        requeued = 0
+        while raw := self.client.rpop(self.keys["dead"]):
+            record = json.loads(raw)
+            record.pop("error", None)
+            record["attempts"] = 0
+            self.client.lpush(self.keys["ready"], json.dumps(record))
+            requeued += 1
+        return requeued
+
+
+QUEUE_BACKENDS = {
+    "database": DatabaseQueue,
+    "redis": RedisQueue,
+}
+
+_queue = None
+
+
+def get_queue():
+    """
+    Общая очередь процесса, бэкенд по NOTIFY_QUEUE_BACKEND.
+    """
+    global _queue
+    if _queue is None:
+        try:
+            _queue = QUEUE_BACKENDS[QUEUE_BACKEND]()
+        except KeyError:
+            raise ImproperlyConfigured(f"Неизвестный NOTIFY_QUEUE_BACKEND: {QUEUE_BACKEND}") from None
+        logger.info(f"📬 Очередь уведомлений: {QUEUE_BACKEND}")
+    return _queue
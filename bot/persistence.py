@@ -0,0 +1,273 @@
+# bot/persistence.py
+"""
+persistence.py
+
+Описание:
+Хранилище состояния бота (context.user_data, chat_data, bot_data и разговоры) в базе Django.
+
+Особенности:
+- Состояние переживает перезапуск, а несколько процессов бота работают с общими данными:
+  перед обработкой обновления данные пользователя перечитываются из БД, если их изменил другой процесс.
+- Изменения, накопленные за один проход Application.update_persistence, записываются одной пачкой.
+- Если процессов бота несколько (BOT_WORKERS > 1), пакетная запись раз в несколько секунд небезопасна:
+  два процесса, обработавшие одного пользователя в одном окне, перезаписали бы данные друг друга.
+  Тогда user_data и chat_data записываются сразу в конце обработки обновления (persist_update_state),
+  и записываются только изменённые ключи — поверх строки, заблокированной на время слияния.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from copy import deepcopy
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import Q
+from telegram.ext import BasePersistence, PersistenceInput
+
+from bot.models import BotStateRecord
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Как часто (в секундах) Application сбрасывает изменения в хранилище
+PERSISTENCE_UPDATE_INTERVAL = float(os.getenv("BOT_PERSISTENCE_UPDATE_INTERVAL", 5))
+
+# 🔹 Сколько процессов бота обрабатывают обновления одновременно (общие данные в одной БД)
+BOT_WORKERS = int(os.getenv("BOT_WORKERS", 1))
+
+# 🔹 Группа обработчика, записывающего состояние в конце обновления (до возврата соединений с БД)
+PERSISTENCE_FLUSH_GROUP = 999
+
+USER, CHAT, BOT = "user", "chat", "bot"
+BOT_KEY = "0"
+
+
+def conversation_kind(name):
+    return f"conversation:{name}"
+
+
+# ======= Синхронный доступ к БД =======
+def load_records(kind, key=None):
+    """
+    Загружает записи одного вида: {key: (data, updated_at)}.
+    """
+    records = BotStateRecord.objects.filter(kind=kind)
+    if key is not None:
+        records = records.filter(key=key)
+    return {record.key: (record.data, record.updated_at) for record in records}
+
+
+def write_records(pending):
+    """
+    Записывает пачку изменений: {(kind, key): data или None для удаления}.
+    Возвращает {(kind, key): updated_at} для записанных строк.
+    """
+    deleted = [item for item, data in pending.items() if data is None]
+    if deleted:
+        condition = Q()
+        for kind, key in deleted:
+            condition |= Q(kind=kind, key=key)
+        BotStateRecord.objects.filter(condition).delete()
+
+    records = [
+        BotStateRecord(kind=kind, key=key, data=data)
+        for (kind, key), data in pending.items()
+        if data is not None
+    ]
+    BotStateRecord.objects.bulk_create(
+        records,
+        update_conflicts=True,
+        unique_fields=["kind", "key"],
+        update_fields=["data", "updated_at"],
+    )
+    return {(record.kind, record.key): record.updated_at for record in records}
+
+
+def merge_record(kind, key, changed, removed):
+    """
+    Применяет к записи только изменённые и удалённые ключи. Строка блокируется на время слияния,
+    поэтому одновременные изменения разных ключей из разных процессов не теряются.
+    Возвращает (данные после слияния, updated_at).
+    """
+    with transaction.atomic():
+        record, _ = BotStateRecord.objects.select_for_update().get_or_create(
+            kind=kind, key=key, defaults={"data": {}}
+        )
+        record.data.update(changed)
+        for name in removed:
+            record.data.pop(name, None)
+        record.save(update_fields=["data", "updated_at"])
+    return record.data, record.updated_at
+
+
+class DjangoPersistence(BasePersistence):
+    """
+    BasePersistence поверх модели BotStateRecord.
+    С write_through=True (по умолчанию при BOT_WORKERS > 1) user_data и chat_data
+    сливаются с базой по ключам в конце каждого обновления, а не перезаписываются пачкой.
+    """
+
+    def __init__(self, update_interval=PERSISTENCE_UPDATE_INTERVAL, write_through=BOT_WORKERS > 1):
+        super().__init__(store_data=PersistenceInput(callback_data=False), update_interval=update_interval)
+        self.write_through = write_through
+        self._pending = {}
+        self._batch = None
+        self._seen = {}  # (kind, key) -> updated_at версии, которую видел этот процесс
+        self._base = {}  # (kind, key) -> копия данных, от которой считаются изменения при слиянии
+
+    # ======= Пакетная запись =======
+    async def _enqueue(self, kind, key, data):
+        # Копия: словарь продолжает меняться обработчиками до фактической записи
+        self._pending[(kind, str(key))] = deepcopy(data) if data is not None else None
+        if self._batch is None:
+            self._batch = asyncio.ensure_future(self._write_batch())
+        await asyncio.shield(self._batch)
+
+    async def _write_batch(self):
+        # Даём остальным update_* из того же прохода update_persistence попасть в пачку
+        await asyncio.sleep(0)
+        pending, self._pending, self._batch = self._pending, {}, None
+
+        written = await sync_to_async(write_records)(pending)
+        self._seen.update(written)
+        for item, data in pending.items():
+            if data is None:
+                self._seen.pop(item, None)
+        logger.debug(f"💾 Состояние бота: записано {len(pending)} изменений одной пачкой.")
+
+    # ======= Слияние по ключам =======
+    async def _merge(self, kind, key, current):
+        """
+        Записывает ключи current, изменённые с последнего чтения записи, и подтягивает чужие изменения.
+        """
+        item = (kind, str(key))
+        base = self._base.get(item, {})
+        changed = {name: value for name, value in current.items() if name not in base or base[name] != value}
+        removed = [name for name in base if name not in current]
+        if not changed and not removed:
+            return
+
+        data, updated_at = await sync_to_async(merge_record)(kind, str(key), deepcopy(changed), removed)
+        # Локальная копия становится равной строке в БД — вместе с ключами, изменёнными другими процессами
+        current.clear()
+        current.update(data)
+        self._base[item] = deepcopy(data)
+        self._seen[item] = updated_at
+
+    async def write_update(self, update, context):
+        """
+        Записывает user_data и chat_data обновления сразу после его обработки (режим write_through).
+        """
+        if not self.write_through:
+            return
+        if update.effective_user is not None and self.store_data.user_data:
+            await self._merge(USER, update.effective_user.id, context.user_data)
+        if update.effective_chat is not None and self.store_data.chat_data:
+            await self._merge(CHAT, update.effective_chat.id, context.chat_data)
+
+    async def _load(self, kind):
+        records = await sync_to_async(load_records)(kind)
+        for key, (data, updated_at) in records.items():
+            self._seen[(kind, key)] = updated_at
+            self._base[(kind, key)] = deepcopy(data)
+        return {key: data for key, (data, _) in records.items()}
+
+    async def _refresh(self, kind, key, current):
+        """
+        Перечитывает запись, если её изменил другой процесс после того, как её видел этот.
+        С одним процессом бота (без write_through) состояние больше никто не пишет — запросов нет.
+        """
+        if not self.write_through:
+            return
+
+        item = (kind, str(key))
+        if item in self._pending:
+            return  # Локальные изменения ещё не записаны — они новее
+
+        records = await sync_to_async(load_records)(kind, str(key))
+        if not records:
+            return
+
+        data, updated_at = records[str(key)]
+        seen = self._seen.get(item)
+        if seen is None or updated_at > seen:
+            current.clear()
+            current.update(data)
+            self._seen[item] = updated_at
+            self._base[item] = deepcopy(data)
+
+    # ======= Загрузка при старте =======
+    async def get_user_data(self):
+        return {int(key): data for key, data in (await self._load(USER)).items()}
+
+    async def get_chat_data(self):
+        return {int(key): data for key, data in (await self._load(CHAT)).items()}
+
+    async def get_bot_data(self):
+        return (await self._load(BOT)).get(BOT_KEY, {})
+
+    async def get_callback_data(self):
+        return None
+
+    async def get_conversations(self, name):
+        records = await self._load(conversation_kind(name))
+        return {tuple(json.loads(key)): data["state"] for key, data in records.items()}
+
+    # ======= Запись изменений =======
+    async def update_user_data(self, user_id, data):
+        if self.write_through:
+            # Изменения обновлений уже слиты write_update; здесь — только сделанные вне обновлений
+            await self._merge(USER, user_id, data)
+        else:
+            await self._enqueue(USER, user_id, data)
+
+    async def update_chat_data(self, chat_id, data):
+        if self.write_through:
+            await self._merge(CHAT, chat_id, data)
+        else:
+            await self._enqueue(CHAT, chat_id, data)
+
+    async def update_bot_data(self, data):
+        await self._enqueue(BOT, BOT_KEY, data)
+
+    async def update_callback_data(self, data):
+        pass  # callback_data не хранится (store_data.callback_data = False)
+
+    async def update_conversation(self, name, key, new_state):
+        data = None if new_state is None else {"state": new_state}
+        await self._enqueue(conversation_kind(name), json.dumps(list(key)), data)
+
+    async def drop_user_data(self, user_id):
+        self._base.pop((USER, str(user_id)), None)
+        await self._enqueue(USER, user_id, None)
+
+    async def drop_chat_data(self, chat_id):
+        self._base.pop((CHAT, str(chat_id)), None)
+        await self._enqueue(CHAT, chat_id, None)
+
+    # ======= Обновление перед обработкой =======
+    async def refresh_user_data(self, user_id, user_data):
+        await self._refresh(USER, user_id, user_data)
+
+    async def refresh_chat_data(self, chat_id, chat_data):
+        await self._refresh(CHAT, chat_id, chat_data)
+
+    async def refresh_bot_data(self, bot_data):
+        pass  # bot_data не используется обработчиками, перечитывать его на каждое обновление незачем
+
+    async def flush(self):
+        if self._batch is not None:
+            await self._batch
+        if self._pending:
+            await self._write_batch()
+
+
+async def persist_update_state(update, context):
+    """
+    Обработчик группы PERSISTENCE_FLUSH_GROUP: состояние обновления записывается до ответа
+    на следующее, чтобы другой процесс бота начал с актуальных данных.
+    """
+    persistence = context.application.persistence
+    if isinstance(persistence, DjangoPersistence):
+        await persistence.write_update(update, context)
@@ -18,3 +18,19 @@ def parse_callback_data(callback_data):
     except Exception as e:
         logger.error(f"❌ Ошибка в parse_callback_data: {e}")
         return None, []
+
+
+# Telegram ограничивает callback_data 64 байтами
+CALLBACK_DATA_LIMIT = 64
+
+
+def encode_callback(action, *params):
+    """
+    Формирует callback_data в едином формате «action:param1:param2».
+    Булевы параметры кодируются как true/false.
+    """
+    parts = [action] + [str(param).lower() if isinstance(param, bool) else str(param) for param in params]
+    data = ":".join(parts)
+    if len(data.encode()) > CALLBACK_DATA_LIMIT:
+        raise ValueError(f"callback_data длиннее {CALLBACK_DATA_LIMIT} байт: {data}")
+    return data
@@ -0,0 +1,94 @@
+# bot/utils/callback_router.py
+
+import logging
+
+from bot.utils.callback_parser import parse_callback_data
+
+logger = logging.getLogger(__name__)
+
+
+def parse_bool(value):
+    """
+    Разбирает булев параметр callback_data (true/false).
+    """
+    if value not in ("true", "false"):
+        raise ValueError(f"Ожидалось true/false, получено: {value}")
+    return value == "true"
+
+
+# Преобразователи типов параметров: bool("false") в Python истинно, поэтому подменяем
+PARAM_PARSERS = {bool: parse_bool}
+
+
+class CallbackRoute:
+    """
+    Обработчик callback-действия и схема его параметров.
+    """
+
+    def __init__(self, action, handler, param_types):
+        self.action = action
+        self.handler = handler
+        self.param_types = param_types
+        self._parsers = [PARAM_PARSERS.get(param_type, param_type) for param_type in param_types]
+
+    def decode(self, params):
+        """
+        Приводит строковые параметры к типам схемы. Бросает ValueError при несовпадении.
+        """
+        if len(params) != len(self._parsers):
+            raise ValueError(f"'{self.action}' ожидает {len(self._parsers)} параметр(ов), получено {len(params)}")
+        return [parse(value) for parse, value in zip(self._parsers, params)]
+
+
+class CallbackRouter:
+    """
+    Таблица callback-действий: поиск обработчика по имени действия за O(1)
+    вместо перебора префиксов. Формат callback_data — «action:param1:param2».
+    """
+
+    def __init__(self):
+        self._routes = {}
+
+    def register(self, action, handler, *param_types):
+        """
+        Регистрирует обработчик действия. param_types — типы параметров (int, str, bool),
+        разобранные значения передаются обработчику после (update, context).
+        """
+        if action in self._routes:
+            raise ValueError(f"Callback-действие '{action}' уже зарегистрировано")
+        self._routes[action] = CallbackRoute(action, handler, param_types)
+        return handler
+
+    def route(self, action, *param_types):
+        """
+        Декоратор-вариант register().
+        """
+        def decorator(handler):
+            return self.register(action, handler, *param_types)
+        return decorator
+
+    def __contains__(self, action):
+        return action in self._routes
+
+    def resolve(self, callback_data):
+        """
+        Возвращает (обработчик, разобранные параметры) или (None, []), если действие неизвестно
+        или параметры не соответствуют схеме.
+        """
+        action, params = parse_callback_data(callback_data or "")
+        route = self._routes.get(action)
+
+        # Старый формат «action_123» из уже отправленных сообщений
+        if route is None and not params and "_" in (action or ""):
+            legacy_action, _, legacy_param = action.rpartition("_")
+            route = self._routes.get(legacy_action)
+            params = [legacy_param]
+
+        if route is None:
+            return None, []
+
+        try:
+            return route.handler, route.decode(params)
+        except ValueError as e:
+            logger.warning(f"⚠️ Некорректные параметры callback_data '{callback_data}': {e}")
+            return None, []
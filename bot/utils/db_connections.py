@@ -0,0 +1,27 @@
+# bot/utils/db_connections.py
+"""
+db_connections.py
+
+Описание:
+Жизненный цикл соединений с БД в процессах бота — аналог того, что Django делает в начале и конце HTTP-запроса.
+
+Особенности:
+- Бот не получает request_started/request_finished, поэтому без этого соединение потока sync_to_async
+  живёт вечно: не возвращается в пул, не закрывается по CONN_MAX_AGE и не проверяется после обрыва.
+- release_db_connections() закрывает устаревшие и сломанные соединения; при пуле (CONN_MAX_AGE = 0)
+  соединение возвращается в пул до следующего обновления.
+"""
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+# Группа обработчиков PTB, которая выполняется после всех остальных
+RELEASE_CONNECTIONS_GROUP = 1000
+
+
+async def release_db_connections(update=None, context=None):
+    """
+    Освобождает соединения потока sync_to_async. Годится и как обработчик TypeHandler, и для циклов воркеров.
+    """
+    # Вызов через sync_to_async попадает в тот же поток, где обработчики работают с БД
+    await sync_to_async(close_old_connections)()
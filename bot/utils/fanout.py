@@ -0,0 +1,197 @@
+# bot/utils/fanout.py
+
+import asyncio
+import logging
+import time
+
+from telegram.error import BadRequest, ChatMigrated, Forbidden, InvalidToken, RetryAfter
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Ограничения Telegram Bot API
+GLOBAL_RATE_LIMIT = 30  # Сообщений в секунду на бота
+PER_CHAT_RATE_LIMIT = 1  # Сообщений в секунду в один чат
+
+# 🔹 Одновременных запросов к Telegram
+MAX_CONCURRENT_SENDS = 10
+
+# 🔹 Попыток отправки при RetryAfter
+MAX_SEND_RETRIES = 3
+
+# 🔹 С какого числа ведёр чатов начинать удаление простаивающих
+CHAT_BUCKETS_PRUNE_SIZE = 1000
+
+
+def is_permanent_error(error):
+    """
+    Ошибка Telegram, которую повтор не исправит: бот заблокирован, чат не найден или переехал,
+    неверный запрос. Сетевые сбои (NetworkError, TimedOut) и RetryAfter — временные.
+    BadRequest наследует NetworkError, поэтому проверяется явно.
+    """
+    return isinstance(error, (Forbidden, BadRequest, ChatMigrated, InvalidToken))
+
+
+class TokenBucket:
+    """
+    Ограничитель частоты «ведро токенов»: rate токенов в секунду, не больше capacity подряд.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def is_idle(self):
+        """
+        Ведро успело наполниться до capacity: оно неотличимо от нового, и его можно удалить.
+        """
+        return time.monotonic() - self.updated_at >= (self.capacity - self.tokens) / self.rate
+
+    def _refill(self):
+        current = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (current - self.updated_at) * self.rate)
+        self.updated_at = current
+
+    async def acquire(self):
+        """
+        Забирает токен, при необходимости дождавшись его.
+        Токен резервируется под блокировкой (счётчик может уйти в минус — это очередь ожидающих),
+        а ждут уже без неё, поэтому ожидание одного не задерживает расчёт для остальных.
+        """
+        async with self._lock:
+            self._refill()
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class FanoutDispatcher:
+    """
+    Рассылка сообщений многим получателям: отправки идут параллельно,
+    но не чаще лимитов Telegram (общего и на чат), а RetryAfter приостанавливает всю рассылку.
+    """
+
+    def __init__(self, bot, global_rate=GLOBAL_RATE_LIMIT, per_chat_rate=PER_CHAT_RATE_LIMIT,
+                 max_concurrency=MAX_CONCURRENT_SENDS, max_retries=MAX_SEND_RETRIES):
+        self.bot = bot
+        self.per_chat_rate = per_chat_rate
+        self.max_retries = max_retries
+        self._global_bucket = TokenBucket(global_rate)
+        self._chat_buckets = {}
+        self._prune_at = CHAT_BUCKETS_PRUNE_SIZE
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._resume_at = 0.0
+
+    def _chat_bucket(self, chat_id):
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self._chat_buckets) >= self._prune_at:
+                self._prune_chat_buckets()
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.per_chat_rate)
+        return bucket
+
+    def _prune_chat_buckets(self):
+        # Воркер работает неделями: ведро каждого чата, которому когда-либо писали, иначе остаётся навсегда.
+        # Порог удваивается от оставшихся вёдер, поэтому просмотр словаря в среднем дешёвый
+        self._chat_buckets = {
+            chat_id: bucket for chat_id, bucket in self._chat_buckets.items() if not bucket.is_idle()
+        }
+        self._prune_at = max(CHAT_BUCKETS_PRUNE_SIZE, 2 * len(self._chat_buckets))
+
+    async def _wait_if_paused(self):
+        delay = self._resume_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def call(self, chat_id, method, **kwargs):
+        """
+        Вызывает метод Bot API для чата chat_id с учётом лимитов и повторов при RetryAfter.
+        Слот одновременных запросов занимается только после ожидания лимита чата,
+        чтобы частые сообщения в один чат не блокировали рассылку по остальным.
+        Возвращает (успех, результат вызова); при ошибке вместо результата — исключение
+        (None, если исчерпаны повторы при RetryAfter).
+        """
+        for attempt in range(1, self.max_retries + 1):
+            await self._wait_if_paused()
+            await self._chat_bucket(chat_id).acquire()
+            async with self._semaphore:
+                await self._global_bucket.acquire()
+                try:
+                    return True, await getattr(self.bot, method)(chat_id=chat_id, **kwargs)
+                except RetryAfter as e:
+                    retry_after = float(e.retry_after)
+                    logger.warning(f"⏳ Telegram просит подождать {retry_after} с (чат {chat_id}, попытка {attempt}).")
+                    self._resume_at = max(self._resume_at, time.monotonic() + retry_after)
+                except Exception as e:
+                    if is_permanent_error(e):
+                        logger.warning(f"🚫 {method} для пользователя {chat_id} невозможен: {e}")
+                    else:
+                        logger.error(f"❌ Ошибка {method} для пользователя {chat_id}: {e}")
+                    return False, e
+
+        logger.error(f"❌ Не удалось выполнить {method} для пользователя {chat_id}: превышено число попыток.")
+        return False, None
+
+    async def send_message(self, chat_id, text, **kwargs):
+        """
+        Отправляет одно сообщение с учётом лимитов. Возвращает True при успехе.
+        """
+        ok, _ = await self.call(chat_id, "send_message", text=text, **kwargs)
+        return ok
+
+    async def fan_out(self, messages):
+        """
+        Отправляет пачку сообщений параллельно.
+        :param messages: Итерируемое из (chat_id, text, kwargs).
+        :return: Количество успешно отправленных сообщений.
+        """
+        results = await asyncio.gather(
+            *(self.send_message(chat_id, text, **kwargs) for chat_id, text, kwargs in messages)
+        )
+        return sum(results)
+
+    async def fan_out_collect(self, messages):
+        """
+        Как fan_out, но возвращает отправленные сообщения: список (chat_id, Message).
+        Нужен, чтобы позже отредактировать разосланные уведомления.
+        """
+        messages = list(messages)
+        results = await asyncio.gather(
+            *(self.call(chat_id, "send_message", text=text, **kwargs) for chat_id, text, kwargs in messages)
+        )
+        return [
+            (chat_id, message)
+            for (chat_id, _, _), (ok, message) in zip(messages, results)
+            if ok and message is not None
+        ]
+
+    async def edit_messages(self, edits):
+        """
+        Редактирует пачку сообщений параллельно.
+        :param edits: Итерируемое из (chat_id, message_id, text, kwargs).
+        :return: Количество успешно изменённых сообщений.
+        """
+        results = await asyncio.gather(
+            *(
+                self.call(chat_id, "edit_message_text", message_id=message_id, text=text, **kwargs)
+                for chat_id, message_id, text, kwargs in edits
+            )
+        )
+        return sum(ok for ok, _ in results)
+
+    async def edit_reply_markups(self, edits):
+        """
+        Заменяет клавиатуры пачки сообщений параллельно.
+        :param edits: Итерируемое из (chat_id, message_id, reply_markup); None убирает клавиатуру.
+        :return: Количество успешно изменённых сообщений.
+        """
+        results = await asyncio.gather(
+            *(
+                self.call(chat_id, "edit_message_reply_markup", message_id=message_id, reply_markup=reply_markup)
+                for chat_id, message_id, reply_markup in edits
+            )
+        )
+        return sum(ok for ok, _ in results)
@@ -0,0 +1,82 @@
+# bot/utils/image_pool.py
+
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Потоков для обработки изображений (Pillow отпускает GIL при декодировании и ресайзе)
+IMAGE_POOL_WORKERS = int(os.getenv("IMAGE_POOL_WORKERS", 2))
+
+# 🔹 Задач в пуле одновременно (выполняются + ждут очереди); сверх лимита — отказ
+IMAGE_POOL_MAX_PENDING = int(os.getenv("IMAGE_POOL_MAX_PENDING", 20))
+
+
+class ImagePoolBusy(Exception):
+    """
+    Пул изображений перегружен — задачу нужно отложить или обойтись без картинки.
+    """
+
+
+class ImagePool:
+    """
+    Ограниченный пул потоков для работы с изображениями вне цикла событий.
+    Не больше max_workers задач выполняются одновременно, не больше max_pending — в очереди.
+    """
+
+    def __init__(self, max_workers=IMAGE_POOL_WORKERS, max_pending=IMAGE_POOL_MAX_PENDING):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image-pool")
+        self._semaphore = asyncio.Semaphore(max_workers)
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Выполняет func(*args, **kwargs) в пуле и возвращает результат.
+        Бросает ImagePoolBusy, если очередь заполнена.
+        """
+        if self.pending >= self.max_pending:
+            logger.warning(f"⚠️ Пул изображений перегружен ({self.pending} задач), задача отклонена.")
+            raise ImagePoolBusy()
+
+        self.pending += 1
+        try:
+            async with self._semaphore:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+        finally:
+            self.pending -= 1
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Единственный на процесс пул
+_pool = None
+
+
+def get_image_pool():
+    """
+    Возвращает общий для процесса пул изображений (создаётся при первом обращении).
+    """
+    global _pool
+
+    if _pool is None:
+        _pool = ImagePool()
+        logger.info(f"🖼 Создан пул изображений (потоков: {IMAGE_POOL_WORKERS}, очередь: {IMAGE_POOL_MAX_PENDING}).")
+    return _pool
+
+
+def shutdown_image_pool():
+    """
+    Останавливает общий пул изображений.
+    """
+    global _pool
+
+    if _pool is not None:
+        _pool.shutdown()
+    _pool = None
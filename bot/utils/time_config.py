@@ -1,9 +1,20 @@
+# bot/utils/time_config.py
+
 import datetime
 import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+from django.dispatch import Signal
+
+logger = logging.getLogger(__name__)
 
 # 🔹 Рабочее время (часы и минуты)
 WORK_HOURS_START = datetime.time(9, 0)  # 09:00
-WORK_HOURS_END = datetime.time(22, 0)  # 20:00
+WORK_HOURS_END = datetime.time(22, 0)  # 22:00
 
 # 🔹 Интервал проверки новых заказов (минуты)
 NEW_ORDER_NOTIFY_INTERVAL = 1
@@ -14,45 +25,142 @@ REPEAT_ORDER_NOTIFY_INTERVAL = 2
 # 🔹 Минимальный интервал между уведомлениями одному и тому же сотруднику (минуты)
 MIN_NOTIFICATION_INTERVAL = 15
 
+# 🔹 Каждое следующее напоминание о невзятом заказе приходит в REPEAT_NOTIFY_BACKOFF раз позже,
+# но не реже, чем раз в REPEAT_NOTIFY_MAX_INTERVAL минут
+REPEAT_NOTIFY_BACKOFF = 2
+REPEAT_NOTIFY_MAX_INTERVAL = 60
+
+# 🔹 Сколько заказов с кнопками помещается в одну сводку напоминаний
+REPEAT_DIGEST_MAX_ORDERS = 10
+
 # 🔹 Разрешать ли уведомления вне рабочего времени (по умолчанию False)
 ALLOW_NON_WORKING_HOURS_NOTIFICATIONS = False
 
 # 🔹 Время последнего уведомления (будет обновляться в коде)
 LAST_NOTIFIED_AT = None  # Формат: "YYYY-MM-DD HH:MM:SS"
 
-SETTINGS_FILE = 'time_settings.json'
+# 🔹 Файл настроек, редактируемый из админки (по умолчанию — в корне проекта, независимо от рабочего каталога)
+SETTINGS_FILE = os.getenv("TIME_SETTINGS_FILE", str(Path(__file__).resolve().parents[2] / "time_settings.json"))
 
+TIME_FIELDS = ("work_hours_start", "work_hours_end")
 
-def load_settings():
+DEFAULT_SETTINGS = {
+    'work_hours_start': WORK_HOURS_START,  # Начало рабочего времени
+    'work_hours_end': WORK_HOURS_END,  # Конец рабочего времени
+    'new_order_notify_interval': NEW_ORDER_NOTIFY_INTERVAL,  # Интервал для уведомлений о новых заказах
+    'repeat_order_notify_interval': REPEAT_ORDER_NOTIFY_INTERVAL,  # Интервал для повторных уведомлений
+    'min_notification_interval': MIN_NOTIFICATION_INTERVAL,  # Не чаще одной сводки получателю
+    'allow_non_working_hours_notifications': ALLOW_NON_WORKING_HOURS_NOTIFICATIONS,  # Уведомления вне рабочего времени
+}
+
+# Отправляется после сохранения настроек (например, чтобы разбудить воркер уведомлений)
+time_settings_changed = Signal()
+
+
+class TimeSettingsProvider:
     """
-    Загружает настройки времени из файла.
+    Разобранные настройки времени, общие для воркера, is_working_hours и админки.
+    Файл перечитывается только при изменении (mtime, размер, inode) или после invalidate().
     """
-    try:
-        with open(SETTINGS_FILE, 'r') as file:
-            settings = json.load(file)
-
-            # Преобразуем строковые значения времени обратно в datetime.time
-            settings['work_hours_start'] = datetime.datetime.strptime(settings['work_hours_start'], '%H:%M').time()
-            settings['work_hours_end'] = datetime.datetime.strptime(settings['work_hours_end'], '%H:%M').time()
-
-            return settings
-    except FileNotFoundError:
-        return {
-            'work_hours_start': datetime.time(9, 0),  # Начало рабочего времени
-            'work_hours_end': datetime.time(20, 0),  # Конец рабочего времени
-            'new_order_notify_interval': 1,  # Интервал для уведомлений о новых заказах
-            'repeat_order_notify_interval': 2,  # Интервал для повторных уведомлений
-            'allow_non_working_hours_notifications': False,  # Разрешение уведомлений вне рабочего времени
+
+    def __init__(self, path=SETTINGS_FILE):
+        self.path = path
+        self._snapshot = None
+        self._file_state = None
+        self._lock = threading.Lock()
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def get(self):
+        """
+        Возвращает копию текущих настроек (вызывающий код может её менять).
+        """
+        file_state = self._stat()
+        snapshot = self._snapshot
+        if snapshot is None or file_state != self._file_state:
+            with self._lock:
+                if self._snapshot is None or file_state != self._file_state:
+                    self._reload(file_state)
+                # invalidate() из другого потока может сбросить _snapshot сразу после выхода из блокировки
+                snapshot = self._snapshot
+        return dict(snapshot)
+
+    def _reload(self, file_state):
+        try:
+            with open(self.path, 'r') as file:
+                raw = json.load(file)
+        except FileNotFoundError:
+            raw = {}
+        except (OSError, ValueError) as e:
+            # Испорченный файл (ручная правка) — продолжаем работать с последними корректными настройками
+            logger.error(f"❌ Не удалось прочитать {self.path}: {e}")
+            if self._snapshot is None:
+                self._snapshot = dict(DEFAULT_SETTINGS)
+            self._file_state = file_state
+            return
+
+        settings = {**DEFAULT_SETTINGS, **raw}
+        # Преобразуем строковые значения времени обратно в datetime.time
+        for field in TIME_FIELDS:
+            if isinstance(settings[field], str):
+                settings[field] = datetime.datetime.strptime(settings[field], '%H:%M').time()
+
+        self._snapshot = settings
+        self._file_state = file_state
+        logger.info(f"🕒 Настройки времени загружены из {self.path}")
+
+    def invalidate(self):
+        """
+        Сигнал об изменении: следующий get() перечитает файл.
+        """
+        with self._lock:
+            self._snapshot = None
+
+    def save(self, settings):
+        """
+        Атомарно записывает настройки: временный файл в том же каталоге и os.replace,
+        поэтому читатели видят либо старый, либо новый файл целиком.
+        """
+        data = {
+            key: value.strftime('%H:%M') if key in TIME_FIELDS else value
+            for key, value in {**self.get(), **settings}.items()
         }
+        directory = os.path.dirname(os.path.abspath(self.path))
 
+        with self._lock:
+            descriptor, temp_path = tempfile.mkstemp(dir=directory, prefix=".time_settings.", suffix=".tmp")
+            try:
+                with os.fdopen(descriptor, 'w') as file:
+                    json.dump(data, file, indent=4)
+                    file.flush()
+                    os.fsync(file.fileno())
+                os.chmod(temp_path, 0o644)  # mkstemp создаёт файл 0600 — его не прочитал бы процесс другого пользователя
+                os.replace(temp_path, self.path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+            self._snapshot = None
 
-def save_settings(settings):
+        time_settings_changed.send(sender=TimeSettingsProvider, settings=self.get())
+
+
+TIME_SETTINGS = TimeSettingsProvider()
+
+
+def load_settings():
     """
-    Сохраняет обновленные настройки времени в файл.
+    Текущие настройки времени (из кэша, файл перечитывается только после изменения).
     """
-    settings['work_hours_start'] = settings['work_hours_start'].strftime('%H:%M')
-    settings['work_hours_end'] = settings['work_hours_end'].strftime('%H:%M')
+    return TIME_SETTINGS.get()
 
-    with open(SETTINGS_FILE, 'w') as file:
-        json.dump(settings, file, indent=4)
 
+def save_settings(settings):
+    """
+    Сохраняет обновленные настройки времени в файл.
+    """
+    TIME_SETTINGS.save(settings)
@@ -2,14 +2,36 @@
 
 import datetime
 import pytz
-from bot.utils.time_config import WORK_HOURS_START, WORK_HOURS_END
+from bot.utils.time_config import load_settings
 
 MOSCOW_TZ = pytz.timezone("Europe/Moscow")
 
-def is_working_hours():
+
+def moscow_now():
+    return datetime.datetime.now(MOSCOW_TZ)
+
+
+def is_working_hours(settings=None, now=None):
     """
     Проверяет, находится ли текущее время в пределах рабочего графика.
     Возвращает True, если сейчас рабочее время, иначе False.
+    График берётся из настроек времени (time_settings.json), изменённых в админке.
+    """
+    settings = settings or load_settings()
+    now = (now or moscow_now()).astimezone(MOSCOW_TZ).time()
+    return settings['work_hours_start'] <= now <= settings['work_hours_end']
+
+
+def seconds_until_working_hours(settings=None, now=None):
     """
-    now = datetime.datetime.now(MOSCOW_TZ).time()
-    return WORK_HOURS_START <= now <= WORK_HOURS_END
+    Сколько секунд осталось до ближайшего начала рабочего времени (0, если оно уже идёт).
+    """
+    settings = settings or load_settings()
+    now = (now or moscow_now()).astimezone(MOSCOW_TZ)
+    if is_working_hours(settings, now):
+        return 0
+
+    start = MOSCOW_TZ.localize(datetime.datetime.combine(now.date(), settings['work_hours_start']))
+    if start <= now:
+        start += datetime.timedelta(days=1)
+    return (start - now).total_seconds()
@@ -0,0 +1,141 @@
+# bot/utils/user_cache.py
+"""
+user_cache.py
+
+Описание:
+Определение пользователя бота (CustomUser по Telegram ID) один раз на обновление.
+
+Особенности:
+- Пред-обработчик load_context_user (группа -1) кладёт пользователя в context.db_user,
+  обработчики получают его через get_current_user() без отдельного запроса к БД.
+- Пользователи кешируются в памяти процесса (LRU + TTL), включая «не найден» для новых пользователей.
+- Запись в памяти помечена версией пространства «user:<telegram_id>» из общего кэша (catalog.caching).
+  Сохранение CustomUser в любом процессе (сайт, другой процесс бота) меняет версию, и запись перечитывается.
+- invalidate_user() дополнительно сбрасывает запись сразу в текущем процессе и обновлении.
+"""
+
+import logging
+import os
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+
+from catalog.caching import get_version
+from users.models import CustomUser
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Сколько пользователей держим в памяти процесса
+USER_CACHE_SIZE = int(os.getenv("BOT_USER_CACHE_SIZE", 1000))
+
+# 🔹 Время жизни записи (секунды) — на случай, если изменение прошло мимо сигналов (queryset.update())
+USER_CACHE_TTL = float(os.getenv("BOT_USER_CACHE_TTL", 300))
+
+_MISSING = object()
+
+
+class UserCache:
+    """
+    LRU-кеш с ограниченным временем жизни записей.
+    """
+
+    def __init__(self, max_size=USER_CACHE_SIZE, ttl=USER_CACHE_TTL, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+
+    def get(self, key, default=_MISSING):
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+
+        expires_at, value = entry
+        if expires_at <= self.clock():
+            del self._entries[key]
+            return default
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        self._entries[key] = (self.clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+USER_CACHE = UserCache()
+
+
+def fetch_user(telegram_id):
+    return CustomUser.objects.filter(telegram_id=str(telegram_id)).first()
+
+
+def load_user(telegram_id):
+    """
+    Возвращает CustomUser по Telegram ID (или None): из памяти, если версия в общем кэше не менялась, иначе из БД.
+    """
+    key = str(telegram_id)
+    # Версию читаем до запроса к БД: изменение, случившееся во время запроса, сменит её ещё раз
+    version = get_version(f"user:{key}")
+    cached = USER_CACHE.get(key)
+    if cached is _MISSING or cached[0] != version:
+        cached = (version, fetch_user(key))
+        USER_CACHE.set(key, cached)
+    return cached[1]
+
+
+async def resolve_user(telegram_id):
+    return await sync_to_async(load_user)(telegram_id)
+
+
+def invalidate_user(telegram_id, context=None):
+    """
+    Сбрасывает кеш пользователя после его изменения. С context — и уже определённого для текущего обновления.
+    """
+    if telegram_id:
+        USER_CACHE.invalidate(str(telegram_id))
+    if context is not None:
+        context.db_user = _MISSING
+
+
+# ======= Пред-обработчик обновлений =======
+async def load_context_user(update, context):
+    """
+    Определяет пользователя один раз на обновление (регистрируется в группе -1).
+    """
+    if update.effective_user is not None:
+        context.db_user = await resolve_user(update.effective_user.id)
+
+
+async def find_current_user(update, context):
+    """
+    Пользователь текущего обновления или None для незарегистрированного.
+    """
+    user = getattr(context, "db_user", _MISSING)
+    if not (user is None or isinstance(user, CustomUser)):
+        user = await resolve_user(update.effective_user.id)
+        context.db_user = user
+    return user
+
+
+async def get_current_user(update, context, staff=False):
+    """
+    Пользователь текущего обновления. Бросает CustomUser.DoesNotExist, если он не найден
+    или (при staff=True) не является сотрудником.
+    """
+    user = await find_current_user(update, context)
+    if user is None or (staff and not user.is_staff):
+        raise CustomUser.DoesNotExist(f"Пользователь с Telegram ID {update.effective_user.id} не найден.")
+    return user
@@ -0,0 +1,189 @@
+# bot/webhook.py
+"""
+webhook.py
+
+Описание:
+Приём обновлений Telegram через webhook внутри ASGI-приложения Django.
+
+Особенности:
+- POST на TELEGRAM_WEBHOOK_PATH проверяется по секретному токену
+  (заголовок X-Telegram-Bot-Api-Secret-Token) и сразу получает ответ 200.
+- Обновление кладётся в update_queue приложения python-telegram-bot и обрабатывается
+  обработчиками из register_handlers независимо от HTTP-запроса.
+- При переполненной очереди отвечаем 503 — Telegram повторит доставку позже.
+- Все остальные запросы передаются приложению Django.
+"""
+
+import asyncio
+import hmac
+import json
+import logging
+import os
+
+from dotenv import load_dotenv
+from telegram import Update
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Настройки webhook
+WEBHOOK_PATH = os.getenv("TELEGRAM_WEBHOOK_PATH", "/telegram/webhook/")
+WEBHOOK_SECRET = os.getenv("TELEGRAM_WEBHOOK_SECRET")
+WEBHOOK_URL = os.getenv("TELEGRAM_WEBHOOK_URL")  # Публичный адрес для setWebhook (необязательно)
+
+# 🔹 Максимум обновлений, ожидающих обработки
+WEBHOOK_QUEUE_SIZE = int(os.getenv("TELEGRAM_WEBHOOK_QUEUE_SIZE", 1000))
+
+SECRET_HEADER = b"x-telegram-bot-api-secret-token"
+
+
+def is_webhook_mode():
+    """
+    Бот работает через webhook вместо run_polling().
+    """
+    return os.getenv("TELEGRAM_BOT_MODE", "polling") == "webhook"
+
+
+def build_bot_application():
+    """
+    Создаёт Application без Updater (обновления приходят через webhook) и регистрирует обработчики.
+    """
+    from telegram.ext import ApplicationBuilder
+    from bot.handlers.registration import register_handlers
+    from bot.persistence import DjangoPersistence
+
+    token = os.getenv("TELEGRAM_BOT_TOKEN")
+    if not token:
+        raise ValueError("Токен Telegram бота отсутствует. Проверьте файл .env.")
+
+    application = ApplicationBuilder().token(token).updater(None).persistence(DjangoPersistence()).build()
+    register_handlers(application)
+    return application
+
+
+class TelegramWebhookApp:
+    """
+    ASGI-обёртка над приложением Django: принимает webhook Telegram, остальное отдаёт Django.
+    """
+
+    def __init__(self, django_app, bot_application=None, path=WEBHOOK_PATH, secret=WEBHOOK_SECRET,
+                 queue_size=WEBHOOK_QUEUE_SIZE, webhook_url=WEBHOOK_URL):
+        self.django_app = django_app
+        self.bot_application = bot_application
+        self.path = path
+        self.secret = secret
+        self.queue_size = queue_size
+        self.webhook_url = webhook_url
+        self._started = False
+        self._start_lock = asyncio.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http" and scope["path"] == self.path:
+            await self._handle_webhook(scope, receive, send)
+        else:
+            await self.django_app(scope, receive, send)
+
+    # ======= Запуск и остановка бота =======
+    async def startup(self):
+        """
+        Инициализирует и запускает Application (обработку update_queue). Повторный вызов ничего не делает.
+        """
+        async with self._start_lock:
+            if self._started:
+                return
+
+            if self.bot_application is None:
+                self.bot_application = build_bot_application()
+
+            await self.bot_application.initialize()
+            await self.bot_application.start()
+            self._started = True
+
+            if self.webhook_url:
+                await self.bot_application.bot.set_webhook(
+                    url=f"{self.webhook_url.rstrip('/')}{self.path}",
+                    secret_token=self.secret,
+                )
+            logger.info(f"🌐 Telegram-бот принимает обновления через webhook {self.path}.")
+
+    async def shutdown(self):
+        async with self._start_lock:
+            if not self._started:
+                return
+            await self.bot_application.stop()
+            await self.bot_application.shutdown()
+            self._started = False
+            logger.info("🛑 Webhook Telegram-бота остановлен.")
+
+    async def _lifespan(self, receive, send):
+        # Django не поддерживает lifespan, поэтому обрабатываем его здесь
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.startup()
+                except Exception as e:
+                    logger.error(f"❌ Ошибка запуска webhook-бота: {e}", exc_info=True)
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    # ======= Приём обновлений =======
+    async def _handle_webhook(self, scope, receive, send):
+        if scope["method"] != "POST":
+            await self._respond(send, 405)
+            return
+
+        if not self._secret_is_valid(scope):
+            logger.warning("⚠️ Webhook: запрос с неверным секретным токеном отклонён.")
+            await self._respond(send, 403)
+            return
+
+        body = await self._read_body(receive)
+
+        # Сервер мог не прислать lifespan — запускаем бота при первом обновлении
+        await self.startup()
+
+        queue = self.bot_application.update_queue
+        if queue.qsize() >= self.queue_size:
+            logger.warning(f"⚠️ Webhook: очередь обновлений заполнена ({queue.qsize()}), просим Telegram повторить.")
+            await self._respond(send, 503)
+            return
+
+        try:
+            update = Update.de_json(json.loads(body), self.bot_application.bot)
+        except (ValueError, TypeError) as e:
+            logger.warning(f"⚠️ Webhook: некорректное тело запроса: {e}")
+            await self._respond(send, 400)
+            return
+
+        await queue.put(update)
+        await self._respond(send, 200)
+
+    def _secret_is_valid(self, scope):
+        if not self.secret:
+            logger.error("❌ TELEGRAM_WEBHOOK_SECRET не задан — webhook не принимает обновления.")
+            return False
+        received = dict(scope.get("headers", [])).get(SECRET_HEADER, b"")
+        return hmac.compare_digest(received, self.secret.encode())
+
+    @staticmethod
+    async def _read_body(receive):
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                return body
+
+    @staticmethod
+    async def _respond(send, status):
+        await send({"type": "http.response.start", "status": status, "headers": [(b"content-type", b"text/plain")]})
+        await send({"type": "http.response.body", "body": b""})
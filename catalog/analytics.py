@@ -0,0 +1,85 @@
+# catalog/analytics.py
+
+import logging
+from datetime import timedelta
+
+from django.db.models import Avg, Count, Q, Sum
+from django.utils import timezone
+
+from users.models import CustomUser
+from .caching import get_or_build, invalidate
+from .models import Order
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Кэш сводки аналитики
+ANALYTICS_NAMESPACE = "analytics"
+ANALYTICS_CACHE_TTL = 60  # Секунд
+
+# Периоды сводки (None — за всё время)
+ANALYTICS_PERIODS = ("today", "week", "month", "year", "all")
+
+
+def get_period_starts(now=None):
+    """
+    Начало каждого периода сводки.
+    """
+    now = now or timezone.now()
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    return {
+        "today": today_start,
+        "week": today_start - timedelta(days=7),
+        "month": today_start.replace(day=1),
+        "year": today_start.replace(month=1, day=1),
+        "all": None,
+    }
+
+
+def _period_filter(field, start):
+    return Q(**{f"{field}__gte": start}) if start else Q()
+
+
+def build_analytics_snapshot(now=None):
+    """
+    Считает сводку за все периоды: один проход по заказам с условной агрегацией
+    и один — по пользователям.
+    """
+    starts = get_period_starts(now)
+
+    order_aggregates = {}
+    user_aggregates = {}
+    for period, start in starts.items():
+        condition = _period_filter("created_at", start)
+        order_aggregates[f"orders_{period}"] = Count("id", filter=condition)
+        order_aggregates[f"revenue_{period}"] = Sum("total_price", filter=condition)
+        order_aggregates[f"average_{period}"] = Avg("total_price", filter=condition)
+        user_aggregates[f"users_{period}"] = Count("id", filter=_period_filter("date_joined", start))
+
+    orders = Order.objects.aggregate(**order_aggregates)
+    users = CustomUser.objects.aggregate(**user_aggregates)
+
+    return {
+        period: {
+            "users": users[f"users_{period}"],
+            "orders": orders[f"orders_{period}"],
+            "revenue": round(orders[f"revenue_{period}"] or 0, 2),
+            "average_check": round(orders[f"average_{period}"] or 0, 2),
+        }
+        for period in ANALYTICS_PERIODS
+    }
+
+
+def get_analytics_snapshot():
+    """
+    Возвращает сводку аналитики из общего кэша, пересчитывая её не чаще раза в ANALYTICS_CACHE_TTL.
+    Сбрасывается при изменении заказов и регистрации пользователей (см. catalog.caching).
+    """
+    return get_or_build(ANALYTICS_NAMESPACE, ["snapshot"], build_analytics_snapshot, ANALYTICS_CACHE_TTL)
+
+
+def invalidate_analytics():
+    """
+    Сбрасывает кэш сводки.
+    """
+    invalidate(ANALYTICS_NAMESPACE)
@@ -0,0 +1,110 @@
+# catalog/caching.py
+"""
+caching.py
+
+Описание:
+Общий кэш сайта и бота и его сброс по сигналам моделей.
+
+Особенности:
+- Кэш настраивается в CACHES (по умолчанию файловый, общий для всех процессов на сервере,
+  либо Redis), поэтому изменение на сайте видно процессам бота и наоборот.
+- Кэшированные данные объединены в пространства имён («catalog», «analytics», «user:<telegram_id>»).
+  У каждого пространства есть версия; ключи строятся с её учётом, и сброс — это смена версии,
+  без поиска и удаления отдельных ключей.
+- Какие пространства сбрасывает изменение модели, описывают функции с декоратором @invalidates.
+"""
+
+import logging
+from collections import defaultdict
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+
+from users.models import CustomUser
+from .models import Order, Product, Review
+
+logger = logging.getLogger(__name__)
+
+_INVALIDATION_RULES = defaultdict(list)  # модель -> [функция(instance, created) -> имена пространств]
+
+
+def version_key(namespace):
+    return f"version:{namespace}"
+
+
+def get_version(namespace):
+    """
+    Текущая версия пространства имён. Если её нет в кэше (первое обращение, вытеснение) — создаёт новую.
+    """
+    version = cache.get(version_key(namespace))
+    if version is None:
+        cache.add(version_key(namespace), uuid4().hex, None)
+        version = cache.get(version_key(namespace))
+    return version
+
+
+def invalidate(*namespaces):
+    """
+    Сбрасывает все ключи пространств имён сменой их версий.
+    """
+    cache.set_many({version_key(namespace): uuid4().hex for namespace in namespaces}, None)
+    logger.debug(f"🧹 Кэш сброшен: {', '.join(namespaces)}")
+
+
+def versioned_key(namespace, *parts):
+    return ":".join([namespace, get_version(namespace), *map(str, parts)])
+
+
+def get_or_build(namespace, parts, builder, timeout):
+    """
+    Возвращает значение из кэша или вычисляет builder() и сохраняет его на timeout секунд.
+    """
+    key = versioned_key(namespace, *parts)
+    value = cache.get(key)
+    if value is None:
+        value = builder()
+        cache.set(key, value, timeout)
+    return value
+
+
+# ======= Сброс по сигналам моделей =======
+def _invalidate_for_instance(sender, instance, created=False, **kwargs):
+    namespaces = set()
+    for rule in _INVALIDATION_RULES[sender]:
+        namespaces.update(rule(instance, created))
+    if namespaces:
+        invalidate(*sorted(namespaces))
+
+
+def invalidates(*models):
+    """
+    Декоратор правила сброса: функция(instance, created) возвращает пространства имён,
+    которые устаревают при сохранении или удалении экземпляра одной из моделей.
+    """
+    def decorator(rule):
+        for model in models:
+            _INVALIDATION_RULES[model].append(rule)
+            post_save.connect(_invalidate_for_instance, sender=model, dispatch_uid=f"cache_invalidation:{model._meta.label}")
+            post_delete.connect(_invalidate_for_instance, sender=model, dispatch_uid=f"cache_invalidation:{model._meta.label}")
+        return rule
+    return decorator
+
+
+@invalidates(Product, Review)
+def catalog_caches(instance, created):
+    # Отзыв меняет рейтинг товара, который показывается в каталоге
+    return ["catalog"]
+
+
+@invalidates(Order)
+def order_caches(instance, created):
+    return ["analytics"]
+
+
+@invalidates(CustomUser)
+def user_caches(instance, created):
+    namespaces = ["analytics"] if created else []
+    if instance.telegram_id:
+        namespaces.append(f"user:{instance.telegram_id}")
+    return namespaces
@@ -0,0 +1,97 @@
+# catalog/management/commands/benchmark_checkout.py
+"""
+benchmark_checkout.py
+
+Описание:
+Нагрузочный замер оформления заказов (place_order) из нескольких потоков на текущей базе данных.
+Сравнение SQLite и PostgreSQL с пулом соединений:
+
+    DJANGO_DB_ENGINE=sqlite python manage.py benchmark_checkout --orders 500 --threads 8
+    DJANGO_DB_ENGINE=postgresql python manage.py benchmark_checkout --orders 500 --threads 8
+
+Особенности:
+- Каждый заказ оформляется как отдельный «запрос»: после него соединение освобождается
+  (close_old_connections), как в конце HTTP-запроса — поэтому замер учитывает стоимость соединений.
+- Тестовые пользователи, товары и заказы создаются с префиксом и удаляются после замера.
+  Запускайте на отдельной базе с остановленным notification_worker: заказы ставят события в очередь уведомлений.
+"""
+
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections, connection
+
+from catalog.models import Cart, CartItem, Order, Product
+from catalog.services import place_order
+from users.models import CustomUser
+
+BENCH_PREFIX = "bench_checkout_"
+
+
+class Command(BaseCommand):
+    help = "Замеряет пропускную способность оформления заказов на текущей базе данных"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=200, help="Сколько заказов оформить")
+        parser.add_argument("--threads", type=int, default=8, help="Сколько потоков оформляют заказы одновременно")
+        parser.add_argument("--items", type=int, default=3, help="Позиций в каждой корзине")
+
+    def handle(self, *args, **options):
+        self.cleanup()
+        users = self.prepare(options["orders"], options["items"])
+        close_old_connections()
+
+        try:
+            latencies, errors, elapsed = self.run(users, options["threads"])
+        finally:
+            self.cleanup()
+
+        done = len(latencies)
+        self.stdout.write(f"База данных: {connection.vendor} ({connection.settings_dict['NAME']})")
+        self.stdout.write(f"Потоков: {options['threads']}, заказов: {done} из {len(users)}, ошибок: {errors}")
+        if done:
+            latencies.sort()
+            self.stdout.write(self.style.SUCCESS(
+                f"Пропускная способность: {done / elapsed:.1f} заказов/с; "
+                f"задержка p50 {statistics.median(latencies) * 1000:.1f} мс, "
+                f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} мс"
+            ))
+
+    def prepare(self, orders, items):
+        products = Product.objects.bulk_create(
+            Product(name=f"{BENCH_PREFIX}{index}", price=100 + index) for index in range(items)
+        )
+        users = CustomUser.objects.bulk_create(
+            CustomUser(username=f"{BENCH_PREFIX}{index}", phone_number=f"+7999{index:07d}") for index in range(orders)
+        )
+        carts = Cart.objects.bulk_create(Cart(user=user) for user in users)
+        CartItem.objects.bulk_create(
+            CartItem(cart=cart, product=product, quantity=1, price=product.price) for cart in carts for product in products
+        )
+        return users
+
+    def run(self, users, threads):
+        def checkout(user):
+            started = time.perf_counter()
+            try:
+                place_order(user, "Benchmark address")
+                return time.perf_counter() - started
+            except DatabaseError:
+                return None
+            finally:
+                close_old_connections()  # Конец «запроса»: соединение закрывается или возвращается в пул
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            results = list(executor.map(checkout, users))
+        elapsed = time.perf_counter() - started
+
+        latencies = [result for result in results if result is not None]
+        return latencies, len(results) - len(latencies), elapsed
+
+    def cleanup(self):
+        Order.objects.filter(user__username__startswith=BENCH_PREFIX).delete()
+        CustomUser.objects.filter(username__startswith=BENCH_PREFIX).delete()
+        Product.objects.filter(name__startswith=BENCH_PREFIX).delete()
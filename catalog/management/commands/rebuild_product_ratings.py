@@ -0,0 +1,40 @@
+# catalog/management/commands/rebuild_product_ratings.py
+"""
+rebuild_product_ratings.py
+
+Описание:
+Пересчитывает сумму и количество оценок (rating_sum / rating_count) у всех товаров по таблице отзывов.
+Используется для первичного заполнения и для исправления агрегатов после ручных правок в базе.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce
+
+from catalog.models import Product
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает агрегаты рейтинга товаров по отзывам"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Размер пачки для bulk_update")
+
+    def handle(self, *args, **options):
+        products = Product.objects.annotate(
+            total=Coalesce(Sum("reviews__rating"), 0),
+            count=Count("reviews"),
+        ).only("id", "rating_sum", "rating_count")
+
+        changed = []
+        for product in products.iterator(chunk_size=options["batch_size"]):
+            if product.rating_sum != product.total or product.rating_count != product.count:
+                product.rating_sum = product.total
+                product.rating_count = product.count
+                changed.append(product)
+
+        with transaction.atomic():
+            Product.objects.bulk_update(changed, ["rating_sum", "rating_count"], batch_size=options["batch_size"])
+
+        self.stdout.write(self.style.SUCCESS(f"Пересчитан рейтинг у {len(changed)} товаров."))
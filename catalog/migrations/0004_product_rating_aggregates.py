@@ -0,0 +1,34 @@
+# Generated by Django 5.1.3 on 2026-10-18 13:11
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_ratings(apps, schema_editor):
+    Product = apps.get_model('catalog', 'Product')
+    products = list(Product.objects.annotate(total=Sum('reviews__rating'), count=Count('reviews')))
+    for product in products:
+        product.rating_sum = product.total or 0
+        product.rating_count = product.count
+    Product.objects.bulk_update(products, ['rating_sum', 'rating_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0003_alter_order_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Rating Count'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, verbose_name='Rating Sum'),
+        ),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.1.3 on 2026-10-18 13:22
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def merge_duplicate_cart_items(apps, schema_editor):
+    # Перед уникальным ограничением сливаем повторяющиеся строки корзины в одну
+    CartItem = apps.get_model('catalog', 'CartItem')
+    duplicates = (
+        CartItem.objects.values('cart_id', 'product_id')
+        .annotate(rows=Count('id'))
+        .filter(rows__gt=1)
+    )
+    for duplicate in duplicates:
+        items = list(
+            CartItem.objects.filter(cart_id=duplicate['cart_id'], product_id=duplicate['product_id'])
+            .select_related('product')
+            .order_by('id')
+        )
+        keep = items[0]
+        keep.quantity = sum(item.quantity for item in items)
+        keep.price = keep.product.price * keep.quantity
+        keep.save(update_fields=['quantity', 'price'])
+        CartItem.objects.filter(id__in=[item.id for item in items[1:]]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0004_product_rating_aggregates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'created_at'], name='order_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['executor', 'status'], name='order_executor_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', '-created_at'], name='order_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['created_at'], name='order_created_idx'),
+        ),
+        migrations.RunPython(merge_duplicate_cart_items, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(fields=('cart', 'product'), name='unique_cart_product'),
+        ),
+    ]
@@ -1,14 +1,13 @@
 # catalog/models.py
 
 from django.db import models
-from django.db import transaction
 from django.conf import settings
-from django.db.models import Avg
-import asyncio
-import importlib
+from django.db.models import Count, F, Sum
+from django.db.models.signals import post_delete, post_save, pre_save
 import logging
-from django.db.models.signals import post_save
 from django.dispatch import receiver
+from .signals import order_status_changed
+from .thumbnails import pregenerate_thumbnails
 
 logger = logging.getLogger(__name__)
 
@@ -20,10 +19,29 @@ class Product(models.Model):
     image = models.ImageField(upload_to='products/', blank=True, null=True, verbose_name="Image")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Updated At")
+    # Сумма и количество оценок, поддерживаются сигналами модели Review
+    rating_sum = models.PositiveIntegerField(default=0, verbose_name="Rating Sum")
+    rating_count = models.PositiveIntegerField(default=0, verbose_name="Rating Count")
 
     def get_average_rating(self):
-        average = self.reviews.aggregate(Avg('rating'))['rating__avg']
-        return round(average, 1) if average else 'Нет рейтинга'
+        if not self.rating_count:
+            return 'Нет рейтинга'
+        return round(self.rating_sum / self.rating_count, 1)
+
+    def rebuild_rating(self):
+        """
+        Пересчитывает сумму и количество оценок по отзывам товара.
+        """
+        totals = self.reviews.aggregate(total=Sum('rating'), count=Count('id'))
+        self.rating_sum = totals['total'] or 0
+        self.rating_count = totals['count']
+        Product.objects.filter(pk=self.pk).update(rating_sum=self.rating_sum, rating_count=self.rating_count)
+
+    class Meta:
+        indexes = [
+            # Каталог на сайте и в боте: постраничная выборка по (created_at, id)
+            models.Index(fields=["created_at", "id"], name="product_created_idx"),
+        ]
 
     def __str__(self):
         return self.name
@@ -64,6 +82,12 @@ class CartItem(models.Model):
     quantity = models.PositiveIntegerField(default=1, verbose_name="Quantity")
     price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Total Price")
 
+    class Meta:
+        constraints = [
+            # Одна строка на товар в корзине: повторное добавление увеличивает количество
+            models.UniqueConstraint(fields=["cart", "product"], name="unique_cart_product"),
+        ]
+
     def save(self, *args, **kwargs):
         self.price = self.product.price * self.quantity
         super().save(*args, **kwargs)
@@ -109,6 +133,16 @@ class Order(models.Model):
 
     class Meta:
         db_table = "catalog_order"  # Явно указываем имя таблицы для Order
+        indexes = [
+            # Новые заказы для уведомлений и фильтр по статусу в админ-зоне
+            models.Index(fields=["status", "created_at"], name="order_status_created_idx"),
+            # Заказы сотрудника в работе
+            models.Index(fields=["executor", "status"], name="order_executor_status_idx"),
+            # История заказов пользователя, самые новые первыми
+            models.Index(fields=["user", "-created_at"], name="order_user_created_idx"),
+            # Списки заказов и аналитика по периодам
+            models.Index(fields=["created_at"], name="order_created_idx"),
+        ]
 
     def __str__(self):
         return f"Order {self.id} by {self.user}"
@@ -162,29 +196,84 @@ class Review(models.Model):
     review_text = models.TextField(blank=True, null=True, verbose_name="Review Text")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
 
+    class Meta:
+        indexes = [
+            # Список отзывов в админ-зоне: постраничная выборка по (created_at, id)
+            models.Index(fields=["created_at", "id"], name="review_created_idx"),
+        ]
+
     def __str__(self):
         return f"Review by {self.user} on {self.product.name}"
 
 
-# Сигнал для уведомления о новом заказе
-@receiver(post_save, sender=OrderItem)
-def notify_order_items_saved(sender, instance, created, **kwargs):
+# Сигнал для подготовки миниатюр при загрузке изображения товара
+@receiver(post_save, sender=Product)
+def prepare_product_thumbnails(sender, instance, **kwargs):
+    """
+    Создаёт миниатюры для сайта и бота сразу после сохранения товара.
+    """
+    if not instance.image:
+        return
+    try:
+        pregenerate_thumbnails(instance.image.path)
+    except Exception as e:
+        logger.error(f"Ошибка при создании миниатюр товара #{instance.id}: {e}", exc_info=True)
+
+
+# Сигналы для поддержки агрегатов рейтинга товара
+def _shift_product_rating(product_id, rating_delta, count_delta):
+    Product.objects.filter(pk=product_id).update(
+        rating_sum=F('rating_sum') + rating_delta,
+        rating_count=F('rating_count') + count_delta,
+    )
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_rating(sender, instance, **kwargs):
+    """
+    Запоминает прежнюю оценку и товар при редактировании отзыва.
+    """
+    instance._previous = None
+    if instance.pk:
+        instance._previous = Review.objects.filter(pk=instance.pk).values_list('product_id', 'rating').first()
+
+
+@receiver(post_save, sender=Review)
+def add_review_to_rating(sender, instance, created, **kwargs):
+    """
+    Учитывает новый или изменённый отзыв в агрегатах рейтинга товара.
+    """
+    previous = getattr(instance, '_previous', None)
+    if not created and previous:
+        previous_product_id, previous_rating = previous
+        _shift_product_rating(previous_product_id, -previous_rating, -1)
+    _shift_product_rating(instance.product_id, int(instance.rating), 1)
+
+
+@receiver(post_delete, sender=Review)
+def remove_review_from_rating(sender, instance, **kwargs):
+    """
+    Убирает удалённый отзыв из агрегатов рейтинга товара.
+    """
+    _shift_product_rating(instance.product_id, -int(instance.rating), -1)
+
+
+# Сигналы для отслеживания смены статуса заказа
+@receiver(pre_save, sender=Order)
+def remember_previous_status(sender, instance, **kwargs):
+    """
+    Запоминает прежний статус заказа перед сохранением.
+    """
+    instance._previous_status = None
+    if instance.pk:
+        instance._previous_status = Order.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+
+
+@receiver(post_save, sender=Order)
+def send_order_status_changed(sender, instance, created, **kwargs):
     """
-    Сигнал для отправки уведомления о новом заказе после добавления всех позиций.
+    Сообщает подписчикам (очереди уведомлений) о смене статуса заказа.
     """
-    if created:
-        logger.info(f"Добавлена позиция {instance.product.name} в заказ #{instance.order.id}")
-
-        def send_notification():
-            order = instance.order
-            total_items_price = sum(item.price for item in order.items.all())
-            if total_items_price == order.total_price:  # Проверка суммы позиций заказа
-                logger.info(f"Все позиции добавлены в заказ #{order.id}. Отправляем уведомление.")
-                try:
-                    bot_logic = importlib.import_module('bot.bot_logic')
-                    send_new_order_notification = getattr(bot_logic, 'send_new_order_notification')
-                    send_new_order_notification(order)
-                except Exception as e:
-                    logger.error(f"Ошибка при отправке уведомления: {e}", exc_info=True)
-
-        transaction.on_commit(send_notification)
+    previous = getattr(instance, '_previous_status', None)
+    if not created and previous and previous != instance.status:
+        order_status_changed.send(sender=Order, order=instance, old_status=previous, new_status=instance.status)
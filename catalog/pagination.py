@@ -0,0 +1,89 @@
+# catalog/pagination.py
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from django.db.models import Q
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+@dataclass
+class KeysetPage:
+    """
+    Страница выборки с курсорами на соседние страницы (None, если страницы нет).
+    """
+    items: list
+    next_cursor: str = None
+    prev_cursor: str = None
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.prev_cursor is not None
+
+
+def encode_cursor(obj, field="created_at"):
+    """
+    Курсор вида «<микросекунды от эпохи>.<id>». Не содержит «:», поэтому годится и для callback_data.
+    """
+    return f"{(getattr(obj, field) - EPOCH) // timedelta(microseconds=1)}.{obj.pk}"
+
+
+def decode_cursor(cursor):
+    """
+    Разбирает курсор обратно в (datetime, id). Бросает ValueError, если курсор испорчен.
+    """
+    micros, pk = cursor.split(".")
+    return EPOCH + timedelta(microseconds=int(micros)), int(pk)
+
+
+def cursor_condition(cursor, field="created_at", lookup="gt"):
+    """
+    Условие «строго после курсора» для ключа (field, id).
+    Нестрогая граница по field дублирует OR-условие, чтобы БД начала чтение индекса (field, id)
+    прямо с курсора, а не просматривала его с начала.
+    """
+    value, pk = decode_cursor(cursor)
+    return Q(**{f"{field}__{lookup}e": value}) & (
+        Q(**{f"{field}__{lookup}": value}) | Q(**{field: value, f"pk__{lookup}": pk})
+    )
+
+
+def keyset_paginate(queryset, page_size, after=None, before=None, field="created_at", descending=False):
+    """
+    Постраничная выборка по ключу (field, id) без OFFSET: каждая страница — один запрос
+    с условием «строго после/до курсора», поэтому её стоимость не зависит от номера страницы.
+
+    :param after: Курсор последнего элемента предыдущей страницы (листаем вперёд).
+    :param before: Курсор первого элемента следующей страницы (листаем назад).
+    :param descending: Порядок по убыванию (например, самые новые заказы первыми).
+    """
+    forward = before is None
+    cursor = after if forward else before
+
+    # Направление сравнения с курсором зависит от порядка сортировки и направления листания
+    go_up = forward != descending
+    order = (field, "pk") if go_up else (f"-{field}", "-pk")
+
+    if cursor:
+        queryset = queryset.filter(cursor_condition(cursor, field, "gt" if go_up else "lt"))
+
+    rows = list(queryset.order_by(*order)[:page_size + 1])
+    has_more = len(rows) > page_size
+    items = rows[:page_size]
+
+    if forward:
+        has_next, has_prev = has_more, bool(after)
+    else:
+        items.reverse()
+        has_next, has_prev = True, has_more
+
+    return KeysetPage(
+        items=items,
+        next_cursor=encode_cursor(items[-1], field) if has_next and items else None,
+        prev_cursor=encode_cursor(items[0], field) if has_prev and items else None,
+    )
@@ -0,0 +1,230 @@
+# catalog/services.py
+
+import logging
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import F, OuterRef, Prefetch, Subquery
+from .caching import get_or_build
+from .models import Cart, CartItem, Order, OrderItem, Product
+from .pagination import decode_cursor, keyset_paginate
+from .signals import order_placed, order_status_changed
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Сколько секунд страница каталога живёт в общем кэше (сбрасывается и раньше — при изменении товаров)
+CATALOG_CACHE_TTL = 300
+
+
+class EmptyCartError(Exception):
+    """
+    Корзина пользователя пуста или не существует.
+    """
+
+
+def get_cart(user):
+    """
+    Корзина пользователя (создаётся при первом обращении).
+    """
+    cart, _ = Cart.objects.get_or_create(user=user)
+    return cart
+
+
+def _line_price(quantity_delta):
+    # Сумма строки по текущей цене товара — в самом UPDATE, без чтения товара
+    product_price = Subquery(Product.objects.filter(pk=OuterRef('product_id')).values('price')[:1])
+    return (F('quantity') + quantity_delta) * product_price
+
+
+def _lock_cart(cart):
+    # Блокировка строки корзины до конца транзакции (в PostgreSQL). Новые строки корзины создаются
+    # только под ней: иначе параллельная транзакция не видит ещё не закоммиченную строку того же товара,
+    # и запись одной из них перезаписывает количество, добавленное другой
+    list(Cart.objects.select_for_update().filter(pk=cart.pk).values_list('pk', flat=True))
+
+
+def add_product_to_cart(cart, product, quantity=1, max_quantity=None):
+    """
+    Добавляет quantity штук товара в корзину атомарным UPDATE quantity = quantity + N
+    (или создаёт строку). Одновременные добавления не теряются.
+    Возвращает False, если с добавлением было бы больше max_quantity штук.
+    """
+    lines = CartItem.objects.filter(cart=cart, product=product)
+    if max_quantity is not None:
+        lines = lines.filter(quantity__lte=max_quantity - quantity)
+
+    increment = {'quantity': F('quantity') + quantity, 'price': (F('quantity') + quantity) * product.price}
+    if lines.update(**increment):
+        return True
+    if max_quantity is not None and quantity > max_quantity:
+        return False
+
+    with transaction.atomic():
+        _lock_cart(cart)
+        _, created = CartItem.objects.get_or_create(
+            cart=cart, product=product, defaults={'quantity': quantity, 'price': product.price * quantity}
+        )
+    # Строка уже была (на пределе max_quantity) или её только что создал параллельный запрос
+    return created or bool(lines.update(**increment))
+
+
+def change_cart_quantity(user, product_id, delta, min_quantity=1, max_quantity=None):
+    """
+    Изменяет количество товара в корзине пользователя на delta одним UPDATE с F().
+    Количество не выходит за [min_quantity, max_quantity].
+    Возвращает (изменено ли, количество после операции); количество None — товара нет в корзине.
+    """
+    lines = CartItem.objects.filter(cart__user=user, product_id=product_id)
+    bounded = lines.filter(quantity__gte=min_quantity - delta)
+    if max_quantity is not None:
+        bounded = bounded.filter(quantity__lte=max_quantity - delta)
+
+    updated = bounded.update(quantity=F('quantity') + delta, price=_line_price(delta))
+    return bool(updated), lines.values_list('quantity', flat=True).first()
+
+
+def add_items_to_cart(cart, items):
+    """
+    Добавляет в корзину много строк сразу: items — пары (товар, количество).
+    Существующие строки увеличиваются, новые создаются — одним
+    bulk_create(update_conflicts=True) по уникальной паре (cart, product),
+    поэтому число запросов не зависит от числа строк.
+    """
+    quantities = defaultdict(int)
+    products = {}
+    for product, quantity in items:
+        quantities[product.id] += quantity
+        products[product.id] = product
+    if not quantities:
+        return []
+
+    with transaction.atomic():
+        # Сначала корзина (новых строк ещё нет, блокировать нечего), затем её существующие строки
+        _lock_cart(cart)
+        existing = dict(
+            CartItem.objects.select_for_update()
+            .filter(cart=cart, product_id__in=quantities)
+            .values_list('product_id', 'quantity')
+        )
+
+        lines = []
+        for product_id, quantity in quantities.items():
+            quantity += existing.get(product_id, 0)
+            lines.append(CartItem(cart=cart, product=products[product_id], quantity=quantity,
+                                  price=products[product_id].price * quantity))
+
+        return CartItem.objects.bulk_create(
+            lines,
+            update_conflicts=True,
+            unique_fields=['cart', 'product'],
+            update_fields=['quantity', 'price'],
+        )
+
+
+def copy_order_to_cart(order, user):
+    """
+    Переносит все товары заказа в корзину пользователя (по текущим ценам).
+    Общая точка для веб-приложения и бота: постоянное число запросов при любом размере заказа.
+    """
+    cart = get_cart(user)
+    items = order.items.select_related('product')
+    return add_items_to_cart(cart, [(item.product, item.quantity) for item in items])
+
+
+def place_order(user, address, notes=None):
+    """
+    Оформляет заказ из корзины пользователя. Общая точка для веб-приложения и бота.
+
+    Корзина блокируется на время транзакции, цены считаются один раз по товарам,
+    загруженным вместе с позициями, позиции заказа создаются одним bulk_create,
+    а сигнал order_placed отправляется ровно один раз.
+    """
+    with transaction.atomic():
+        cart = Cart.objects.select_for_update().filter(user=user).first()
+        if cart is None:
+            raise EmptyCartError()
+
+        cart_items = list(cart.items.select_related('product'))
+        if not cart_items:
+            raise EmptyCartError()
+
+        order_items = [
+            OrderItem(
+                product=item.product,
+                quantity=item.quantity,
+                price=item.product.price * item.quantity,
+            )
+            for item in cart_items
+        ]
+
+        order = Order.objects.create(
+            user=user,
+            total_price=sum(item.price for item in order_items),
+            notes=notes,
+            address=address,
+        )
+        for item in order_items:
+            item.order = order
+        OrderItem.objects.bulk_create(order_items)
+
+        # Очищаем корзину после оформления заказа
+        cart.items.all().delete()
+
+        order_placed.send(sender=Order, order=order)
+
+    logger.info(f"✅ Заказ #{order.id} оформлен: {len(order_items)} позиций на {order.total_price} ₽.")
+    return order
+
+
+def order_summaries(queryset=None):
+    """
+    Заказы вместе с покупателем, исполнителем, позициями и товарами позиций.
+    Общая выборка для истории заказов на сайте, в админ-зоне и в боте:
+    два запроса на любое число заказов вместо 1 + N.
+    """
+    if queryset is None:
+        queryset = Order.objects.all()
+
+    return queryset.select_related('user', 'executor').prefetch_related(
+        Prefetch('items', queryset=OrderItem.objects.select_related('product').order_by('id'))
+    )
+
+
+def claim_order(order_id, executor_id):
+    """
+    Атомарно назначает исполнителя на новый заказ.
+
+    Один условный UPDATE ... WHERE executor_id IS NULL AND status = 'created':
+    из нескольких одновременных попыток (в том числе из разных процессов бота)
+    строку изменит ровно одна. Возвращает True, если заказ достался executor_id.
+    """
+    claimed = Order.objects.filter(id=order_id, executor__isnull=True, status='created').update(
+        executor_id=executor_id,
+        status='processing',
+    )
+    if claimed:
+        logger.info(f"✅ Заказ #{order_id} назначен исполнителю {executor_id}.")
+        # update() не вызывает сигналы модели — сообщаем о смене статуса сами, без повторного чтения заказа
+        order_status_changed.send(
+            sender=Order,
+            order=Order(pk=order_id, executor_id=executor_id, status='processing'),
+            old_status='created',
+            new_status='processing',
+        )
+    return bool(claimed)
+
+
+def catalog_page(page_size, after=None, before=None):
+    """
+    Страница каталога (keyset_paginate по товарам) из общего кэша сайта и бота.
+    Бросает ValueError, если курсор испорчен.
+    """
+    for cursor in (after, before):
+        if cursor:
+            decode_cursor(cursor)  # Проверяем до обращения к кэшу: в ключ попадают только корректные курсоры
+
+    return get_or_build(
+        "catalog",
+        ["page", page_size, after or "", before or ""],
+        lambda: keyset_paginate(Product.objects.all(), page_size, after=after, before=before),
+        CATALOG_CACHE_TTL,
+    )
@@ -0,0 +1,11 @@
+# catalog/signals.py
+
+from django.dispatch import Signal
+
+# Отправляется один раз после того, как заказ и все его позиции сохранены.
+# Аргументы: sender=Order, order=<Order>
+order_placed = Signal()
+
+# Отправляется после смены статуса заказа (сохранение модели или claim_order).
+# Аргументы: sender=Order, order=<Order>, old_status=<str>, new_status=<str>
+order_status_changed = Signal()
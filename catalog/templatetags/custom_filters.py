@@ -1,4 +1,5 @@
 from django import template
+from catalog.thumbnails import get_thumbnail_url
 
 register = template.Library()
 
@@ -11,3 +12,15 @@ def multiply(value, arg):
         return float(value) * float(arg)
     except (ValueError, TypeError):
         return ''
+
+
+@register.filter
+def thumbnail(image, size):
+    """
+    URL миниатюры изображения заданного размера ("card", "bot").
+    Если миниатюру сделать не удалось, возвращает URL оригинала.
+    """
+    try:
+        return get_thumbnail_url(image.path, size)
+    except Exception:
+        return image.url
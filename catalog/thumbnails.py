@@ -0,0 +1,81 @@
+# catalog/thumbnails.py
+
+import hashlib
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# 🔹 Размеры миниатюр: для карточек сайта и для фото в боте
+THUMBNAIL_SIZES = {
+    "card": (400, 400),
+    "bot": (512, 512),
+}
+
+THUMBNAIL_DIR = "thumbnails"
+
+
+def thumbnail_key(image_path, size):
+    """
+    Ключ миниатюры: путь к оригиналу, время его изменения и размер.
+    Замена файла меняет mtime, а значит и ключ — старая миниатюра просто перестаёт использоваться.
+    """
+    mtime = os.stat(image_path).st_mtime_ns
+    raw = f"{os.path.abspath(image_path)}:{mtime}:{size[0]}x{size[1]}"
+    return hashlib.sha1(raw.encode()).hexdigest()[:20]
+
+
+def _thumbnail_path(key):
+    return Path(settings.MEDIA_ROOT) / THUMBNAIL_DIR / f"{key}.jpg"
+
+
+def get_thumbnail(image_path, size):
+    """
+    Возвращает путь к миниатюре изображения, создавая её при первом обращении.
+    """
+    if isinstance(size, str):
+        size = THUMBNAIL_SIZES[size]
+
+    path = _thumbnail_path(thumbnail_key(image_path, size))
+    if path.exists():
+        return str(path)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Уникальный временный файл на каждого писателя: потоки одного процесса могут создавать
+    # одну и ту же миниатюру одновременно
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as tmp_file, Image.open(image_path) as img:
+            img.thumbnail(size)
+            img.convert("RGB").save(tmp_file, "JPEG", quality=85)
+        os.replace(tmp_path, path)  # Атомарно: параллельный читатель не увидит недописанный файл
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        if not path.exists():
+            raise
+        return str(path)  # Ту же миниатюру уже опубликовал параллельный писатель
+
+    logger.info(f"🖼 Создана миниатюра {size[0]}x{size[1]} для {image_path}")
+    return str(path)
+
+
+def get_thumbnail_url(image_path, size):
+    """
+    URL миниатюры для шаблонов.
+    """
+    path = Path(get_thumbnail(image_path, size))
+    return f"{settings.MEDIA_URL}{THUMBNAIL_DIR}/{path.name}"
+
+
+def pregenerate_thumbnails(image_path):
+    """
+    Создаёт миниатюры всех размеров (вызывается при сохранении товара).
+    """
+    for size in THUMBNAIL_SIZES.values():
+        get_thumbnail(image_path, size)
@@ -1,16 +1,26 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from .models import Product, Cart, CartItem, Order, OrderItem, Review
+from .models import Product, Cart, CartItem, Order, Review
 from .forms import OrderForm, ReviewForm  # Импортируем формы
+from .services import (
+    place_order, order_summaries, catalog_page, EmptyCartError, get_cart, add_product_to_cart, copy_order_to_cart,
+)
 from django.contrib import messages
 from django.core.paginator import Paginator  # Импортируем для пагинации
 from django.contrib.auth.decorators import user_passes_test  # Для проверки прав
 
+CATALOG_PAGE_SIZE = 12  # Товаров на странице каталога
+
+
 def catalog_home(request):
     """
-    Главная страница каталога с отображением всех товаров.
+    Главная страница каталога с постраничным выводом товаров (курсоры after/before).
     """
-    products = Product.objects.all()  # Получаем все товары из базы данных
-    return render(request, 'catalog/home.html', {'products': products})
+    try:
+        page = catalog_page(CATALOG_PAGE_SIZE, after=request.GET.get('after'), before=request.GET.get('before'))
+    except ValueError:
+        return redirect('catalog:home')  # Испорченный курсор — показываем первую страницу
+
+    return render(request, 'catalog/home.html', {'products': page.items, 'page': page})
 
 def product_detail(request, product_id):
     """
@@ -69,18 +79,12 @@ def add_to_cart(request, product_id):
     Добавление товара в корзину.
     """
     product = get_object_or_404(Product, id=product_id)
-    cart, _ = Cart.objects.get_or_create(user=request.user)  # Получаем или создаём корзину пользователя
 
     # Получаем количество из формы (по умолчанию 1)
     quantity = int(request.POST.get('quantity', 1))
 
-    # Проверяем, есть ли товар в корзине
-    cart_item, created = CartItem.objects.get_or_create(cart=cart, product=product)
-    if not created:
-        cart_item.quantity += quantity  # Если товар уже в корзине, увеличиваем количество
-    else:
-        cart_item.quantity = quantity  # Устанавливаем новое количество для нового товара
-    cart_item.save()
+    # Атомарно увеличиваем количество или добавляем новую строку
+    add_product_to_cart(get_cart(request.user), product, quantity)
 
     return redirect('catalog:cart')  # Перенаправляем на страницу корзины
 
@@ -127,25 +131,16 @@ def checkout(request):
                 request.user.address = new_address
                 request.user.save()
 
-            # Создание нового заказа
-            order = Order.objects.create(
-                user=request.user,
-                total_price=cart.get_total_price(),
-                notes=form.cleaned_data.get('comments'),
-                address=new_address,  # Сохранение адреса в заказе
-            )
-
-            # Перенос элементов из корзины в заказ
-            for item in cart_items:
-                OrderItem.objects.create(
-                    order=order,
-                    product=item.product,
-                    quantity=item.quantity,
-                    price=item.price
+            # Создание заказа из корзины (корзина очищается внутри сервиса)
+            try:
+                place_order(
+                    request.user,
+                    address=new_address,  # Сохранение адреса в заказе
+                    notes=form.cleaned_data.get('comments'),
                 )
-
-            # Очищаем корзину после оформления заказа
-            cart.items.all().delete()
+            except EmptyCartError:
+                messages.error(request, "Ваша корзина пуста. Добавьте товары перед оформлением заказа.")
+                return redirect('catalog:cart')
 
             messages.success(request, "Ваш заказ успешно оформлен!")
             return redirect('catalog:home')
@@ -173,7 +168,7 @@ def order_history(request):
     """
     Отображение истории заказов пользователя.
     """
-    orders = Order.objects.filter(user=request.user).order_by('-created_at')  # Получаем заказы текущего пользователя
+    orders = order_summaries(Order.objects.filter(user=request.user).order_by('-created_at'))  # Заказы текущего пользователя с позициями
     return render(request, 'catalog/order_history.html', {'orders': orders})
 
 def repeat_order(request, order_id):
@@ -181,15 +176,7 @@ def repeat_order(request, order_id):
     Повторение заказа. Перенос всех товаров из указанного заказа в корзину.
     """
     order = get_object_or_404(Order, id=order_id, user=request.user)  # Убедимся, что заказ принадлежит пользователю
-    cart, _ = Cart.objects.get_or_create(user=request.user)  # Получаем или создаём корзину пользователя
-
-    for item in order.items.all():
-        cart_item, created = CartItem.objects.get_or_create(cart=cart, product=item.product)
-        if not created:
-            cart_item.quantity += item.quantity  # Если товар уже есть в корзине, увеличиваем количество
-        else:
-            cart_item.quantity = item.quantity  # Иначе добавляем как новый
-        cart_item.save()
+    copy_order_to_cart(order, request.user)  # Все строки заказа — одним bulk upsert
 
     messages.success(request, "Товары из заказа добавлены в вашу корзину.")
     return redirect('catalog:cart')
@@ -80,12 +80,89 @@ WSGI_APPLICATION = 'flowerdelivery.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DJANGO_DB_ENGINE: sqlite (по умолчанию, разработка) или postgresql (продакшен)
+DB_ENGINE = os.getenv("DJANGO_DB_ENGINE", "sqlite")
+
+# 🔹 Соединений в пуле PostgreSQL на один процесс. Каждое соединение принадлежит потоку, поэтому
+# размер пула — число потоков процесса, одновременно обращающихся к базе:
+# - сайт (WSGI) — потоки воркера, например gunicorn --threads; под ASGI Django выполняет синхронный код
+#   каждого запроса в отдельном потоке, то есть соединений нужно столько, сколько запросов обслуживается сразу;
+# - бот — sync_to_async по умолчанию (thread_sensitive=True) выполняет все обращения к базе в одном общем
+#   потоке asgiref, этот параметр число таких потоков не меняет, боту хватает пары соединений.
+DB_POOL_MAX_SIZE = int(os.getenv("DJANGO_DB_POOL_MAX_SIZE", 8))
+
+if DB_ENGINE == "postgresql":
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv("POSTGRES_DB", "flowerdelivery"),
+            'USER': os.getenv("POSTGRES_USER", "flowerdelivery"),
+            'PASSWORD': os.getenv("POSTGRES_PASSWORD", ""),
+            'HOST': os.getenv("POSTGRES_HOST", "127.0.0.1"),
+            'PORT': os.getenv("POSTGRES_PORT", "5432"),
+            # Проверка соединения перед повторным использованием (после обрыва или рестарта сервера)
+            'CONN_HEALTH_CHECKS': True,
+        }
+    }
+
+    if os.getenv("DJANGO_DB_POOL", "True") == "True":
+        # Пул соединений psycopg 3 (pip install "psycopg[binary,pool]"). С пулом CONN_MAX_AGE должен быть 0:
+        # соединение возвращается в пул в конце запроса/обновления бота, а не закрывается
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS'] = {
+            'pool': {
+                'min_size': int(os.getenv("DJANGO_DB_POOL_MIN_SIZE", 2)),
+                'max_size': DB_POOL_MAX_SIZE,
+                'timeout': float(os.getenv("DJANGO_DB_POOL_TIMEOUT", 10)),  # Ожидание свободного соединения
+            },
+        }
+    else:
+        # Постоянные соединения без пула (например, за внешним pgbouncer)
+        DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv("DJANGO_CONN_MAX_AGE", 600))
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'CONN_MAX_AGE': int(os.getenv("DJANGO_CONN_MAX_AGE", 0)),
+            'OPTIONS': {
+                # WAL: чтение не ждёт записи; запись сайта и бота ждёт блокировку до timeout секунд,
+                # а не падает сразу с «database is locked»
+                'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': 20,
+            },
+        }
+    }
+
+
+# Общий кэш сайта и процессов бота
+# DJANGO_CACHE_BACKEND: file (по умолчанию, общий для процессов на одном сервере), redis или locmem
+CACHE_BACKEND = os.getenv("DJANGO_CACHE_BACKEND", "file")
+
+if CACHE_BACKEND == "redis":
+    # Требует пакет redis (pip install redis); подходит любой Redis-совместимый сервер
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv("DJANGO_CACHE_URL", "redis://127.0.0.1:6379/1"),
+            'KEY_PREFIX': 'flowerdelivery',
+        }
+    }
+elif CACHE_BACKEND == "locmem":
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv("DJANGO_CACHE_LOCATION", str(BASE_DIR / '.django_cache')),
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
     }
-}
 
 
 # Password validation
@@ -14,3 +14,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'flowerdelivery.settings')
 
 application = get_asgi_application()
+
+# В режиме webhook обновления Telegram принимаются этим же ASGI-приложением
+from bot.webhook import TelegramWebhookApp, is_webhook_mode  # noqa: E402  (после настройки Django)
+
+if is_webhook_mode():
+    application = TelegramWebhookApp(application)
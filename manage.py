@@ -106,6 +106,15 @@ def main():
             run_server()
             return
 
+        # runserver обслуживает только WSGI: webhook-маршрут ASGI-приложения (flowerdelivery/asgi.py)
+        # он не загружает, и обновления Telegram никто бы не принимал
+        if os.getenv("TELEGRAM_BOT_MODE", "polling") == "webhook":
+            logging.error(
+                "TELEGRAM_BOT_MODE=webhook требует ASGI-сервер: uvicorn flowerdelivery.asgi:application. "
+                "Для runserver используйте TELEGRAM_BOT_MODE=polling."
+            )
+            sys.exit(1)
+
         # Запускаем сервер в отдельном процессе
         server_process = Process(target=run_server)
         server_process.start()
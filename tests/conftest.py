@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+
+import pytest
+from telegram.error import NetworkError, RetryAfter
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(settings):
+    # Каждый тест получает собственный пустой кэш вместо общего файлового
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "tests"},
+    }
+    from django.core.cache import cache
+    cache.clear()
+    yield
+    cache.clear()
+
+
+class FakeBot:
+    """
+    Bot API для тестов рассылок: запоминает отправленные и отредактированные сообщения.
+    failing — чаты, отправка в которые падает с NetworkError; retry_after — один RetryAfter на следующую отправку.
+    """
+
+    def __init__(self):
+        self.sent = []
+        self.edited = []
+        self.failing = set()
+        self.retry_after = None
+
+    async def send_message(self, chat_id, text, **kwargs):
+        if self.retry_after is not None:
+            retry_after, self.retry_after = self.retry_after, None
+            raise RetryAfter(retry_after)
+        if chat_id in self.failing:
+            raise NetworkError("Telegram недоступен")
+        self.sent.append((chat_id, text, kwargs))
+        return SimpleNamespace(message_id=len(self.sent))
+
+    async def edit_message_text(self, chat_id, message_id, text, **kwargs):
+        self.edited.append((chat_id, message_id, text))
+
+    async def edit_message_reply_markup(self, chat_id, message_id, reply_markup=None, **kwargs):
+        self.edited.append((chat_id, message_id, reply_markup))
+
+
+@pytest.fixture
+def fake_bot(monkeypatch):
+    """
+    FakeBot вместо общего клиента Telegram у воркера уведомлений и рассылки правок сотрудникам.
+    """
+    from bot.notification import notification_worker, staff_messages
+    from bot.utils.fanout import FanoutDispatcher
+
+    bot = FakeBot()
+    for module in (notification_worker, staff_messages):
+        monkeypatch.setattr(module, "get_dispatcher", lambda: FanoutDispatcher(bot, global_rate=1000))
+    return bot
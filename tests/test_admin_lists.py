@@ -0,0 +1,99 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.test import Client
+from django.urls import reverse
+
+from admin_zone.views import ADMIN_PAGE_SIZE
+from catalog.models import Order
+
+User = get_user_model()
+
+
+@pytest.fixture
+def client_and_users():
+    admin = User.objects.create_user(
+        username="admin", password="password123", phone_number="+70000000006", is_staff=True
+    )
+    buyer = User.objects.create_user(username="buyer", password="password123", phone_number="+79991234567")
+    client = Client()
+    client.force_login(admin)
+    return client, admin, buyer
+
+
+@pytest.mark.django_db
+def test_manage_orders_is_paginated_with_cursors(client_and_users):
+    client, admin, buyer = client_and_users
+    Order.objects.bulk_create(
+        Order(user=buyer, total_price=100, address="A", status="processing") for _ in range(ADMIN_PAGE_SIZE + 5)
+    )
+    Order.objects.create(user=buyer, total_price=100, address="B", status="created")
+
+    first = client.get(reverse("admin_zone:orders"), {"status": "processing"})
+    page = first.context["page"]
+    assert len(first.context["orders"]) == ADMIN_PAGE_SIZE
+    assert all(order.status == "processing" for order in first.context["orders"])
+    assert "status=processing" in first.context["filter_query"]
+    assert first.context["total_orders"] == ADMIN_PAGE_SIZE + 5
+    assert client.get(reverse("admin_zone:orders")).context["total_orders"] == ADMIN_PAGE_SIZE + 6
+
+    second = client.get(reverse("admin_zone:orders"), {"status": "processing", "after": page.next_cursor})
+    assert len(second.context["orders"]) == 5
+    assert not second.context["page"].has_next
+    assert second.context["page"].has_previous
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("query", ["buyer", "+7999", "79991234567"])
+def test_manage_orders_search_by_user(client_and_users, query):
+    client, admin, buyer = client_and_users
+    Order.objects.create(user=buyer, total_price=100, address="A")
+    Order.objects.create(user=admin, total_price=100, address="B")
+
+    response = client.get(reverse("admin_zone:orders"), {"q": query})
+
+    assert [order.user_id for order in response.context["orders"]] == [buyer.id]
+
+
+@pytest.mark.django_db
+def test_manage_orders_search_by_id(client_and_users):
+    client, admin, buyer = client_and_users
+    orders = [Order.objects.create(user=buyer, total_price=100, address="A") for _ in range(3)]
+
+    response = client.get(reverse("admin_zone:orders"), {"q": f"#{orders[1].id}"})
+
+    assert [order.id for order in response.context["orders"]] == [orders[1].id]
+
+
+@pytest.mark.django_db
+def test_admin_home_lists_one_page_of_users(client_and_users):
+    client, admin, buyer = client_and_users
+    User.objects.bulk_create(
+        User(username=f"user{index}", phone_number=f"+7100000{index:04d}") for index in range(ADMIN_PAGE_SIZE)
+    )
+
+    response = client.get(reverse("admin_zone:home"))
+
+    assert len(response.context["users"]) == ADMIN_PAGE_SIZE
+    assert response.context["page"].has_next
+    assert response.context["total_users"] == ADMIN_PAGE_SIZE + 2
+
+
+@pytest.mark.django_db
+def test_broken_cursor_redirects_to_first_page(client_and_users):
+    client, admin, buyer = client_and_users
+
+    response = client.get(reverse("admin_zone:reviews"), {"after": "broken"})
+
+    assert response.status_code == 302
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("digits", [20, 5000])
+def test_manage_orders_search_with_huge_number_does_not_fail(client_and_users, digits):
+    client, admin, buyer = client_and_users
+    Order.objects.create(user=buyer, total_price=100, address="A")
+
+    response = client.get(reverse("admin_zone:orders"), {"q": "9" * digits})
+
+    assert response.status_code == 200
+    assert list(response.context["orders"]) == []
@@ -0,0 +1,77 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from catalog.analytics import build_analytics_snapshot, get_analytics_snapshot
+from catalog.models import Order
+
+User = get_user_model()
+
+
+@pytest.fixture
+def customer():
+    cache.clear()
+    return User.objects.create_user(username="buyer", password="password123", phone_number="+70000000004")
+
+
+@pytest.mark.django_db
+def test_snapshot_aggregates_all_periods_in_two_queries(customer):
+    Order.objects.create(user=customer, total_price=100, address="A")
+    old = Order.objects.create(user=customer, total_price=300, address="B")
+    Order.objects.filter(pk=old.pk).update(created_at=timezone.now().replace(year=2000))
+
+    with CaptureQueriesContext(connection) as queries:
+        snapshot = build_analytics_snapshot()
+
+    assert len(queries) == 2
+    assert snapshot["today"]["orders"] == 1
+    assert snapshot["today"]["revenue"] == Decimal("100.00")
+    assert snapshot["all"]["orders"] == 2
+    assert snapshot["all"]["revenue"] == Decimal("400.00")
+    assert snapshot["all"]["average_check"] == Decimal("200.00")
+    assert snapshot["all"]["users"] == 1
+
+
+@pytest.mark.django_db
+def test_snapshot_is_cached_and_invalidated_on_order_write(customer):
+    assert get_analytics_snapshot()["all"]["orders"] == 0
+
+    with CaptureQueriesContext(connection) as queries:
+        get_analytics_snapshot()
+    assert len(queries) == 0
+
+    Order.objects.create(user=customer, total_price=50, address="C")
+    assert get_analytics_snapshot()["all"]["orders"] == 1
+
+
+@pytest.mark.django_db
+def test_view_analytics_renders_snapshot(customer):
+    Order.objects.create(user=customer, total_price=250, address="D")
+
+    response = Client().get(reverse("admin_zone:analytics"))
+
+    assert response.status_code == 200
+    assert response.context["orders_today"] == 1
+    assert response.context["total_revenue"] == Decimal("250.00")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_bot_analytics_text_uses_shared_snapshot(customer):
+    import asyncio
+    from bot.handlers.admin import get_analytics_text
+
+    Order.objects.create(user=customer, total_price=120, address="E")
+    Order.objects.create(user=customer, total_price=80, address="F")
+
+    text = asyncio.run(get_analytics_text("Всё время", "all"))
+
+    assert "Всего заказов: **2**" in text
+    assert "Общий доход: **200.00 ₽**" in text
+    assert "Средний чек: **100.00 ₽**" in text
@@ -0,0 +1,21 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from catalog.models import Order, Product
+from users.models import CustomUser
+
+
+@pytest.mark.django_db(transaction=True)
+def test_benchmark_checkout_places_orders_and_cleans_up():
+    output = StringIO()
+
+    # Тестовая SQLite в памяти с общим кэшем не допускает параллельной записи — один поток
+    call_command("benchmark_checkout", orders=6, threads=1, items=2, stdout=output)
+
+    assert "заказов: 6 из 6, ошибок: 0" in output.getvalue()
+    assert "заказов/с" in output.getvalue()
+    assert not Order.objects.exists()
+    assert not CustomUser.objects.exists()
+    assert not Product.objects.exists()
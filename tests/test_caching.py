@@ -0,0 +1,72 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache.backends.filebased import FileBasedCache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from bot.utils import user_cache
+from catalog.caching import get_version, invalidate
+from catalog.models import Product, Review
+from catalog.services import catalog_page
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+def test_catalog_page_is_cached_until_products_or_reviews_change():
+    product = Product.objects.create(name="Розы", price=100)
+    catalog_page(12)
+
+    with CaptureQueriesContext(connection) as queries:
+        assert [item.id for item in catalog_page(12).items] == [product.id]
+    assert len(queries) == 0
+
+    customer = User.objects.create_user(username="critic", password="password123", phone_number="+70000000030")
+    Review.objects.create(user=customer, product=product, rating=4)
+    assert catalog_page(12).items[0].rating_count == 1
+
+    product.name = "Пионы"
+    product.save()
+    assert catalog_page(12).items[0].name == "Пионы"
+
+
+@pytest.mark.django_db
+def test_catalog_page_rejects_broken_cursor():
+    with pytest.raises(ValueError):
+        catalog_page(12, after="not a cursor")
+
+
+@pytest.mark.django_db
+def test_user_saved_elsewhere_is_reloaded_by_bot(monkeypatch):
+    user_cache.USER_CACHE.clear()
+    fetches = []
+    original = user_cache.fetch_user
+    monkeypatch.setattr(user_cache, "fetch_user", lambda telegram_id: fetches.append(telegram_id) or original(telegram_id))
+
+    user = User.objects.create_user(username="courier", password="password123", phone_number="+70000000031",
+                                    telegram_id="3030")
+    assert not user_cache.load_user(3030).is_staff
+    assert not user_cache.load_user(3030).is_staff
+    assert fetches == ["3030"]
+
+    # Изменение на сайте (другой процесс) меняет версию в общем кэше
+    user.is_staff = True
+    user.save()
+
+    assert user_cache.load_user(3030).is_staff
+    assert fetches == ["3030", "3030"]
+    user_cache.USER_CACHE.clear()
+
+
+def test_file_cache_versions_are_shared_between_processes(settings, tmp_path):
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": str(tmp_path)},
+    }
+    # Отдельный экземпляр бэкенда на том же каталоге — как кэш другого процесса
+    other_process = FileBasedCache(str(tmp_path), {})
+
+    version = get_version("catalog")
+    assert other_process.get("version:catalog") == version
+
+    invalidate("catalog")
+    assert other_process.get("version:catalog") not in (None, version)
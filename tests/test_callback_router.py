@@ -0,0 +1,47 @@
+import pytest
+
+from bot.dictionaries.callback_actions import CALLBACK_ROUTER
+from bot.handlers.admin import update_user_status_callback
+from bot.handlers.customer import customer_add_to_cart, customer_catalog_page
+from bot.utils.callback_parser import CALLBACK_DATA_LIMIT, encode_callback
+from bot.utils.callback_router import CallbackRouter
+
+
+async def handler(update, context, *params):
+    pass
+
+
+def test_resolve_passes_typed_params():
+    assert CALLBACK_ROUTER.resolve(encode_callback("add_to_cart", 5)) == (customer_add_to_cart, [5])
+    assert CALLBACK_ROUTER.resolve(encode_callback("user_status_update", 7, False)) == (
+        update_user_status_callback, [7, False]
+    )
+    assert CALLBACK_ROUTER.resolve("catalog_page:next:1700000000000000.12") == (
+        customer_catalog_page, ["next", "1700000000000000.12"]
+    )
+
+
+def test_resolve_accepts_legacy_underscore_format():
+    assert CALLBACK_ROUTER.resolve("add_to_cart_5") == (customer_add_to_cart, [5])
+
+
+@pytest.mark.parametrize("callback_data", [
+    "unknown_action", "add_to_cart:abc", "add_to_cart", "add_to_cart:1:2", "user_status_update:1:yes", "",
+])
+def test_resolve_rejects_unknown_action_or_bad_params(callback_data):
+    assert CALLBACK_ROUTER.resolve(callback_data) == (None, [])
+
+
+def test_duplicate_registration_is_an_error():
+    router = CallbackRouter()
+    router.register("open", handler, int)
+
+    with pytest.raises(ValueError):
+        router.register("open", handler)
+
+
+def test_encode_callback_respects_telegram_limit():
+    assert encode_callback("set_executor", 10, 20) == "set_executor:10:20"
+
+    with pytest.raises(ValueError):
+        encode_callback("catalog_page", "next", "x" * CALLBACK_DATA_LIMIT)
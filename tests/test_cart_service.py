@@ -0,0 +1,107 @@
+import threading
+import time
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import QuerySet
+
+from catalog.models import Cart, CartItem, Order, OrderItem, Product
+from catalog.services import (
+    add_items_to_cart,
+    add_product_to_cart,
+    change_cart_quantity,
+    copy_order_to_cart,
+    get_cart,
+)
+
+User = get_user_model()
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(username="buyer", password="password123", phone_number="+70000000002")
+
+
+def make_order(user, lines):
+    order = Order.objects.create(user=user, total_price=0, address="Test Address")
+    products = Product.objects.bulk_create(Product(name=f"Букет {index}", price=100 + index) for index in range(lines))
+    OrderItem.objects.bulk_create(
+        OrderItem(order=order, product=product, quantity=2, price=product.price * 2) for product in products
+    )
+    return order, products
+
+
+@pytest.mark.django_db
+def test_copy_order_to_cart_uses_constant_queries(user, django_assert_max_num_queries):
+    order, products = make_order(user, 30)
+    CartItem.objects.create(cart=Cart.objects.create(user=user), product=products[0], quantity=3)
+
+    with django_assert_max_num_queries(8):
+        copy_order_to_cart(order, user)
+
+    items = {item.product_id: item for item in CartItem.objects.filter(cart__user=user)}
+    assert len(items) == 30
+    assert (items[products[0].id].quantity, items[products[0].id].price) == (5, 500)
+    assert (items[products[29].id].quantity, items[products[29].id].price) == (2, 258)
+
+
+@pytest.mark.django_db
+def test_add_product_to_cart_increments_up_to_limit(user):
+    product = Product.objects.create(name="Розы", price=150)
+    cart = get_cart(user)
+
+    assert add_product_to_cart(cart, product, 2, max_quantity=3)
+    assert not add_product_to_cart(cart, product, 2, max_quantity=3)
+    assert add_product_to_cart(cart, product, 1, max_quantity=3)
+
+    item = CartItem.objects.get(cart=cart, product=product)
+    assert (item.quantity, item.price) == (3, 450)
+
+
+@pytest.mark.django_db
+def test_change_cart_quantity_keeps_bounds(user):
+    product = Product.objects.create(name="Тюльпаны", price=80)
+    add_product_to_cart(get_cart(user), product)
+
+    assert change_cart_quantity(user, product.id, 1) == (True, 2)
+    assert CartItem.objects.get(product=product).price == 160
+    assert change_cart_quantity(user, product.id, -1) == (True, 1)
+    assert change_cart_quantity(user, product.id, -1) == (False, 1)
+    assert change_cart_quantity(user, product.id + 1, 1) == (False, None)
+
+
+@pytest.mark.skipif(
+    connection.vendor != "postgresql",
+    reason="SQLite выполняет пишущие транзакции строго по очереди (IMMEDIATE), гонки нет",
+)
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_adds_of_new_product_keep_both_increments(user, monkeypatch):
+    product = Product.objects.create(name="Пионы", price=200)
+    cart = get_cart(user)
+    read_done = threading.Event()
+    original_bulk_create = QuerySet.bulk_create
+
+    def slow_bulk_create(queryset, *args, **kwargs):
+        # Первая транзакция уже прочитала строки корзины: даём второй добавить тот же товар
+        if threading.current_thread().name == "first":
+            read_done.set()
+            time.sleep(0.3)
+        return original_bulk_create(queryset, *args, **kwargs)
+
+    monkeypatch.setattr(QuerySet, "bulk_create", slow_bulk_create)
+
+    def first():
+        try:
+            add_items_to_cart(cart, [(product, 2)])
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=first, name="first")
+    thread.start()
+    assert read_done.wait(5)
+    assert add_product_to_cart(cart, product, 1)
+    thread.join()
+
+    item = CartItem.objects.get(cart=cart, product=product)
+    assert (item.quantity, item.price) == (3, 600)
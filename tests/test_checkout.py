@@ -0,0 +1,47 @@
+import pytest
+from django.contrib.auth import get_user_model
+from bot.models import NotificationEvent
+from catalog.models import Cart, CartItem, Order, Product
+from catalog.services import EmptyCartError, place_order
+
+User = get_user_model()
+
+
+def fill_cart(user, lines):
+    cart = Cart.objects.create(user=user)
+    for index in range(lines):
+        product = Product.objects.create(name=f"Букет {index}", price=100 + index)
+        CartItem.objects.create(cart=cart, product=product, quantity=2)
+    return cart
+
+
+@pytest.mark.django_db
+def test_place_order_moves_cart_into_order(django_capture_on_commit_callbacks):
+    user = User.objects.create_user(username="buyer", password="password123", phone_number="+70000000002")
+    cart = fill_cart(user, 3)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        order = place_order(user, address="Test Address", notes="Позвонить")
+
+    assert order.items.count() == 3
+    assert order.total_price == (100 + 101 + 102) * 2
+    assert not cart.items.exists()
+    assert NotificationEvent.objects.filter(order=order).count() == 1
+
+
+@pytest.mark.django_db
+def test_place_order_query_count_does_not_grow_with_cart(django_assert_max_num_queries):
+    user = User.objects.create_user(username="buyer", password="password123", phone_number="+70000000002")
+    fill_cart(user, 30)
+
+    with django_assert_max_num_queries(10):
+        place_order(user, address="Test Address")
+
+
+@pytest.mark.django_db
+def test_place_order_rejects_empty_cart():
+    user = User.objects.create_user(username="buyer", password="password123", phone_number="+70000000002")
+
+    with pytest.raises(EmptyCartError):
+        place_order(user, address="Test Address")
+    assert not Order.objects.exists()
@@ -0,0 +1,82 @@
+import asyncio
+import time
+from bot.utils import fanout
+from bot.utils.fanout import FanoutDispatcher, TokenBucket
+
+
+def test_fan_out_sends_to_every_recipient(fake_bot):
+    dispatcher = FanoutDispatcher(fake_bot, global_rate=1000, per_chat_rate=1000)
+    messages = [(chat_id, "hello", {"parse_mode": "Markdown"}) for chat_id in range(50)]
+
+    sent = asyncio.run(dispatcher.fan_out(messages))
+
+    assert sent == 50
+    assert sorted(chat_id for chat_id, _, _ in fake_bot.sent) == list(range(50))
+
+
+def test_fan_out_retries_after_retry_after(fake_bot):
+    fake_bot.retry_after = 0
+    dispatcher = FanoutDispatcher(fake_bot, global_rate=1000, per_chat_rate=1000)
+
+    sent = asyncio.run(dispatcher.fan_out([(1, "hello", {})]))
+
+    assert sent == 1
+    assert len(fake_bot.sent) == 1
+
+
+def test_token_bucket_limits_rate():
+    async def take(count):
+        bucket = TokenBucket(rate=20)
+        started = time.monotonic()
+        for _ in range(count):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    # 20 токенов выдаются сразу, следующие 10 — по одному каждые 50 мс
+    assert asyncio.run(take(30)) >= 0.45
+
+
+def test_token_bucket_waits_outside_lock():
+    async def run():
+        bucket = TokenBucket(rate=10, capacity=1)
+        await bucket.acquire()
+        waiters = [asyncio.create_task(bucket.acquire()) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        # Оба ждут свой токен, но блокировка ведра свободна
+        assert not bucket._lock.locked()
+        started = time.monotonic()
+        await asyncio.gather(*waiters)
+        return time.monotonic() - started
+
+    assert 0.15 <= asyncio.run(run()) < 0.3
+
+
+def test_chat_rate_limit_does_not_hold_concurrency_slot():
+    class TimedBot:
+        def __init__(self):
+            self.sent = {}
+
+        async def send_message(self, chat_id, text, **kwargs):
+            self.sent.setdefault(chat_id, []).append(time.monotonic())
+
+    bot = TimedBot()
+    dispatcher = FanoutDispatcher(bot, global_rate=1000, per_chat_rate=2, max_concurrency=1)
+    started = time.monotonic()
+
+    asyncio.run(dispatcher.fan_out([(1, "first", {}), (1, "second", {}), (1, "third", {}), (2, "other", {})]))
+
+    # Третье сообщение в чат 1 ждёт лимита чата, не занимая единственный слот
+    assert bot.sent[2][0] - started < 0.1
+    assert len(bot.sent[1]) == 3
+
+
+def test_idle_chat_buckets_are_dropped(fake_bot, monkeypatch):
+    monkeypatch.setattr(fanout, "CHAT_BUCKETS_PRUNE_SIZE", 10)
+    dispatcher = FanoutDispatcher(fake_bot, global_rate=1000, per_chat_rate=1000)
+
+    for batch in range(5):
+        asyncio.run(dispatcher.fan_out([(batch * 10 + index, "hello", {}) for index in range(10)]))
+        time.sleep(0.01)  # Вёдра прошлых рассылок успевают наполниться
+
+    assert len(fake_bot.sent) == 50
+    assert len(dispatcher._chat_buckets) <= 20
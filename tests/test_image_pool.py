@@ -0,0 +1,59 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from bot.utils.image_pool import ImagePool, ImagePoolBusy
+
+
+def test_image_pool_caps_concurrency_and_keeps_loop_responsive():
+    pool = ImagePool(max_workers=2, max_pending=10)
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0}
+
+    def job():
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        time.sleep(0.05)  # Имитация блокирующей работы Pillow
+        with lock:
+            state["running"] -= 1
+        return "ok"
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        tick_task = asyncio.create_task(ticker())
+        results = await asyncio.gather(*(pool.run(job) for _ in range(6)))
+        tick_task.cancel()
+        return results, ticks
+
+    results, ticks = asyncio.run(scenario())
+    pool.shutdown()
+
+    assert results == ["ok"] * 6
+    assert state["peak"] == 2
+    assert ticks >= 5  # Цикл событий продолжал работать, пока шли задачи
+
+
+def test_image_pool_rejects_when_queue_is_full():
+    pool = ImagePool(max_workers=1, max_pending=2)
+
+    async def scenario():
+        first = asyncio.ensure_future(pool.run(time.sleep, 0.05))
+        second = asyncio.ensure_future(pool.run(time.sleep, 0.05))
+        await asyncio.sleep(0)
+        with pytest.raises(ImagePoolBusy):
+            await pool.run(time.sleep, 0.05)
+        await asyncio.gather(first, second)
+
+    asyncio.run(scenario())
+    pool.shutdown()
+    assert pool.pending == 0
@@ -0,0 +1,94 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
+
+from catalog.models import Cart, CartItem, Order, Product, Review
+from catalog.pagination import cursor_condition, keyset_paginate
+
+User = get_user_model()
+
+
+def query_plan(queryset):
+    """
+    План запроса. На PostgreSQL отключаем seq scan: на пустых тестовых таблицах он всегда дешевле.
+    """
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")  # Только до конца тестовой транзакции
+    return queryset.explain()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("lookup, index_name", [
+    (lambda: Order.objects.filter(status="created").order_by("created_at"), "order_status_created_idx"),
+    (lambda: Order.objects.filter(status="processing", executor_id=1), "order_executor_status_idx"),
+    (lambda: Order.objects.filter(user_id=1).order_by("-created_at"), "order_user_created_idx"),
+    # Индекс уникального ограничения SQLite называет sqlite_autoindex_*, поэтому имя не проверяем
+    (lambda: CartItem.objects.filter(cart_id=1, product_id=1), None),
+])
+def test_hot_lookups_use_indexes(lookup, index_name):
+    plan = query_plan(lookup())
+
+    assert "index" in plan.lower()
+    assert "Seq Scan" not in plan and "SCAN catalog_" not in plan
+    if index_name:
+        assert index_name in plan
+
+
+@pytest.mark.django_db
+def test_cart_item_is_unique_per_product():
+    user = User.objects.create_user(username="cart", password="password123", phone_number="+70000000007")
+    cart = Cart.objects.create(user=user)
+    product = Product.objects.create(name="Лилии", price=400)
+    CartItem.objects.create(cart=cart, product=product)
+
+    with pytest.raises(IntegrityError):
+        CartItem.objects.create(cart=cart, product=product)
+
+
+def keyset_page_query(model, field):
+    # Запрос второй и дальше страниц keyset_paginate(..., descending=True)
+    return model.objects.filter(cursor_condition(f"{10 ** 15}.5", field, "lt")).order_by(f"-{field}", "-pk")[:26]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("model, field, index_name", [
+    (Product, "created_at", "product_created_idx"),
+    (User, "date_joined", "user_date_joined_idx"),
+    (Review, "created_at", "review_created_idx"),
+])
+def test_keyset_pages_use_composite_indexes(model, field, index_name):
+    plan = query_plan(keyset_page_query(model, field))
+
+    assert index_name in plan
+    # Поиск по диапазону от курсора, без просмотра всей таблицы или индекса и без сортировки
+    assert "SCAN" not in plan and "Seq Scan" not in plan
+    assert "TEMP B-TREE" not in plan and "Sort" not in plan
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("query", ["buy", "+7999", "79991234567"])
+def test_user_prefix_search_uses_indexes(query):
+    from admin_zone.views import user_prefix_condition
+
+    plan = query_plan(User.objects.filter(user_prefix_condition(query)))
+
+    assert "Seq Scan" not in plan and "SCAN users_customuser" not in plan
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("cursor_kwargs", [{}, {"after": f"{10 ** 15}.5"}, {"before": f"{10 ** 15}.5"}])
+def test_catalog_pages_use_product_index(cursor_kwargs):
+    # Каталог листается по возрастанию (created_at, id) в обе стороны
+    with CaptureQueriesContext(connection) as queries:
+        keyset_paginate(Product.objects.all(), 5, **cursor_kwargs)
+
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        cursor.execute(f"EXPLAIN {'' if connection.vendor == 'postgresql' else 'QUERY PLAN '}{queries[0]['sql']}")
+        plan = "\n".join(str(row) for row in cursor.fetchall())
+
+    assert "product_created_idx" in plan
+    assert "TEMP B-TREE" not in plan and "Sort" not in plan
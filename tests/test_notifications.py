@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+from django.contrib.auth import get_user_model
+from bot.models import NotificationEvent, OrderNotification
+from bot.notification import notification_worker
+from bot.notification.outbox import enqueue_order_event, filter_unnotified_orders, mark_order_notified
+from bot.notification.task_queue import get_queue
+from catalog.models import Order
+from catalog.signals import order_placed
+
+User = get_user_model()
+
+
+@pytest.fixture
+def order():
+    user = User.objects.create_user(username="customer", password="password123", phone_number="+70000000001")
+    return Order.objects.create(user=user, total_price=100, address="Test Address")
+
+
+@pytest.mark.django_db
+def test_enqueue_order_event_is_idempotent_while_pending(order):
+    enqueue_order_event(order.id)
+    enqueue_order_event(order.id)
+
+    assert NotificationEvent.objects.filter(order=order, processed_at__isnull=True).count() == 1
+
+
+@pytest.mark.django_db
+def test_order_placed_signal_enqueues_event(order, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        order_placed.send(sender=Order, order=order)
+
+    assert [message.order_id for message in get_queue().reserve()] == [order.id]
+
+
+@pytest.mark.django_db
+def test_notified_orders_are_skipped_and_events_consumed(order):
+    enqueue_order_event(order.id)
+    messages = get_queue().reserve()
+
+    assert filter_unnotified_orders([order.id]) == {order.id}
+    mark_order_notified(order.id)
+    get_queue().ack(messages)
+
+    assert filter_unnotified_orders([order.id]) == set()
+    assert get_queue().reserve() == []
+    assert OrderNotification.objects.filter(order=order).exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_order_without_staff_recipients_is_scheduled_for_reminders(order):
+    asyncio.run(notification_worker.notify_new_order(order, repeat_interval=10))
+
+    notification = OrderNotification.objects.get(order=order)
+    assert notification.next_notify_at <= notification.notified_at
+    assert filter_unnotified_orders([order.id]) == set()
+
+
+@pytest.mark.django_db
+def test_send_new_order_notification_only_enqueues(order, monkeypatch):
+    from bot.handlers import staff
+    from bot.notification import client
+
+    def fail():
+        raise AssertionError("Веб-запрос не должен обращаться к Telegram")
+
+    monkeypatch.setattr(client, "get_bot", fail)
+    staff.send_new_order_notification(order)
+
+    assert NotificationEvent.objects.filter(order=order, processed_at__isnull=True).count() == 1
+
+
+def test_notification_client_is_shared(monkeypatch):
+    from bot.notification import client
+
+    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "123456:TEST")
+    monkeypatch.setattr(client, "_bot", None)
+    monkeypatch.setattr(client, "_dispatcher", None)
+
+    assert client.get_bot() is client.get_bot()
+    assert client.get_dispatcher().bot is client.get_bot()
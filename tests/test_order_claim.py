@@ -0,0 +1,107 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from django.contrib.auth import get_user_model
+
+from bot.models import StaffNotificationMessage
+from bot.notification.staff_messages import remember_digest_messages
+from catalog.models import Order
+from catalog.services import claim_order
+
+User = get_user_model()
+
+
+def create_staff(count):
+    return [
+        User.objects.create_user(
+            username=f"staff{index}", password="password123", phone_number=f"+7200000{index:04d}",
+            is_staff=True, telegram_id=str(1000 + index),
+        )
+        for index in range(count)
+    ]
+
+
+@pytest.fixture
+def order():
+    customer = User.objects.create_user(username="customer", password="password123", phone_number="+70000000008")
+    return Order.objects.create(user=customer, total_price=100, address="Test Address")
+
+
+@pytest.mark.django_db
+def test_claim_order_is_won_once(order):
+    first, second = create_staff(2)
+
+    assert claim_order(order.id, first.id) is True
+    assert claim_order(order.id, second.id) is False
+
+    order.refresh_from_db()
+    assert (order.executor_id, order.status) == (first.id, "processing")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_take_order_has_single_winner_and_closes_notifications(order, fake_bot):
+    from bot.handlers.staff import handle_staff_take_order
+
+    staff = create_staff(5)
+    StaffNotificationMessage.objects.bulk_create(
+        StaffNotificationMessage(order=order, chat_id=int(member.telegram_id), message_id=10) for member in staff
+    )
+
+    def make_update(member):
+        query = MagicMock()
+        query.data = f"staff_take_order:{order.id}"
+        query.answer = AsyncMock()
+        query.edit_message_text = AsyncMock()
+        query.message = SimpleNamespace(chat_id=int(member.telegram_id), message_id=10)
+        return SimpleNamespace(callback_query=query, effective_user=SimpleNamespace(id=member.telegram_id))
+
+    updates = [make_update(member) for member in staff]
+
+    async def take_all():
+        await asyncio.gather(*(handle_staff_take_order(update, MagicMock(), order.id) for update in updates))
+
+    asyncio.run(take_all())
+
+    replies = [update.callback_query.edit_message_text.await_args.args[0] for update in updates]
+    assert sum(reply.startswith("✅") for reply in replies) == 1
+
+    order.refresh_from_db()
+    winner = staff[[reply.startswith("✅") for reply in replies].index(True)]
+    assert order.executor_id == winner.id
+
+    # Уведомления у остальных сотрудников отредактированы одной пачкой, у победителя — нет
+    assert sorted(chat_id for chat_id, _, _ in fake_bot.edited) == sorted(
+        int(member.telegram_id) for member in staff if member != winner
+    )
+    assert not StaffNotificationMessage.objects.filter(order=order).exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_taking_order_from_digest_removes_only_its_button(order, fake_bot):
+    from bot.handlers.staff import handle_staff_take_order
+
+    other = Order.objects.create(user=order.user, total_price=200, address="Test Address")
+    staff = create_staff(2)
+    remember_digest_messages(
+        [order.id, other.id], [(int(member.telegram_id), SimpleNamespace(message_id=20)) for member in staff]
+    )
+
+    query = MagicMock()
+    query.answer = AsyncMock()
+    query.edit_message_text = AsyncMock()
+    query.message = SimpleNamespace(chat_id=int(staff[0].telegram_id), message_id=20, reply_text=AsyncMock())
+    update = SimpleNamespace(callback_query=query, effective_user=SimpleNamespace(id=staff[0].telegram_id))
+
+    asyncio.run(handle_staff_take_order(update, MagicMock(), order.id))
+
+    # Текст сводки не тронут ни у кого, ответ нажавшему — отдельным сообщением
+    query.edit_message_text.assert_not_awaited()
+    assert query.message.reply_text.await_args.args[0].startswith("✅")
+    assert sorted(chat_id for chat_id, _, _ in fake_bot.edited) == sorted(int(member.telegram_id) for member in staff)
+    for _, _, reply_markup in fake_bot.edited:
+        [[button]] = reply_markup.inline_keyboard
+        assert button.text == f"✅ Взять заказ #{other.id}"
+
+    assert list(StaffNotificationMessage.objects.values_list("order_id", flat=True).distinct()) == [other.id]
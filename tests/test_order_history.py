@@ -0,0 +1,83 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from catalog.models import Order, OrderItem, Product
+
+User = get_user_model()
+
+
+@pytest.fixture
+def customer():
+    return User.objects.create_user(
+        username="history", password="password123", phone_number="+70000000005", telegram_id="555"
+    )
+
+
+def add_orders(user, count, lines=3):
+    for _ in range(count):
+        order = Order.objects.create(user=user, total_price=0, address="Test Address")
+        for index in range(lines):
+            product = Product.objects.create(name=f"Букет {index}", price=100)
+            OrderItem.objects.create(order=order, product=product, quantity=1)
+
+
+def count_queries(func):
+    with CaptureQueriesContext(connection) as queries:
+        func()
+    return len(queries)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("url_name", ["catalog:order_history", "admin_zone:orders"])
+def test_order_list_views_use_constant_queries(customer, url_name):
+    client = Client()
+    client.force_login(customer)
+    url = reverse(url_name)
+
+    add_orders(customer, 1)
+    assert client.get(url).status_code == 200  # Прогрев: сессия и корзина создаются при первом запросе
+    baseline = count_queries(lambda: client.get(url))
+
+    add_orders(customer, 5)
+    client.get(url)  # Пересчёт закэшированной сводки после новых заказов
+    assert count_queries(lambda: client.get(url)) == baseline
+
+
+@pytest.mark.django_db(transaction=True)
+def test_bot_order_history_uses_constant_queries(customer, monkeypatch):
+    from asgiref.sync import sync_to_async
+    from bot.handlers import customer as customer_handlers
+
+    hops = []
+
+    # Считаем переходы в sync-код и запросы внутри каждого (в потоке, где они выполняются)
+    def counting_sync_to_async(func):
+        def run(*args, **kwargs):
+            with CaptureQueriesContext(connection) as queries:
+                result = func(*args, **kwargs)
+            hops.append(len(queries))
+            return result
+        return sync_to_async(run)
+
+    monkeypatch.setattr(customer_handlers, "sync_to_async", counting_sync_to_async)
+
+    def view_orders():
+        hops.clear()
+        update = MagicMock()
+        update.effective_user.id = 555
+        update.message.reply_text = AsyncMock()
+        asyncio.run(customer_handlers.customer_view_orders(update, MagicMock()))
+        return update.message.reply_text.await_count, len(hops), sum(hops)
+
+    add_orders(customer, 1)
+    assert view_orders() == (1, 1, 2)
+
+    add_orders(customer, 5)
+    assert view_orders() == (6, 1, 2)
@@ -0,0 +1,52 @@
+import pytest
+from django.test import Client
+from django.urls import reverse
+from catalog.models import Product
+from catalog.pagination import decode_cursor, encode_cursor, keyset_paginate
+
+
+@pytest.fixture
+def products():
+    return [Product.objects.create(name=f"Букет {index}", price=100) for index in range(7)]
+
+
+@pytest.mark.django_db
+def test_keyset_paginate_walks_forward_and_back(products):
+    queryset = Product.objects.all()
+
+    first = keyset_paginate(queryset, 3)
+    second = keyset_paginate(queryset, 3, after=first.next_cursor)
+    last = keyset_paginate(queryset, 3, after=second.next_cursor)
+    back = keyset_paginate(queryset, 3, before=second.prev_cursor)
+
+    assert [p.id for p in first.items + second.items + last.items] == [p.id for p in products]
+    assert not first.has_previous and first.has_next
+    assert not last.has_next and last.has_previous
+    assert [p.id for p in back.items] == [p.id for p in first.items]
+    assert not back.has_previous
+
+
+@pytest.mark.django_db
+def test_keyset_paginate_descending(products):
+    page = keyset_paginate(Product.objects.all(), 4, descending=True)
+    rest = keyset_paginate(Product.objects.all(), 4, after=page.next_cursor, descending=True)
+
+    assert [p.id for p in page.items + rest.items] == [p.id for p in reversed(products)]
+
+
+@pytest.mark.django_db
+def test_cursor_round_trip(products):
+    product = products[0]
+    assert decode_cursor(encode_cursor(product)) == (product.created_at, product.id)
+    assert ":" not in encode_cursor(product)
+
+
+@pytest.mark.django_db
+def test_catalog_home_is_paginated(products):
+    client = Client()
+    response = client.get(reverse("catalog:home"))
+    assert response.status_code == 200
+    assert len(response.context["products"]) == 7
+
+    response = client.get(reverse("catalog:home"), {"after": "broken"})
+    assert response.status_code == 302
@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+
+from bot import persistence as persistence_module
+from bot.models import BotStateRecord
+from bot.persistence import DjangoPersistence
+
+
+@pytest.mark.django_db(transaction=True)
+def test_state_is_shared_between_workers():
+    # Несколько процессов бота (BOT_WORKERS > 1) работают в режиме write_through
+    first, second = DjangoPersistence(write_through=True), DjangoPersistence(write_through=True)
+
+    async def scenario():
+        await second.get_user_data()
+        await first.update_user_data(555, {"role": "new_user", "state": "awaiting_phone"})
+
+        # Второй процесс продолжает регистрацию с того шага, на котором её оставил первый
+        user_data = {}
+        await second.refresh_user_data(555, user_data)
+        assert user_data == {"role": "new_user", "state": "awaiting_phone"}
+
+        user_data["state"] = "awaiting_address"
+        await second.update_user_data(555, user_data)
+
+        stale = {"role": "new_user", "state": "awaiting_phone"}
+        await first.refresh_user_data(555, stale)
+        return stale
+
+    assert asyncio.run(scenario())["state"] == "awaiting_address"
+    assert asyncio.run(DjangoPersistence().get_user_data()) == {
+        555: {"role": "new_user", "state": "awaiting_address"}
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+def test_single_worker_does_not_reread_state_per_update(monkeypatch):
+    reads = []
+    original = persistence_module.load_records
+    monkeypatch.setattr(persistence_module, "load_records", lambda *args: reads.append(args) or original(*args))
+
+    async def refresh(persistence):
+        await persistence.refresh_user_data(555, {})
+        await persistence.refresh_chat_data(555, {})
+
+    asyncio.run(refresh(DjangoPersistence()))
+    assert reads == []
+
+    asyncio.run(refresh(DjangoPersistence(write_through=True)))
+    assert len(reads) == 2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_updates_from_one_pass_are_written_in_one_batch(monkeypatch):
+    batches = []
+    original = persistence_module.write_records
+
+    def counting_write(pending):
+        batches.append(len(pending))
+        return original(pending)
+
+    monkeypatch.setattr(persistence_module, "write_records", counting_write)
+    storage = DjangoPersistence()
+
+    async def scenario():
+        await asyncio.gather(*(storage.update_user_data(user_id, {"state": "idle"}) for user_id in range(20)))
+        await storage.update_chat_data(1, {"page": 2})
+        await storage.drop_user_data(0)
+        await storage.flush()
+
+    asyncio.run(scenario())
+
+    assert batches == [20, 1, 1]
+    assert BotStateRecord.objects.filter(kind="user").count() == 19
+    assert BotStateRecord.objects.get(kind="chat", key="1").data == {"page": 2}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_two_workers_interleaving_updates_for_one_user_keep_both_changes(monkeypatch):
+    from datetime import datetime, timezone
+
+    from telegram import Chat, Message, Update, User
+    from telegram.ext import ApplicationBuilder, ExtBot, TypeHandler
+
+    from bot.persistence import PERSISTENCE_FLUSH_GROUP, persist_update_state
+
+    async def fake_get_me(self, *args, **kwargs):
+        return User(id=1, first_name="Bot", is_bot=True, username="test_bot")
+
+    monkeypatch.setattr(ExtBot, "get_me", fake_get_me)
+    BotStateRecord.objects.create(kind="user", key="555", data={"role": "customer"})
+
+    both_started = asyncio.Event()
+    started = []
+
+    def make_worker(key, value):
+        async def handler(update, context):
+            context.user_data[key] = value
+            started.append(key)
+            if len(started) == 2:
+                both_started.set()
+            await both_started.wait()  # Оба процесса прочитали состояние до того, как кто-то его записал
+
+        application = (
+            ApplicationBuilder().token("123456:TEST").updater(None)
+            .persistence(DjangoPersistence(update_interval=3600, write_through=True)).build()
+        )
+        application.add_handler(TypeHandler(Update, handler))
+        application.add_handler(TypeHandler(Update, persist_update_state), group=PERSISTENCE_FLUSH_GROUP)
+        return application
+
+    def make_update(update_id, text):
+        user = User(id=555, first_name="Покупатель", is_bot=False)
+        chat = Chat(id=555, type="private")
+        return Update(update_id, message=Message(update_id, datetime.now(timezone.utc), chat, from_user=user, text=text))
+
+    async def scenario():
+        first, second = make_worker("cart_page", 2), make_worker("state", "awaiting_address")
+        await asyncio.gather(first.initialize(), second.initialize())
+        await asyncio.gather(first.process_update(make_update(1, "a")), second.process_update(make_update(2, "b")))
+        # Периодический сброс Application не должен затирать слитые данные
+        await asyncio.gather(first.update_persistence(), second.update_persistence())
+
+    asyncio.run(scenario())
+
+    assert BotStateRecord.objects.get(kind="user", key="555").data == {
+        "role": "customer", "cart_page": 2, "state": "awaiting_address"
+    }
@@ -0,0 +1,61 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client
+from django.urls import reverse
+from catalog.models import Product, Review
+
+User = get_user_model()
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(username="reviewer", password="password123", phone_number="+70000000003")
+
+
+@pytest.mark.django_db
+def test_rating_aggregates_follow_reviews(user):
+    product = Product.objects.create(name="Тюльпаны", price=300)
+    first = Review.objects.create(user=user, product=product, rating=5)
+    Review.objects.create(user=user, product=product, rating="2")
+
+    product.refresh_from_db()
+    assert (product.rating_sum, product.rating_count) == (7, 2)
+    assert product.get_average_rating() == 3.5
+
+    first.rating = 3
+    first.save()
+    product.refresh_from_db()
+    assert (product.rating_sum, product.rating_count) == (5, 2)
+
+    first.delete()
+    product.refresh_from_db()
+    assert (product.rating_sum, product.rating_count) == (2, 1)
+
+
+@pytest.mark.django_db
+def test_rebuild_product_ratings_command(user):
+    product = Product.objects.create(name="Пионы", price=500)
+    Review.objects.create(user=user, product=product, rating=4)
+    Product.objects.filter(pk=product.pk).update(rating_sum=0, rating_count=0)
+
+    call_command("rebuild_product_ratings")
+
+    product.refresh_from_db()
+    assert (product.rating_sum, product.rating_count) == (4, 1)
+
+
+@pytest.mark.django_db
+def test_catalog_ratings_need_no_extra_queries(user, django_assert_max_num_queries):
+    for index in range(10):
+        product = Product.objects.create(name=f"Букет {index}", price=100)
+        Review.objects.create(user=user, product=product, rating=4)
+
+    client = Client()
+    client.force_login(user)
+    # Сессия, пользователь и корзина из context processor + один запрос товаров
+    with django_assert_max_num_queries(8):
+        response = client.get(reverse("catalog:home"))
+
+    assert response.status_code == 200
+    assert "4,0" in response.content.decode()  # LANGUAGE_CODE = "ru"
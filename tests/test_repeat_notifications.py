@@ -0,0 +1,140 @@
+import asyncio
+from datetime import timedelta
+from functools import partial
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from bot.models import NotificationThrottle, OrderNotification, StaffNotificationMessage
+from bot.notification import notification_worker
+from bot.notification.repeat_scheduler import fetch_due_notifications, repeat_delay
+from catalog.models import Order, OrderItem, Product
+
+User = get_user_model()
+
+
+@pytest.fixture
+def open_orders():
+    customer = User.objects.create_user(username="customer", password="password123", phone_number="+70000000040")
+    product = Product.objects.create(name="Тюльпаны", price=300)
+    orders = [Order.objects.create(user=customer, total_price=300, address=f"Адрес {index}") for index in range(3)]
+    OrderItem.objects.bulk_create(OrderItem(order=order, product=product, quantity=1, price=300) for order in orders)
+
+    due = timezone.now() - timedelta(minutes=1)
+    OrderNotification.objects.bulk_create(
+        OrderNotification(order=order, notified_at=due, next_notify_at=due) for order in orders
+    )
+    return orders
+
+
+@pytest.fixture
+def recipients():
+    return [
+        User.objects.create_user(username=f"staff{index}", password="password123", phone_number=f"+7000000005{index}",
+                                 is_staff=True, telegram_id=str(5000 + index))
+        for index in range(2)
+    ] + [
+        User.objects.create_user(username="boss", password="password123", phone_number="+70000000060",
+                                 is_superuser=True, telegram_id="6000")
+    ]
+
+
+def run_repeat():
+    asyncio.run(notification_worker.process_repeat_notifications(repeat_interval=2, min_interval=15))
+
+
+def test_repeat_delay_backs_off_exponentially_up_to_limit():
+    assert [repeat_delay(count, 2, 2, 60) for count in range(1, 7)] == [2, 4, 8, 16, 32, 60]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_due_orders_are_sent_as_one_digest_per_recipient(fake_bot, open_orders, recipients):
+    taken = open_orders[2]
+    Order.objects.filter(pk=taken.pk).update(executor=recipients[0], status="processing")
+
+    run_repeat()
+
+    assert sorted(chat_id for chat_id, _, _ in fake_bot.sent) == [5000, 5001, 6000]
+    for chat_id, text, kwargs in fake_bot.sent:
+        assert f"Заказ #{open_orders[0].id}" in text and f"Заказ #{open_orders[1].id}" in text
+        assert f"Заказ #{taken.id}" not in text
+        assert ("reply_markup" in kwargs) == (chat_id != 6000)
+
+    notification = OrderNotification.objects.get(order=open_orders[0])
+    assert notification.notify_count == 2
+    assert timedelta(minutes=3) < notification.next_notify_at - timezone.now() <= timedelta(minutes=4)
+    assert OrderNotification.objects.get(order=taken).notify_count == 1
+
+    # Сводки сотрудников запомнены для каждого заказа из неё
+    assert sorted(StaffNotificationMessage.objects.values_list("order_id", "chat_id")) == sorted(
+        (order.id, chat_id) for order in open_orders[:2] for chat_id in (5000, 5001)
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_recipients_are_throttled_and_orders_wait(fake_bot, open_orders, recipients):
+    run_repeat()
+    assert len(fake_bot.sent) == 3
+
+    # Заказы снова подошли к напоминанию, но получатели уведомлены меньше 15 минут назад
+    OrderNotification.objects.update(next_notify_at=timezone.now() - timedelta(seconds=1))
+    run_repeat()
+    assert len(fake_bot.sent) == 3
+    assert set(OrderNotification.objects.values_list("notify_count", flat=True)) == {2}
+
+    NotificationThrottle.objects.update(last_sent_at=timezone.now() - timedelta(minutes=16))
+    run_repeat()
+    assert len(fake_bot.sent) == 6
+    assert set(OrderNotification.objects.values_list("notify_count", flat=True)) == {3}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_digest_waits_until_every_recipient_is_ready(fake_bot, open_orders, recipients):
+    NotificationThrottle.objects.create(chat_id=6000, last_sent_at=timezone.now())
+
+    run_repeat()
+    assert fake_bot.sent == []
+    assert set(OrderNotification.objects.values_list("notify_count", flat=True)) == {1}
+
+    NotificationThrottle.objects.update(last_sent_at=timezone.now() - timedelta(minutes=16))
+    run_repeat()
+    assert sorted(chat_id for chat_id, _, _ in fake_bot.sent) == [5000, 5001, 6000]
+    assert set(OrderNotification.objects.values_list("notify_count", flat=True)) == {2}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_digest_takes_only_the_oldest_orders(fake_bot, open_orders, recipients, monkeypatch):
+    monkeypatch.setattr(notification_worker, "fetch_due_notifications", partial(fetch_due_notifications, limit=2))
+
+    run_repeat()
+
+    [(text, kwargs)] = [(text, kwargs) for chat_id, text, kwargs in fake_bot.sent if chat_id == 5000]
+    assert "Заказы ждут исполнителя: 3" in text and "…и ещё 1 заказ(ов)" in text
+    assert len(kwargs["reply_markup"].inline_keyboard) == 2
+    # Заказ, не попавший в сводку, остаётся к напоминанию
+    assert dict(OrderNotification.objects.values_list("order_id", "notify_count")) == {
+        open_orders[0].id: 2, open_orders[1].id: 2, open_orders[2].id: 1,
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+def test_digest_not_counted_until_every_recipient_gets_it(fake_bot, open_orders, recipients):
+    fake_bot.failing = {5001}
+    due_at = dict(OrderNotification.objects.values_list("order_id", "next_notify_at"))
+
+    run_repeat()
+
+    assert sorted(chat_id for chat_id, _, _ in fake_bot.sent) == [5000, 6000]
+    assert dict(OrderNotification.objects.values_list("order_id", "next_notify_at")) == due_at
+    assert set(OrderNotification.objects.values_list("notify_count", flat=True)) == {1}
+
+    # Получившие сводку не получают её повторно раньше min_interval
+    fake_bot.failing = set()
+    run_repeat()
+    assert len(fake_bot.sent) == 2
+
+    NotificationThrottle.objects.update(last_sent_at=timezone.now() - timedelta(minutes=16))
+    run_repeat()
+    assert sorted(chat_id for chat_id, _, _ in fake_bot.sent[2:]) == [5000, 5001, 6000]
+    assert set(OrderNotification.objects.values_list("notify_count", flat=True)) == {2}
@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+from django.contrib.auth import get_user_model
+from telegram.error import Forbidden, TimedOut
+
+from bot.models import NotificationEvent
+from bot.notification import notification_worker, task_queue
+from bot.notification.task_queue import ORDER_STATUS_CHANGED, get_queue
+from catalog.models import Order
+from catalog.services import claim_order
+
+User = get_user_model()
+
+
+@pytest.fixture
+def order():
+    user = User.objects.create_user(
+        username="customer", password="password123", phone_number="+70000000001", telegram_id="555"
+    )
+    return Order.objects.create(user=user, total_price=100, address="Test Address")
+
+
+class FakeDispatcher:
+    def __init__(self, ok, error=None):
+        self.ok = ok
+        self.error = error
+        self.sent = []
+
+    async def call(self, chat_id, method, text, **kwargs):
+        self.sent.append((chat_id, text))
+        return (True, None) if self.ok else (False, self.error)
+
+
+@pytest.mark.django_db
+def test_status_changes_publish_messages(order, django_capture_on_commit_callbacks):
+    staff = User.objects.create_user(username="florist", password="password123", phone_number="+70000000002")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        claim_order(order.id, staff.id)
+        order.refresh_from_db()
+        order.status = "delivered"
+        order.save()
+        order.save()  # Статус не изменился — сообщения нет
+
+    messages = [message for message in get_queue().reserve() if message.topic == ORDER_STATUS_CHANGED]
+    assert [message.payload["status"] for message in messages] == ["processing", "delivered"]
+
+
+@pytest.mark.django_db
+def test_failed_message_is_retried_then_dead_lettered(order, monkeypatch):
+    monkeypatch.setattr(task_queue, "MAX_ATTEMPTS", 2)
+    queue = get_queue()
+    queue.publish(ORDER_STATUS_CHANGED, order.id, {"status": "delivered"})
+
+    [message] = queue.reserve()
+    assert queue.fail(message, RuntimeError("Telegram недоступен")) is False
+    assert queue.reserve() == []  # Повтор отложен
+
+    NotificationEvent.objects.update(available_at=order.created_at)
+    [message] = queue.reserve()
+    assert message.attempts == 1
+    assert queue.fail(message, RuntimeError("Telegram недоступен")) is True
+
+    NotificationEvent.objects.update(available_at=order.created_at)
+    assert queue.reserve() == []
+    assert queue.dead_count() == 1
+
+    assert queue.requeue_dead() == 1
+    assert [message.attempts for message in queue.reserve()] == [0]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_worker_retries_undelivered_status_message(order, monkeypatch):
+    get_queue().publish(ORDER_STATUS_CHANGED, order.id, {"status": "delivered"})
+    monkeypatch.setattr(notification_worker, "get_dispatcher", lambda: FakeDispatcher(ok=False))
+
+    asyncio.run(notification_worker.process_order_events())
+
+    event = NotificationEvent.objects.get()
+    assert (event.processed_at, event.attempts) == (None, 1)
+    assert "не получил" in event.last_error
+
+    NotificationEvent.objects.update(available_at=order.created_at)
+    dispatcher = FakeDispatcher(ok=True)
+    monkeypatch.setattr(notification_worker, "get_dispatcher", lambda: dispatcher)
+
+    asyncio.run(notification_worker.process_order_events())
+
+    assert dispatcher.sent == [(555, f"📦 Статус вашего заказа #{order.id}: *Доставлен*")]
+    assert NotificationEvent.objects.get().processed_at is not None
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize("error, retried", [
+    (Forbidden("Forbidden: bot was blocked by the user"), False),
+    (TimedOut(), True),
+])
+def test_worker_retries_only_transient_telegram_errors(order, monkeypatch, error, retried):
+    get_queue().publish(ORDER_STATUS_CHANGED, order.id, {"status": "delivered"})
+    monkeypatch.setattr(notification_worker, "get_dispatcher", lambda: FakeDispatcher(ok=False, error=error))
+
+    asyncio.run(notification_worker.process_order_events())
+
+    event = NotificationEvent.objects.get()
+    if retried:
+        assert (event.processed_at, event.attempts) == (None, 1)
+    else:
+        # Покупатель заблокировал бота — сообщение снято сразу, без попыток и «мёртвых»
+        assert event.processed_at is not None and event.attempts == 0
+        assert get_queue().dead_count() == 0
@@ -0,0 +1,45 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from PIL import Image
+
+from catalog.thumbnails import get_thumbnail, thumbnail_key
+
+
+@pytest.fixture
+def image_path(tmp_path, settings):
+    settings.MEDIA_ROOT = str(tmp_path / "media")
+    path = tmp_path / "flower.png"
+    Image.new("RGB", (1200, 900), "red").save(path)
+    return str(path)
+
+
+def test_thumbnail_is_created_once_and_reused(image_path):
+    first = get_thumbnail(image_path, "bot")
+    mtime = os.stat(first).st_mtime_ns
+
+    assert get_thumbnail(image_path, "bot") == first
+    assert os.stat(first).st_mtime_ns == mtime
+    with Image.open(first) as img:
+        assert max(img.size) <= 512
+
+
+def test_thumbnail_key_changes_when_image_replaced(image_path):
+    key = thumbnail_key(image_path, (512, 512))
+
+    stat = os.stat(image_path)
+    os.utime(image_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert thumbnail_key(image_path, (512, 512)) != key
+    assert thumbnail_key(image_path, (400, 400)) != key
+
+
+def test_concurrent_thumbnail_writers_do_not_collide(image_path):
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        paths = list(pool.map(lambda _: get_thumbnail(image_path, "bot"), range(40)))
+
+    assert set(paths) == {paths[0]}
+    assert [name for name in os.listdir(os.path.dirname(paths[0])) if name.endswith(".tmp")] == []
+    with Image.open(paths[0]) as img:
+        img.verify()
@@ -0,0 +1,115 @@
+import datetime
+import json
+import os
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+
+from bot.utils import time_config
+from bot.utils.time_config import TimeSettingsProvider, time_settings_changed
+from bot.utils.time_utils import is_working_hours
+
+
+@pytest.fixture
+def settings_file(tmp_path, monkeypatch):
+    path = tmp_path / "time_settings.json"
+    path.write_text(json.dumps({"work_hours_start": "08:00", "work_hours_end": "22:00", "new_order_notify_interval": 1}))
+    monkeypatch.setattr(time_config, "TIME_SETTINGS", TimeSettingsProvider(str(path)))
+    return path
+
+
+def test_settings_are_parsed_once_until_file_changes(settings_file, monkeypatch):
+    reads = []
+    original = json.load
+    monkeypatch.setattr(time_config.json, "load", lambda file: reads.append(1) or original(file))
+
+    assert time_config.load_settings()["work_hours_start"] == datetime.time(8, 0)
+    assert time_config.load_settings()["min_notification_interval"] == time_config.MIN_NOTIFICATION_INTERVAL
+    assert len(reads) == 1
+
+    # Файл изменил другой процесс
+    settings_file.write_text(json.dumps({"work_hours_start": "10:30", "work_hours_end": "18:00"}))
+    os.utime(settings_file, ns=(0, 10 ** 9))
+
+    assert time_config.load_settings()["work_hours_start"] == datetime.time(10, 30)
+    assert len(reads) == 2
+
+
+def test_get_survives_invalidate_right_after_reload(settings_file):
+    provider = time_config.TIME_SETTINGS
+
+    class RacingLock:
+        """
+        Блокировка, после освобождения которой другой поток сразу вызывает invalidate().
+        """
+        def __init__(self):
+            self.lock = provider._lock
+
+        def __enter__(self):
+            return self.lock.__enter__()
+
+        def __exit__(self, *exc_info):
+            self.lock.__exit__(*exc_info)
+            provider._lock = self.lock
+            provider.invalidate()
+
+    provider._lock = RacingLock()
+
+    assert provider.get()["work_hours_start"] == datetime.time(8, 0)
+    assert provider._snapshot is None
+
+
+def test_save_replaces_file_atomically_and_signals_change(settings_file):
+    received = []
+
+    def on_change(sender, settings, **kwargs):
+        received.append(settings)
+
+    time_settings_changed.connect(on_change)
+    try:
+        time_config.save_settings({"work_hours_end": datetime.time(21, 15), "new_order_notify_interval": 5})
+    finally:
+        time_settings_changed.disconnect(on_change)
+
+    assert os.listdir(settings_file.parent) == ["time_settings.json"]
+    assert json.loads(settings_file.read_text())["work_hours_end"] == "21:15"
+
+    # Другой процесс читает тот же файл
+    other_process = TimeSettingsProvider(str(settings_file)).get()
+    assert other_process["work_hours_end"] == datetime.time(21, 15)
+    assert other_process["work_hours_start"] == datetime.time(8, 0)
+    assert received[0]["new_order_notify_interval"] == 5
+
+
+def test_broken_file_keeps_last_good_settings(settings_file):
+    assert time_config.load_settings()["work_hours_start"] == datetime.time(8, 0)
+
+    settings_file.write_text("{")
+    os.utime(settings_file, ns=(0, 2 * 10 ** 9))
+
+    assert time_config.load_settings()["work_hours_start"] == datetime.time(8, 0)
+
+
+def test_is_working_hours_uses_configured_schedule(settings_file):
+    assert is_working_hours({"work_hours_start": datetime.time.min, "work_hours_end": datetime.time.max}) is True
+
+    # Сохранённый в админке график сразу виден is_working_hours() без аргументов
+    time_config.save_settings({"work_hours_start": datetime.time(23, 59), "work_hours_end": datetime.time(0, 0)})
+    assert is_working_hours() is False
+
+
+@pytest.mark.django_db
+def test_admin_form_edits_reach_shared_snapshot(settings_file):
+    response = Client().post(reverse("admin_zone:edit_time_settings"), {
+        "work_hours_start": "07:00",
+        "work_hours_end": "19:00",
+        "new_order_notify_interval": 3,
+        "repeat_order_notify_interval": 4,
+    })
+
+    assert response.status_code == 302
+    settings = time_config.load_settings()
+    assert settings["work_hours_start"] == datetime.time(7, 0)
+    assert settings["repeat_order_notify_interval"] == 4
+    assert settings["allow_non_working_hours_notifications"] is False
@@ -0,0 +1,100 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from django.contrib.auth import get_user_model
+
+from bot.utils import user_cache
+from bot.utils.user_cache import UserCache, get_current_user, load_context_user
+
+User = get_user_model()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    user_cache.USER_CACHE.clear()
+    yield
+    user_cache.USER_CACHE.clear()
+
+
+@pytest.fixture
+def fetches(monkeypatch):
+    calls = []
+    original = user_cache.fetch_user
+
+    def counting_fetch(telegram_id):
+        calls.append(telegram_id)
+        return original(telegram_id)
+
+    monkeypatch.setattr(user_cache, "fetch_user", counting_fetch)
+    return calls
+
+
+def make_update(telegram_id):
+    return SimpleNamespace(effective_user=SimpleNamespace(id=telegram_id))
+
+
+def test_cache_evicts_least_recently_used_and_expired_entries():
+    clock = FakeClock()
+    cache = UserCache(max_size=2, ttl=60, clock=clock)
+    cache.set("1", "first")
+    cache.set("2", "second")
+    cache.get("1")
+    cache.set("3", "third")
+
+    assert cache.get("2", None) is None
+    assert cache.get("1") == "first"
+
+    clock.now = 61
+    assert cache.get("1", None) is None
+    assert len(cache) == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_user_is_resolved_once_for_all_handlers(fetches):
+    User.objects.create_user(username="staff", password="password123", phone_number="+70000000020",
+                             is_staff=True, telegram_id="2020")
+
+    async def handle_update():
+        update, context = make_update(2020), SimpleNamespace()
+        await load_context_user(update, context)
+        first = await get_current_user(update, context)
+        second = await get_current_user(update, context, staff=True)
+        return first, second
+
+    first, second = asyncio.run(handle_update())
+    assert first is second
+    assert fetches == ["2020"]
+
+    # Следующее обновление того же пользователя обслуживается из кеша
+    asyncio.run(handle_update())
+    assert fetches == ["2020"]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_status_change_invalidates_cached_user(fetches):
+    from bot.handlers.admin import update_user_status_callback
+
+    customer = User.objects.create_user(username="customer", password="password123", phone_number="+70000000021",
+                                        telegram_id="2021")
+    update = make_update(2021)
+
+    with pytest.raises(User.DoesNotExist):
+        asyncio.run(get_current_user(update, SimpleNamespace(), staff=True))
+
+    query = MagicMock()
+    query.answer = AsyncMock()
+    query.edit_message_text = AsyncMock()
+    asyncio.run(update_user_status_callback(SimpleNamespace(callback_query=query), MagicMock(), customer.id, True))
+
+    assert asyncio.run(get_current_user(update, SimpleNamespace(), staff=True)).is_staff
+    assert fetches == ["2021", "2021"]
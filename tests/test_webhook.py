@@ -0,0 +1,109 @@
+import asyncio
+import json
+from pathlib import Path
+
+from telegram import Bot
+
+from bot.webhook import TelegramWebhookApp
+
+RECORDED_UPDATES = json.loads((Path(__file__).parent / "fixtures" / "telegram_updates.json").read_text())
+SECRET = "webhook-secret"
+
+
+class FakeApplication:
+    """
+    Заменитель telegram.ext.Application: только очередь обновлений и жизненный цикл.
+    """
+
+    def __init__(self):
+        self.bot = Bot("123456:TEST")
+        self.update_queue = asyncio.Queue()
+        self.started = False
+
+    async def initialize(self):
+        pass
+
+    async def start(self):
+        self.started = True
+
+    async def stop(self):
+        self.started = False
+
+    async def shutdown(self):
+        pass
+
+
+async def post(app, body, secret=SECRET, path="/telegram/webhook/"):
+    """
+    Локальный заменитель Telegram: отправляет POST в ASGI-приложение и возвращает статус ответа.
+    """
+    headers = [(b"content-type", b"application/json")]
+    if secret is not None:
+        headers.append((b"x-telegram-bot-api-secret-token", secret.encode()))
+    scope = {"type": "http", "method": "POST", "path": path, "headers": headers}
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    return sent[0]["status"]
+
+
+def make_app(**kwargs):
+    async def django_app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 418, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    return TelegramWebhookApp(django_app, bot_application=FakeApplication(), secret=SECRET, **kwargs)
+
+
+def test_recorded_updates_are_queued_for_handlers():
+    app = make_app()
+
+    async def scenario():
+        statuses = [await post(app, json.dumps(update).encode()) for update in RECORDED_UPDATES]
+        queued = [app.bot_application.update_queue.get_nowait() for _ in RECORDED_UPDATES]
+        return statuses, queued
+
+    statuses, queued = asyncio.run(scenario())
+
+    assert statuses == [200, 200]
+    assert app.bot_application.started
+    assert queued[0].message.text == "/start"
+    assert queued[1].callback_query.data == "staff_take_order:1"
+
+
+def test_webhook_rejects_wrong_secret_and_bad_body():
+    app = make_app()
+    body = json.dumps(RECORDED_UPDATES[0]).encode()
+
+    async def scenario():
+        return [
+            await post(app, body, secret="wrong"),
+            await post(app, body, secret=None),
+            await post(app, b"not json"),
+        ]
+
+    assert asyncio.run(scenario()) == [403, 403, 400]
+    assert app.bot_application.update_queue.empty()
+
+
+def test_webhook_applies_backpressure_when_queue_is_full():
+    app = make_app(queue_size=1)
+    body = json.dumps(RECORDED_UPDATES[0]).encode()
+
+    async def scenario():
+        return [await post(app, body), await post(app, body)]
+
+    assert asyncio.run(scenario()) == [200, 503]
+
+
+def test_other_requests_go_to_django():
+    app = make_app()
+
+    assert asyncio.run(post(app, b"", path="/catalog/")) == 418
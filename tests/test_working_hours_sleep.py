@@ -0,0 +1,54 @@
+import asyncio
+import datetime
+import json
+
+import pytest
+
+from bot.notification import notification_worker
+from bot.utils import time_config
+from bot.utils.time_config import TimeSettingsProvider
+from bot.utils.time_utils import MOSCOW_TZ, seconds_until_working_hours
+
+
+def moscow(day, hour, minute=0):
+    return MOSCOW_TZ.localize(datetime.datetime(2024, 5, day, hour, minute))
+
+
+@pytest.fixture
+def working_hours(tmp_path, monkeypatch):
+    path = tmp_path / "time_settings.json"
+    path.write_text(json.dumps({"work_hours_start": "08:00", "work_hours_end": "22:00", "new_order_notify_interval": 1}))
+    monkeypatch.setattr(time_config, "TIME_SETTINGS", TimeSettingsProvider(str(path)))
+    return time_config.load_settings()
+
+
+def test_seconds_until_working_hours(working_hours):
+    assert seconds_until_working_hours(working_hours, moscow(1, 12)) == 0
+    assert seconds_until_working_hours(working_hours, moscow(1, 23)) == 9 * 3600
+    assert seconds_until_working_hours(working_hours, moscow(2, 6, 30)) == 90 * 60
+    # Время в другой зоне приводится к московскому
+    assert seconds_until_working_hours(working_hours, moscow(1, 23).astimezone(datetime.timezone.utc)) == 9 * 3600
+
+
+def test_worker_sleeps_through_the_night(working_hours, monkeypatch):
+    processed = []
+
+    async def fake_process(*args):
+        processed.append(args)
+
+    monkeypatch.setattr(notification_worker, "process_order_events", fake_process)
+    monkeypatch.setattr(notification_worker, "process_repeat_notifications", fake_process)
+
+    # Ночь с фиктивными часами: каждый проход сдвигает время на возвращённую паузу
+    now, cycles = moscow(1, 22, 30), 0
+    while now < moscow(2, 8):
+        now += datetime.timedelta(seconds=asyncio.run(notification_worker.run_notification_cycle(now)))
+        cycles += 1
+
+    assert cycles == 1
+    assert now == moscow(2, 8)
+    assert processed == []
+
+    # Утром — обычная проверка раз в new_order_notify_interval
+    assert asyncio.run(notification_worker.run_notification_cycle(now)) == 60
+    assert len(processed) == 2
@@ -0,0 +1,40 @@
+# Поиск пользователей по префиксу логина и телефона (админ-зона).
+# Django строит istartswith/startswith по-разному для разных СУБД, поэтому и индексы разные:
+# - SQLite: LIKE без учёта регистра использует только индекс с COLLATE NOCASE;
+# - PostgreSQL: UPPER(username) LIKE 'X%' и phone_number LIKE '+7%' используют индексы с *_pattern_ops.
+# В состоянии моделей этих индексов нет — они создаются напрямую для текущей СУБД.
+
+from django.db import migrations
+
+INDEXES = {
+    "sqlite": [
+        'CREATE INDEX IF NOT EXISTS user_username_prefix_idx ON users_customuser (username COLLATE NOCASE)',
+        'CREATE INDEX IF NOT EXISTS user_phone_prefix_idx ON users_customuser (phone_number COLLATE NOCASE)',
+    ],
+    "postgresql": [
+        'CREATE INDEX IF NOT EXISTS user_username_prefix_idx ON users_customuser (UPPER(username) text_pattern_ops)',
+        'CREATE INDEX IF NOT EXISTS user_phone_prefix_idx ON users_customuser (phone_number varchar_pattern_ops)',
+    ],
+}
+
+
+def create_prefix_indexes(apps, schema_editor):
+    for sql in INDEXES.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def drop_prefix_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor in INDEXES:
+        schema_editor.execute('DROP INDEX IF EXISTS user_username_prefix_idx')
+        schema_editor.execute('DROP INDEX IF EXISTS user_phone_prefix_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_admin_list_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_prefix_indexes, drop_prefix_indexes),
+    ]
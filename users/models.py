@@ -24,5 +24,11 @@ class CustomUser(AbstractUser):
         verbose_name="Telegram ID"
     )
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Список пользователей в админ-зоне: постраничная выборка по (date_joined, id)
+            models.Index(fields=["date_joined", "id"], name="user_date_joined_idx"),
+        ]
+
     def __str__(self):
         return self.username